@@ -1,6 +1,11 @@
 """
 Handlers du bot admin
 """
+import csv
+import io
+import tempfile
+from datetime import datetime
+
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import (
     ContextTypes, 
@@ -20,12 +25,22 @@ from database.queries import (
     complete_withdrawal,
     reject_withdrawal,
     get_daily_stats,
+    get_stats_history,
     get_active_video,
     create_video,
     get_active_testimonials,
     get_all_users,
     get_users_count,
-    get_user_by_id
+    get_user_by_id,
+    find_user,
+    get_user_shares_history,
+    get_user_withdrawals,
+    get_withdrawal_by_id,
+    count_pending_shares,
+    block_user_by_id,
+    clear_blacklist,
+    iter_active_user_ids,
+    stream_users_for_export
 )
 from database.connection import db
 from bot_admin.keyboards.admin_menus import (
@@ -47,7 +62,10 @@ from services.notifications import (
     notify_referral_bonus,
     broadcast_message
 )
-from utils.helpers import format_amount, format_datetime
+from services.media import send_media
+from services.auto_approver import auto_approver
+from services.scoring import risk_scorer, risk_flag_labels
+from utils.helpers import format_amount, format_datetime, encode_cursor, decode_cursor
 
 
 def is_admin(user_id: int) -> bool:
@@ -134,7 +152,7 @@ async def pending_shares_callback(update: Update, context: ContextTypes.DEFAULT_
     if not await admin_required(update):
         return
     
-    shares = await get_pending_shares(limit=1)
+    shares = await get_pending_shares(limit=1, by_risk=_by_risk(context))
     
     try:
         await query.message.delete()
@@ -154,6 +172,20 @@ async def pending_shares_callback(update: Update, context: ContextTypes.DEFAULT_
     await show_share_for_validation(query, share, context)
 
 
+def _by_risk(context: ContextTypes.DEFAULT_TYPE) -> bool:
+    """File d'attente triée par risque (après un scoring à la demande) ou par date"""
+    return context.user_data.get('pending_by_risk', False)
+
+
+def _risk_lines(share: dict) -> str:
+    """Score et drapeaux de risque d'un partage (vide s'il n'est pas encore scoré)"""
+    if share.get('auto_score') is None:
+        return ""
+    lines = [f"\n🎯 Score : {share['auto_score']}/100"]
+    lines.extend(risk_flag_labels(share.get('risk_flags') or 0))
+    return "\n".join(lines)
+
+
 async def show_share_for_validation(query, share: dict, context: ContextTypes.DEFAULT_TYPE):
     """Affiche un partage pour validation - avec support Cloudinary"""
     try:
@@ -161,7 +193,7 @@ async def show_share_for_validation(query, share: dict, context: ContextTypes.DE
     except:
         pass
     
-    total = await db.fetchval("SELECT COUNT(*) FROM shares WHERE status = 'pending'")
+    total = await count_pending_shares()
     
     # Formatage de la date
     created_at = share.get('created_at')
@@ -177,15 +209,15 @@ async def show_share_for_validation(query, share: dict, context: ContextTypes.DE
         f"👥 {share['group_name']}\n"
         f"🔗 {share['group_link']}\n"
         f"📅 {date_str}"
+        f"{_risk_lines(share)}"
     )
     
     # Utiliser URL Cloudinary si disponible, sinon file_id
     photo = share.get('proof_image_url') or share.get('proof_image_file_id')
     
     try:
-        await context.bot.send_photo(
-            chat_id=query.from_user.id,
-            photo=photo,
+        await send_media(
+            context.bot, "photo", query.from_user.id, "shares", share, photo,
             caption=caption,
             reply_markup=share_validation_keyboard(share['id']),
             parse_mode="HTML"
@@ -202,7 +234,7 @@ async def show_share_for_validation(query, share: dict, context: ContextTypes.DE
 
 async def show_next_pending(chat_id: int, context: ContextTypes.DEFAULT_TYPE):
     """Affiche la preuve suivante - avec support Cloudinary"""
-    shares = await get_pending_shares(limit=1)
+    shares = await get_pending_shares(limit=1, by_risk=_by_risk(context))
     
     if not shares:
         await context.bot.send_message(
@@ -214,7 +246,7 @@ async def show_next_pending(chat_id: int, context: ContextTypes.DEFAULT_TYPE):
         return
     
     share = shares[0]
-    total = await db.fetchval("SELECT COUNT(*) FROM shares WHERE status = 'pending'")
+    total = await count_pending_shares()
     
     caption = (
         f"📋 <b>Preuve #{share['id']}</b> ({total} en attente)\n\n"
@@ -222,15 +254,15 @@ async def show_next_pending(chat_id: int, context: ContextTypes.DEFAULT_TYPE):
         f"📱 {share['platform'].upper()}\n"
         f"👥 {share['group_name']}\n"
         f"🔗 {share['group_link']}"
+        f"{_risk_lines(share)}"
     )
     
     # Utiliser URL Cloudinary si disponible, sinon file_id
     photo = share.get('proof_image_url') or share.get('proof_image_file_id')
     
     try:
-        await context.bot.send_photo(
-            chat_id=chat_id,
-            photo=photo,
+        await send_media(
+            context.bot, "photo", chat_id, "shares", share, photo,
             caption=caption,
             reply_markup=share_validation_keyboard(share['id']),
             parse_mode="HTML"
@@ -270,35 +302,30 @@ async def approve_share_callback(update: Update, context: ContextTypes.DEFAULT_T
         )
         return
     
-    # Notifier l'utilisateur
-    user = await db.fetchrow("SELECT * FROM users WHERE id = $1", result['user_id'])
-    if user:
-        from config.settings import REWARD_PER_SHARE
-        try:
-            await notify_share_approved(
-                user['telegram_id'],
-                REWARD_PER_SHARE,
-                result['new_balance']
-            )
-        except Exception as e:
-            print(f"❌ Erreur notification approbation: {e}")
+    # Notifier l'utilisateur (les infos sont renvoyées par approve_share)
+    from config.settings import REWARD_PER_SHARE, REFERRAL_BONUS
+    try:
+        await notify_share_approved(
+            result['telegram_id'],
+            REWARD_PER_SHARE,
+            result['new_balance']
+        )
+    except Exception as e:
+        print(f"❌ Erreur notification approbation: {e}")
     
     # Si bonus parrainage donné, notifier le parrain
-    if result.get('referral_bonus_given') and result.get('referrer_id'):
+    if result.get('referral_bonus_given') and result.get('referrer_telegram_id'):
         try:
-            referrer = await get_user_by_id(result['referrer_id'])
-            if referrer and user:
-                from config.settings import REFERRAL_BONUS
-                await notify_referral_bonus(
-                    referrer['telegram_id'],
-                    REFERRAL_BONUS,
-                    user.get('first_name') or user.get('username') or 'Un utilisateur'
-                )
+            await notify_referral_bonus(
+                result['referrer_telegram_id'],
+                REFERRAL_BONUS,
+                result.get('first_name') or result.get('username') or 'Un utilisateur'
+            )
         except Exception as e:
             print(f"❌ Erreur notification parrainage: {e}")
     
     # Passer au suivant
-    shares = await get_pending_shares(limit=1)
+    shares = await get_pending_shares(limit=1, by_risk=_by_risk(context))
     if shares:
         await show_share_for_validation(query, shares[0], context)
     else:
@@ -385,16 +412,18 @@ async def reject_reason_callback(update: Update, context: ContextTypes.DEFAULT_T
 
 async def do_reject(admin_id: int, share_id: int, reason: str, context: ContextTypes.DEFAULT_TYPE):
     """Effectue le rejet et notifie l'utilisateur"""
-    share = await get_share_by_id(share_id)
-    if not share:
-        print(f"❌ Share {share_id} introuvable pour rejet")
-        return
-    
-    await reject_share(share_id, admin_id, reason)
-    print(f"✅ Share {share_id} rejeté en base")
+    # Connexion rendue avant la notification Telegram
+    async with db.unit_of_work():
+        share = await get_share_by_id(share_id)
+        if not share:
+            print(f"❌ Share {share_id} introuvable pour rejet")
+            return
+        
+        await reject_share(share_id, admin_id, reason)
+        print(f"✅ Share {share_id} rejeté en base")
+        user = await get_user_by_id(share['user_id'])
     
     try:
-        user = await get_user_by_id(share['user_id'])
         if user:
             print(f"📤 Envoi notification rejet à {user['telegram_id']}...")
             await notify_share_rejected(user['telegram_id'], reason)
@@ -445,13 +474,43 @@ async def next_share_callback(update: Update, context: ContextTypes.DEFAULT_TYPE
     query = update.callback_query
     await query.answer()
     
-    shares = await get_pending_shares(limit=1)
+    shares = await get_pending_shares(limit=1, by_risk=_by_risk(context))
     if shares:
         await show_share_for_validation(query, shares[0], context)
     else:
         await query.edit_message_text("✅ Aucun partage en attente !", reply_markup=back_to_menu_keyboard())
 
 
+async def score_queue_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Score la file d'attente maintenant et la trie par risque"""
+    query = update.callback_query
+    await query.answer("🎯 Scoring en cours...")
+    
+    if not await admin_required(update):
+        return
+    
+    summary = await risk_scorer.run()
+    context.user_data['pending_by_risk'] = True
+    
+    text = f"""
+🎯 <b>File d'attente scorée</b>
+
+• Preuves scorées : {summary['scored']}
+• 🔴 Risque élevé : {summary['high']}
+• 🟠 Risque moyen : {summary['medium']}
+• 🟢 Risque faible : {summary['low']}
+
+Les preuves s'affichent maintenant des plus risquées aux plus sûres.
+"""
+    
+    keyboard = [
+        [InlineKeyboardButton("⏳ Voir les preuves", callback_data="pending_shares")],
+        [InlineKeyboardButton("🏠 Menu", callback_data="admin_menu")]
+    ]
+    
+    await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode="HTML")
+
+
 # ==================== GESTION DES RETRAITS ====================
 
 async def pending_withdrawals_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -505,11 +564,15 @@ async def complete_withdrawal_callback(update: Update, context: ContextTypes.DEF
     withdrawal_id = int(query.data.replace("complete_w_", ""))
     admin_id = query.from_user.id
     
-    withdrawal = await db.fetchrow("SELECT * FROM withdrawals WHERE id = $1", withdrawal_id)
+    # Connexion rendue avant la notification Telegram
+    user = None
+    async with db.unit_of_work():
+        withdrawal = await get_withdrawal_by_id(withdrawal_id)
+        if withdrawal:
+            await complete_withdrawal(withdrawal_id, admin_id)
+            user = await get_user_by_id(withdrawal['user_id'])
+    
     if withdrawal:
-        await complete_withdrawal(withdrawal_id, admin_id)
-        
-        user = await db.fetchrow("SELECT * FROM users WHERE id = $1", withdrawal['user_id'])
         if user:
             from config.settings import PAYMENT_METHODS
             method = PAYMENT_METHODS.get(withdrawal['payment_method'], {})
@@ -538,11 +601,15 @@ async def reject_withdrawal_callback(update: Update, context: ContextTypes.DEFAU
     withdrawal_id = int(query.data.replace("reject_w_", ""))
     admin_id = query.from_user.id
     
-    withdrawal = await db.fetchrow("SELECT * FROM withdrawals WHERE id = $1", withdrawal_id)
+    # Connexion rendue avant la notification Telegram
+    user = None
+    async with db.unit_of_work():
+        withdrawal = await get_withdrawal_by_id(withdrawal_id)
+        if withdrawal:
+            await reject_withdrawal(withdrawal_id, admin_id, "Informations de paiement invalides")
+            user = await get_user_by_id(withdrawal['user_id'])
+    
     if withdrawal:
-        await reject_withdrawal(withdrawal_id, admin_id, "Informations de paiement invalides")
-        
-        user = await db.fetchrow("SELECT * FROM users WHERE id = $1", withdrawal['user_id'])
         if user:
             await notify_withdrawal_rejected(user['telegram_id'], withdrawal['amount'], "Informations de paiement invalides")
     
@@ -702,7 +769,15 @@ async def stats_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not await admin_required(update):
         return
     
-    stats = await get_daily_stats()
+    async with db.unit_of_work():
+        stats = await get_daily_stats()
+        history = await get_stats_history(7)
+    
+    trend = "\n".join(
+        f"• {day['day'].strftime('%d/%m')} : {day['shares']} partages, "
+        f"{day['approved']} approuvés, {day['new_users']} inscrits"
+        for day in history
+    ) or "• Aucune donnée"
     
     text = f"""
 📊 <b>Statistiques détaillées</b>
@@ -719,6 +794,9 @@ async def stats_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
 <b>💰 Finances</b>
 • Payé aujourd'hui : {format_amount(stats['paid_today'])}
 • En attente : {format_amount(stats['pending_amount'])}
+
+<b>📈 7 derniers jours</b>
+{trend}
 """
     
     await query.edit_message_text(text, reply_markup=back_to_menu_keyboard(), parse_mode="HTML")
@@ -765,11 +843,9 @@ async def confirm_broadcast_callback(update: Update, context: ContextTypes.DEFAU
         return
     
     message = context.user_data.get('broadcast_text', '')
-    users = await db.fetch("SELECT telegram_id FROM users WHERE is_blocked = FALSE")
-    user_ids = [u['telegram_id'] for u in users]
     
     await query.edit_message_text("📤 Envoi en cours...")
-    result = await broadcast_message(user_ids, message)
+    result = await broadcast_message(iter_active_user_ids(), message)
     context.user_data.clear()
     
     await query.edit_message_text(
@@ -789,7 +865,7 @@ async def manage_testimonials_callback(update: Update, context: ContextTypes.DEF
     if not await admin_required(update):
         return
     
-    testimonials = await get_active_testimonials()
+    testimonials = await get_active_testimonials(fresh=True)
     text = "💬 <b>Gestion des témoignages</b>\n\n"
     
     if testimonials:
@@ -852,11 +928,13 @@ async def users_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not await admin_required(update):
         return
     
-    page = context.user_data.get('users_page', 0)
+    await show_users_page(query)
+
+
+async def show_users_page(query, after: tuple = None, before: tuple = None, page: int = 0):
+    """Affiche une page d'utilisateurs (pagination par clé)"""
     limit = 10
-    offset = page * limit
-    
-    users = await get_all_users(limit=limit, offset=offset)
+    users = await get_all_users(limit=limit, after=after, before=before)
     total = await get_users_count()
     
     text = f"👥 <b>Utilisateurs</b> ({total} total)\n📄 Page {page + 1}\n\n"
@@ -869,25 +947,65 @@ async def users_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     keyboard = []
     nav_row = []
-    if page > 0:
-        nav_row.append(InlineKeyboardButton("⬅️", callback_data=f"users_page_{page-1}"))
+    if page > 0 and users:
+        nav_row.append(InlineKeyboardButton("⬅️", callback_data=f"users_page_p_{encode_cursor(users[0])}_{page-1}"))
     if len(users) == limit:
-        nav_row.append(InlineKeyboardButton("➡️", callback_data=f"users_page_{page+1}"))
+        nav_row.append(InlineKeyboardButton("➡️", callback_data=f"users_page_n_{encode_cursor(users[-1])}_{page+1}"))
     if nav_row:
         keyboard.append(nav_row)
     keyboard.append([InlineKeyboardButton("🔍 Rechercher", callback_data="search_user")])
+    keyboard.append([InlineKeyboardButton("📥 Exporter (CSV)", callback_data="export_users")])
     keyboard.append([InlineKeyboardButton("🏠 Menu", callback_data="admin_menu")])
     
     await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode="HTML")
 
 
 async def users_page_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Change de page"""
+    """Change de page (users_page_{n|p}_{curseur}_{page})"""
     query = update.callback_query
     await query.answer()
-    page = int(query.data.replace("users_page_", ""))
-    context.user_data['users_page'] = page
-    await users_callback(update, context)
+    
+    if not await admin_required(update):
+        return
+    
+    direction, micros, row_id, page = query.data.replace("users_page_", "").split("_")
+    cursor = decode_cursor(f"{micros}_{row_id}")
+    if direction == "n":
+        await show_users_page(query, after=cursor, page=int(page))
+    else:
+        await show_users_page(query, before=cursor, page=int(page))
+
+
+async def export_users_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Exporte tous les utilisateurs en CSV (lecture en flux par curseur)"""
+    query = update.callback_query
+    await query.answer("📥 Export en cours...")
+    
+    if not await admin_required(update):
+        return
+    
+    # Lignes écrites au fil du curseur dans un fichier temporaire, pas dans un tampon en mémoire
+    with tempfile.TemporaryFile() as document:
+        text = io.TextIOWrapper(document, encoding="utf-8", newline="")
+        writer = csv.writer(text)
+        writer.writerow([
+            "id", "telegram_id", "username", "first_name", "phone", "balance",
+            "total_earned", "referral_code", "referred_by", "is_blocked", "created_at"
+        ])
+        count = 0
+        async for row in stream_users_for_export():
+            writer.writerow(list(row.values()))
+            count += 1
+        text.flush()
+        text.detach()
+        document.seek(0)
+        
+        await context.bot.send_document(
+            chat_id=query.from_user.id,
+            document=document,
+            filename=f"utilisateurs_{datetime.now():%Y%m%d_%H%M}.csv",
+            caption=f"📥 {count} utilisateur(s) exporté(s)"
+        )
 
 
 async def search_user_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -911,16 +1029,9 @@ async def handle_user_search(update: Update, context: ContextTypes.DEFAULT_TYPE)
         return True
     
     search = update.message.text.strip()
-    user = None
-    
-    if search.isdigit():
-        user = await db.fetchrow("SELECT * FROM users WHERE telegram_id = $1", int(search))
     
-    if not user and search.startswith("@"):
-        user = await db.fetchrow("SELECT * FROM users WHERE username ILIKE $1", search[1:])
-    
-    if not user:
-        user = await db.fetchrow("SELECT * FROM users WHERE first_name ILIKE $1 OR username ILIKE $1", f"%{search}%")
+    async with db.unit_of_work():
+        user = await find_user(search)
     
     context.user_data.clear()
     
@@ -966,7 +1077,7 @@ async def block_user_callback(update: Update, context: ContextTypes.DEFAULT_TYPE
         return
     
     user_id = int(query.data.replace("block_user_", ""))
-    await db.execute("UPDATE users SET is_blocked = TRUE WHERE id = $1", user_id)
+    await block_user_by_id(user_id, True)
     await query.edit_message_text("✅ Utilisateur bloqué !", reply_markup=back_to_menu_keyboard())
 
 
@@ -979,7 +1090,7 @@ async def unblock_user_callback(update: Update, context: ContextTypes.DEFAULT_TY
         return
     
     user_id = int(query.data.replace("unblock_user_", ""))
-    await db.execute("UPDATE users SET is_blocked = FALSE WHERE id = $1", user_id)
+    await block_user_by_id(user_id, False)
     await query.edit_message_text("✅ Utilisateur débloqué !", reply_markup=back_to_menu_keyboard())
 
 
@@ -993,8 +1104,9 @@ async def user_history_callback(update: Update, context: ContextTypes.DEFAULT_TY
     
     user_id = int(query.data.replace("user_history_", ""))
     
-    shares = await db.fetch("SELECT * FROM shares WHERE user_id = $1 ORDER BY created_at DESC LIMIT 5", user_id)
-    withdrawals = await db.fetch("SELECT * FROM withdrawals WHERE user_id = $1 ORDER BY created_at DESC LIMIT 5", user_id)
+    async with db.unit_of_work():
+        shares = await get_user_shares_history(user_id, limit=5)
+        withdrawals = await get_user_withdrawals(user_id, limit=5)
     
     text = "📊 <b>Historique</b>\n\n<b>📤 Partages :</b>\n"
     for s in shares:
@@ -1046,10 +1158,15 @@ async def settings_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
 • Utilisé : {format_amount(budget_today)}
 • Limite/mois : {format_amount(MONTHLY_BUDGET_LIMIT)}
 
+🤖 <b>Auto-approbation</b>
+• Mode : {auto_approver.mode}
+• Score minimal : {auto_approver.min_score}/100
+
 🔗 {BOT_CHANNEL_LINK}
 """
     
     keyboard = [
+        [InlineKeyboardButton("🧪 Simuler l'auto-approbation", callback_data="auto_approve_preview")],
         [InlineKeyboardButton("🗑️ Vider blacklist", callback_data="clear_blacklist")],
         [InlineKeyboardButton("🏠 Menu", callback_data="admin_menu")]
     ]
@@ -1065,10 +1182,42 @@ async def clear_blacklist_callback(update: Update, context: ContextTypes.DEFAULT
     if not await admin_required(update):
         return
     
-    await db.execute("DELETE FROM blacklisted_groups")
+    await clear_blacklist()
     await query.edit_message_text("✅ Blacklist vidée !", reply_markup=back_to_menu_keyboard())
 
 
+async def auto_approve_preview_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Liste les preuves que l'auto-approbation approuverait maintenant (sans rien approuver)"""
+    query = update.callback_query
+    await query.answer("🧪 Simulation...")
+    
+    if not await admin_required(update):
+        return
+    
+    summary = await auto_approver.run(dry_run=True)
+    candidates = summary['candidates']
+    
+    lines = "\n".join(
+        f"• #{c['id']} - {c['platform']} - score {c['auto_score']}"
+        for c in candidates[:20]
+    ) or "• Aucune"
+    if len(candidates) > 20:
+        lines += f"\n• ... et {len(candidates) - 20} autres"
+    
+    text = f"""
+🧪 <b>Auto-approbation (simulation)</b>
+
+Preuves qui seraient approuvées (score ≥ {auto_approver.min_score}) :
+{lines}
+
+💵 Budget restant aujourd'hui : {format_amount(summary['budget_left'])}
+"""
+    if summary['locked']:
+        text += "\n⏳ Un passage est déjà en cours, réessayez dans un instant."
+    
+    await query.edit_message_text(text, reply_markup=back_to_menu_keyboard(), parse_mode="HTML")
+
+
 def get_admin_handlers():
     """Retourne tous les handlers admin"""
     return [
@@ -1081,6 +1230,7 @@ def get_admin_handlers():
         CallbackQueryHandler(reject_share_callback, pattern="^reject_\\d+$"),
         CallbackQueryHandler(reject_reason_callback, pattern="^rr_"),
         CallbackQueryHandler(next_share_callback, pattern="^next_share$"),
+        CallbackQueryHandler(score_queue_callback, pattern="^score_queue$"),
         CallbackQueryHandler(pending_withdrawals_callback, pattern="^pending_withdrawals$"),
         CallbackQueryHandler(complete_withdrawal_callback, pattern="^complete_w_"),
         CallbackQueryHandler(reject_withdrawal_callback, pattern="^reject_w_"),
@@ -1090,13 +1240,15 @@ def get_admin_handlers():
         CallbackQueryHandler(manage_testimonials_callback, pattern="^manage_testimonials$"),
         CallbackQueryHandler(add_testimonial_callback, pattern="^add_testimonial$"),
         CallbackQueryHandler(users_callback, pattern="^users$"),
-        CallbackQueryHandler(users_page_callback, pattern="^users_page_"),
+        CallbackQueryHandler(users_page_callback, pattern="^users_page_[np]_\\d+_\\d+_\\d+$"),
+        CallbackQueryHandler(export_users_callback, pattern="^export_users$"),
         CallbackQueryHandler(search_user_callback, pattern="^search_user$"),
         CallbackQueryHandler(block_user_callback, pattern="^block_user_"),
         CallbackQueryHandler(unblock_user_callback, pattern="^unblock_user_"),
         CallbackQueryHandler(user_history_callback, pattern="^user_history_"),
         CallbackQueryHandler(settings_callback, pattern="^settings$"),
         CallbackQueryHandler(clear_blacklist_callback, pattern="^clear_blacklist$"),
+        CallbackQueryHandler(auto_approve_preview_callback, pattern="^auto_approve_preview$"),
         CallbackQueryHandler(stats_callback, pattern="^stats$"),
         CallbackQueryHandler(broadcast_callback, pattern="^broadcast$"),
         CallbackQueryHandler(confirm_broadcast_callback, pattern="^confirm_broadcast$"),
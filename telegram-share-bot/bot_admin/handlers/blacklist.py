@@ -108,10 +108,11 @@ async def receive_blacklist_reason(update: Update, context: ContextTypes.DEFAULT
     platform = context.user_data.get('blacklist_platform')
     
     # Add to blacklist
-    await queries.add_to_blacklist(link, platform, reason)
+    added = await queries.add_to_blacklist(link, platform, reason)
     
+    title = "✅ <b>Groupe Ajouté à la Liste Noire</b>" if added else "ℹ️ <b>Groupe Déjà sur la Liste Noire</b>"
     await update.message.reply_text(
-        f"✅ <b>Groupe Ajouté à la Liste Noire</b>\n\n"
+        f"{title}\n\n"
         f"🔗 {link}\n"
         f"📱 {platform.title()}\n"
         f"💬 Raison : {reason}",
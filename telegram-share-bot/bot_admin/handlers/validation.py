@@ -13,6 +13,7 @@ from utils.helpers import (
 )
 from services.notifications import notify_share_approved, notify_share_rejected
 from services.fraud_detector import REJECTION_REASONS
+from services.media import send_media
 from config.settings import Rules
 
 
@@ -93,8 +94,8 @@ async def show_next_pending_share(update: Update, context: ContextTypes.DEFAULT_
     if proof_image:
         try:
             # Send photo with caption
-            await target.reply_photo(
-                photo=proof_image,
+            await send_media(
+                context.bot, "photo", target.chat_id, "shares", share, proof_image,
                 caption=message,
                 reply_markup=admin_menus.share_validation_keyboard(share['id']),
                 parse_mode="HTML"
@@ -16,7 +16,9 @@ from database.queries import (
     extend_video_validity
 )
 from services.cloud_storage import upload_video_from_telegram, delete_from_cloudinary, is_cloudinary_configured
+from services.media import send_media
 from config.settings import ADMIN_IDS
+from utils.helpers import encode_cursor, decode_cursor
 
 
 async def videos_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -28,12 +30,17 @@ async def videos_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await show_videos_list(update, context, 0)
 
 
-async def show_videos_list(update: Update, context: ContextTypes.DEFAULT_TYPE, page: int):
-    """Affiche la liste des vidéos"""
+async def show_videos_list(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    page: int,
+    after: tuple = None,
+    before: tuple = None
+):
+    """Affiche la liste des vidéos (pagination par clé)"""
     limit = 5
-    offset = page * limit
     
-    videos = await get_all_videos(limit=limit, offset=offset)
+    videos = await get_all_videos(limit=limit, after=after, before=before)
     total = await get_videos_count()
     active = await get_active_video()
     
@@ -73,10 +80,10 @@ async def show_videos_list(update: Update, context: ContextTypes.DEFAULT_TYPE, p
     
     # Pagination
     nav = []
-    if page > 0:
-        nav.append(InlineKeyboardButton("⬅️ Préc", callback_data=f"vid_page_{page-1}"))
+    if page > 0 and videos:
+        nav.append(InlineKeyboardButton("⬅️ Préc", callback_data=f"vid_page_p_{encode_cursor(videos[0])}_{page-1}"))
     if len(videos) == limit:
-        nav.append(InlineKeyboardButton("Suiv ➡️", callback_data=f"vid_page_{page+1}"))
+        nav.append(InlineKeyboardButton("Suiv ➡️", callback_data=f"vid_page_n_{encode_cursor(videos[-1])}_{page+1}"))
     if nav:
         keyboard.append(nav)
     
@@ -99,11 +106,15 @@ async def show_videos_list(update: Update, context: ContextTypes.DEFAULT_TYPE, p
 
 
 async def vid_page_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Change de page"""
+    """Change de page (vid_page_{n|p}_{curseur}_{page})"""
     query = update.callback_query
     await query.answer()
-    page = int(query.data.replace("vid_page_", ""))
-    await show_videos_list(update, context, page)
+    direction, micros, row_id, page = query.data.replace("vid_page_", "").split("_")
+    cursor = decode_cursor(f"{micros}_{row_id}")
+    if direction == "n":
+        await show_videos_list(update, context, int(page), after=cursor)
+    else:
+        await show_videos_list(update, context, int(page), before=cursor)
 
 
 async def vid_view_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -183,9 +194,8 @@ async def vid_test_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
         video_url = video.get('cloud_url') or video.get('url')
         
         if video_url:
-            await context.bot.send_video(
-                chat_id=query.from_user.id,
-                video=video_url,
+            await send_media(
+                context.bot, "video", query.from_user.id, "videos", video, video_url,
                 caption=f"🧪 <b>TEST</b> - {video['title']}\n\n{video['caption'][:500]}",
                 parse_mode="HTML"
             )
@@ -517,7 +527,7 @@ def get_video_admin_handlers():
     return [
         CallbackQueryHandler(videos_menu, pattern="^manage_videos$"),
         CallbackQueryHandler(vid_list_callback, pattern="^vid_list$"),
-        CallbackQueryHandler(vid_page_callback, pattern=r"^vid_page_\d+$"),
+        CallbackQueryHandler(vid_page_callback, pattern=r"^vid_page_[np]_\d+_\d+_\d+$"),
         CallbackQueryHandler(vid_view_callback, pattern=r"^vid_view_\d+$"),
         CallbackQueryHandler(vid_test_callback, pattern=r"^vid_test_\d+$"),
         CallbackQueryHandler(vid_toggle_callback, pattern=r"^vid_toggle_\d+$"),
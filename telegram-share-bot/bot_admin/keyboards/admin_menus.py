@@ -25,6 +25,7 @@ def admin_main_menu() -> InlineKeyboardMarkup:
             InlineKeyboardButton("⚙️ Config", callback_data="settings")
         ],
         [
+            InlineKeyboardButton("🎯 Scorer la file", callback_data="score_queue"),
             InlineKeyboardButton("📢 Broadcast", callback_data="broadcast")
         ]
     ]
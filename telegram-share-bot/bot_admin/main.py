@@ -12,6 +12,9 @@ from telegram.ext import (
 
 from config.settings import BOT_ADMIN_TOKEN
 from database.connection import init_database, db
+from database.queries import reconcile_stats_counters
+from services.auto_approver import auto_approver
+from services.scoring import risk_scorer
 from bot_admin.handlers import (
     get_admin_handlers,
     handle_video_upload,
@@ -60,11 +63,16 @@ async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def post_init(application: Application):
     """Actions après initialisation"""
     await init_database()
+    logger.info(f"✅ Compteurs de statistiques recalés ({await reconcile_stats_counters()} corrigés)")
+    risk_scorer.start()
+    auto_approver.start()
     logger.info("✅ Bot admin initialisé")
 
 
 async def post_shutdown(application: Application):
     """Actions avant arrêt"""
+    await auto_approver.stop()
+    await risk_scorer.stop()
     await db.disconnect()
     logger.info("🔌 Bot admin arrêté")
 
@@ -7,7 +7,8 @@ from telegram.ext import ContextTypes, CommandHandler, CallbackQueryHandler
 from database.queries import (
     get_user_by_telegram_id,
     get_user_shares_history,
-    get_user_withdrawals
+    get_user_withdrawals,
+    get_user_stats
 )
 from bot_user.keyboards.menus import main_menu_keyboard, back_keyboard
 from config.settings import MIN_WITHDRAWAL
@@ -36,14 +37,12 @@ async def balance_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
-    # Calculer les stats
-    shares = await get_user_shares_history(db_user['id'], limit=100)
-    approved = len([s for s in shares if s['status'] == 'approved'])
-    pending = len([s for s in shares if s['status'] == 'pending'])
-    rejected = len([s for s in shares if s['status'] == 'rejected'])
-    
-    withdrawals = await get_user_withdrawals(db_user['id'], limit=100)
-    total_withdrawn = sum(w['amount'] for w in withdrawals if w['status'] == 'completed')
+    # Compteurs maintenus à l'écriture (table user_stats)
+    stats = await get_user_stats(db_user['id'])
+    approved = stats['approved_count']
+    pending = stats['pending_count']
+    rejected = stats['rejected_count']
+    total_withdrawn = stats['total_withdrawn']
     
     can_withdraw = "✅ Oui" if db_user['balance'] >= MIN_WITHDRAWAL else f"❌ Non (min {MIN_WITHDRAWAL} FCFA)"
     
@@ -4,8 +4,7 @@ Handler pour le système de parrainage
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, CommandHandler, CallbackQueryHandler
 
-from database.queries import get_user_by_telegram_id
-from database.connection import db
+from database.queries import get_user_by_telegram_id, get_user_referrals
 from bot_user.keyboards.menus import referral_keyboard, main_menu_keyboard
 from utils.constants import ERROR_NOT_REGISTERED
 from utils.helpers import format_amount
@@ -33,13 +32,7 @@ async def referral_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     # Récupérer les filleuls avec leur statut (actifs = au moins 1 partage approuvé)
-    referrals = await db.fetch("""
-        SELECT u.*, 
-               (SELECT COUNT(*) FROM shares WHERE user_id = u.id AND status = 'approved') as approved_shares
-        FROM users u 
-        WHERE u.referred_by = $1
-        ORDER BY u.created_at DESC
-    """, db_user['id'])
+    referrals = await get_user_referrals(db_user['id'])
     
     total_referrals = len(referrals)
     active_referrals = len([r for r in referrals if r['approved_shares'] > 0])
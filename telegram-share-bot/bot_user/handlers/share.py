@@ -9,26 +9,29 @@ from telegram.ext import (
     MessageHandler,
     filters
 )
-import hashlib
 from datetime import datetime
 
 from database.queries import (
     get_user_by_telegram_id,
     get_active_video,
-    get_active_testimonials,
+    testimonials_cache,
     get_user_shares_today,
     create_share,
     get_video_by_id,
-    check_duplicate_proof
+    share_limiter
 )
-from services.fraud_detector import validate_proof_image
-from services.cloud_storage import upload_image_from_telegram, is_cloudinary_configured
+from database.connection import db
+from services.fraud_detector import validate_proof_image, validate_share_group
+from services.cloud_storage import upload_image_bytes, is_cloudinary_configured
+from services.media import send_media
 from bot_user.keyboards.menus import (
     platform_selection_keyboard,
+    testimonial_selection_keyboard,
     back_keyboard,
     main_menu_keyboard
 )
 from utils.constants import ConversationState, Callback
+from utils import rate_limit
 from utils.helpers import normalize_link, is_valid_telegram_link, is_valid_whatsapp_link
 from config.settings import (
     BOT_CHANNEL_LINK, 
@@ -53,7 +56,10 @@ async def share_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         except:
             pass
     
-    db_user = await get_user_by_telegram_id(user.id)
+    async with db.unit_of_work():
+        db_user = await get_user_by_telegram_id(user.id)
+        video = await get_active_video() if db_user else None
+    
     if not db_user:
         await context.bot.send_message(
             chat_id=user.id,
@@ -61,7 +67,6 @@ async def share_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
-    video = await get_active_video()
     if not video:
         await context.bot.send_message(
             chat_id=user.id,
@@ -84,6 +89,35 @@ async def share_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 # ==================== ÉTAPE 2: SÉLECTION TÉMOIGNAGE ====================
 
+class TestimonialView:
+    """Clavier de sélection et textes avec lien, construits une fois par version de la liste"""
+    
+    def __init__(self, testimonials: tuple):
+        self.source = testimonials
+        self.keyboard = testimonial_selection_keyboard(testimonials)
+        self.texts = {t['id']: format_testimonial(t['message']) for t in testimonials}
+
+
+_testimonial_view = None
+
+
+def format_testimonial(message: str) -> str:
+    """Insère le lien du bot dans un témoignage"""
+    try:
+        return message.format(link=BOT_CHANNEL_LINK)
+    except (KeyError, IndexError, ValueError):
+        return message.replace("{link}", BOT_CHANNEL_LINK)
+
+
+async def get_testimonial_view() -> TestimonialView:
+    """Vue des témoignages servie depuis le cache (aucune lecture en base)"""
+    global _testimonial_view
+    testimonials = await testimonials_cache.get()
+    if _testimonial_view is None or _testimonial_view.source is not testimonials:
+        _testimonial_view = TestimonialView(testimonials)
+    return _testimonial_view
+
+
 async def select_platform_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Sélection de la plateforme"""
     query = update.callback_query
@@ -112,28 +146,14 @@ async def select_platform_callback(update: Update, context: ContextTypes.DEFAULT
     
     context.user_data['platform'] = platform
     
-    # Afficher témoignages
-    testimonials = await get_active_testimonials()
-    
-    keyboard = []
-    for i, t in enumerate(testimonials, 1):
-        preview = t['message'][:35] + "..." if len(t['message']) > 35 else t['message']
-        keyboard.append([
-            InlineKeyboardButton(f"{i}. {preview}", callback_data=f"testi_{t['id']}")
-        ])
-    
-    keyboard.append([
-        InlineKeyboardButton("✏️ Écrire mon message", callback_data="testi_custom")
-    ])
-    keyboard.append([
-        InlineKeyboardButton("🔙 Retour", callback_data="share")
-    ])
+    # Afficher témoignages (clavier prêt à l'emploi)
+    view = await get_testimonial_view()
     
     await query.edit_message_text(
         "💬 <b>ÉTAPE 1/4 - Choisir le témoignage</b>\n\n"
         "Ce message accompagnera votre partage.\n"
         "Choisissez-en un ou écrivez le vôtre :",
-        reply_markup=InlineKeyboardMarkup(keyboard),
+        reply_markup=view.keyboard,
         parse_mode="HTML"
     )
 
@@ -161,11 +181,12 @@ async def select_testimonial_callback(update: Update, context: ContextTypes.DEFA
     
     # Témoignage prédéfini
     testimonial_id = int(query.data.replace("testi_", ""))
-    testimonials = await get_active_testimonials()
-    testimonial = next((t for t in testimonials if t['id'] == testimonial_id), None)
+    view = await get_testimonial_view()
+    text = view.texts.get(testimonial_id)
     
-    if testimonial:
-        context.user_data['testimonial_text'] = testimonial['message'].format(link=BOT_CHANNEL_LINK)
+    if text:
+        context.user_data['testimonial_id'] = testimonial_id
+        context.user_data['testimonial_text'] = text
     
     await show_share_content(update, context)
 
@@ -189,6 +210,7 @@ async def handle_custom_testimonial(update: Update, context: ContextTypes.DEFAUL
     if BOT_CHANNEL_LINK not in text:
         text = f"{text}\n\n👉 {BOT_CHANNEL_LINK}"
     
+    context.user_data['testimonial_id'] = None
     context.user_data['testimonial_text'] = text
     context.user_data['state'] = None
     
@@ -243,9 +265,8 @@ async def send_share_content(chat_id: int, context: ContextTypes.DEFAULT_TYPE):
     
     if video_url:
         try:
-            await context.bot.send_video(
-                chat_id=chat_id,
-                video=video_url,
+            await send_media(
+                context.bot, "video", chat_id, "videos", video, video_url,
                 caption=f"📹 <b>{video['title']}</b>\n\n{video['caption']}",
                 parse_mode="HTML"
             )
@@ -313,13 +334,26 @@ async def submit_proof_callback(update: Update, context: ContextTypes.DEFAULT_TY
     )
 
 
+def _rate_limit_message(reason: str, wait: float, platform: str) -> str:
+    """Message de refus du limiteur de soumissions"""
+    platform_name = "Telegram" if platform == "telegram" else "WhatsApp"
+    if reason == rate_limit.BURST:
+        return f"⏳ Trop d'envois d'affilée. Réessayez dans {int(wait) + 1} secondes."
+    if reason == rate_limit.DAILY:
+        max_shares = MAX_TELEGRAM_SHARES_PER_DAY if platform == "telegram" else MAX_WHATSAPP_SHARES_PER_DAY
+        return f"❌ Limite atteinte: {max_shares} partages {platform_name} par jour. Revenez demain !"
+    return (
+        f"⏳ Attendez encore {int(wait // 60) + 1} min avant votre prochain partage {platform_name}."
+    )
+
+
 async def handle_proof_image(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Réception de la capture d'écran avec upload Cloudinary"""
     if context.user_data.get('state') != ConversationState.WAITING_PROOF:
         return
     
     user = update.effective_user
-    db_user = await get_user_by_telegram_id(user.id)
+    platform = context.user_data.get('platform', 'telegram')
     
     # Récupérer l'image
     if update.message.photo:
@@ -331,6 +365,15 @@ async def handle_proof_image(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await update.message.reply_text("❌ Envoyez une image (photo ou fichier image).")
         return
     
+    # Limites vérifiées en mémoire, avant toute lecture en base ou téléchargement
+    # (un envoi qui n'est pas une image ne consomme pas de jeton)
+    refused = share_limiter.check(user.id, platform)
+    if refused:
+        await update.message.reply_text(_rate_limit_message(*refused, platform))
+        return
+    
+    db_user = await get_user_by_telegram_id(user.id)
+    
     # Message de chargement
     loading_msg = await update.message.reply_text(
         "📤 <b>Traitement de votre preuve...</b>\n"
@@ -339,28 +382,14 @@ async def handle_proof_image(update: Update, context: ContextTypes.DEFAULT_TYPE)
     )
     
     try:
-        # Télécharger le fichier pour calculer le hash et valider
+        # Un seul téléchargement: le même tampon sert à la validation,
+        # à l'empreinte et à l'upload cloud
         file = await context.bot.get_file(file_id)
         image_data = await file.download_as_bytearray()
-        image_bytes = bytes(image_data)
-        
-        # Calculer le hash
-        proof_hash = hashlib.sha256(image_bytes).hexdigest()
-        
-        # Vérifier si preuve déjà soumise
-        if await check_duplicate_proof(proof_hash):
-            await loading_msg.edit_text(
-                "❌ <b>Preuve déjà utilisée</b>\n\n"
-                "Cette image a déjà été soumise. Utilisez une nouvelle capture.",
-                parse_mode="HTML"
-            )
-            return
-        
-        platform = context.user_data.get('platform', 'telegram')
         
-        # Valider l'image
-        result, _ = await validate_proof_image(
-            image_bytes,
+        # Valider l'image (doublons exacts et quasi identiques compris)
+        result, proof_hash = await validate_proof_image(
+            image_data,
             db_user['id'],
             "",
             platform
@@ -386,9 +415,8 @@ async def handle_proof_image(update: Update, context: ContextTypes.DEFAULT_TYPE)
                 parse_mode="HTML"
             )
             
-            upload_result = await upload_image_from_telegram(
-                context.bot,
-                file_id,
+            upload_result = await upload_image_bytes(
+                image_data,
                 f"proof_{db_user['id']}_{int(datetime.now().timestamp())}"
             )
             
@@ -421,6 +449,7 @@ async def handle_proof_image(update: Update, context: ContextTypes.DEFAULT_TYPE)
         # Stocker les données
         context.user_data['proof_file_id'] = file_id
         context.user_data['proof_hash'] = proof_hash
+        context.user_data['proof_dhash'] = result.proof_dhash
         context.user_data['proof_image_url'] = proof_image_url
         context.user_data['proof_cloud_public_id'] = proof_cloud_public_id
         context.user_data['state'] = ConversationState.WAITING_GROUP_LINK
@@ -515,6 +544,23 @@ async def handle_group_name(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
     
     try:
+        # Contrôles du groupe (liste noire, réutilisation), maintenant que le lien est connu
+        group_check = await validate_share_group(
+            db_user['id'],
+            context.user_data['group_link'],
+            context.user_data['platform']
+        )
+        if not group_check.is_valid:
+            keyboard = [[InlineKeyboardButton("❌ Annuler", callback_data="cancel_share")]]
+            context.user_data['state'] = ConversationState.WAITING_GROUP_LINK
+            await final_msg.edit_text(
+                f"❌ <b>Groupe refusé</b>\n\n{group_check.error}\n\n"
+                f"Envoyez le lien d'un autre groupe :",
+                reply_markup=InlineKeyboardMarkup(keyboard),
+                parse_mode="HTML"
+            )
+            return
+        
         # Créer le partage avec toutes les infos
         share = await create_share(
             user_id=db_user['id'],
@@ -522,6 +568,7 @@ async def handle_group_name(update: Update, context: ContextTypes.DEFAULT_TYPE):
             platform=context.user_data['platform'],
             proof_image_file_id=context.user_data['proof_file_id'],
             proof_image_hash=context.user_data['proof_hash'],
+            proof_dhash=context.user_data.get('proof_dhash'),
             proof_image_url=context.user_data.get('proof_image_url'),
             proof_cloud_public_id=context.user_data.get('proof_cloud_public_id'),
             group_name=group_name,
@@ -529,6 +576,7 @@ async def handle_group_name(update: Update, context: ContextTypes.DEFAULT_TYPE):
             testimonial_id=None,
             custom_testimonial=context.user_data.get('testimonial_text')
         )
+        share_limiter.record(user.id, context.user_data['platform'])
         
         platform_name = "Telegram" if context.user_data['platform'] == "telegram" else "WhatsApp"
         
@@ -16,6 +16,7 @@ from database.queries import (
     update_user_phone,
     update_user_last_active
 )
+from database.connection import db
 from bot_user.keyboards.menus import (
     main_menu_keyboard, 
     phone_request_keyboard,
@@ -29,6 +30,7 @@ from utils.constants import (
     ConversationState
 )
 from config.settings import BOT_CHANNEL_LINK
+from services.media import send_media
 
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -41,8 +43,11 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if context.args:
         referral_code = context.args[0]
     
-    # Vérifier si l'utilisateur existe déjà
-    existing_user = await get_user_by_telegram_id(telegram_id)
+    # Vérifier si l'utilisateur existe déjà (et mettre à jour sa dernière activité)
+    async with db.unit_of_work():
+        existing_user = await get_user_by_telegram_id(telegram_id)
+        if existing_user and not existing_user['is_blocked']:
+            await update_user_last_active(telegram_id)
     
     if existing_user:
         # Utilisateur existant
@@ -50,9 +55,6 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text(ERROR_USER_BLOCKED)
             return
         
-        # Mettre à jour la dernière activité
-        await update_user_last_active(telegram_id)
-        
         # Afficher le menu principal
         await update.message.reply_text(
             f"👋 Rebonjour <b>{user.first_name}</b> !\n\n"
@@ -96,16 +98,15 @@ async def handle_contact(update: Update, context: ContextTypes.DEFAULT_TYPE):
     phone = contact.phone_number
     referral_code = context.user_data.get('referral_code')
     
-    # Créer l'utilisateur
-    new_user = await create_user(
-        telegram_id=user.id,
-        username=user.username,
-        first_name=user.first_name,
-        referred_by_code=referral_code
-    )
-    
-    # Mettre à jour le numéro de téléphone
-    await update_user_phone(user.id, phone)
+    # Créer l'utilisateur et enregistrer le numéro (une transaction, bonus parrain compris)
+    async with db.unit_of_work(transaction=True):
+        new_user = await create_user(
+            telegram_id=user.id,
+            username=user.username,
+            first_name=user.first_name,
+            referred_by_code=referral_code
+        )
+        await update_user_phone(user.id, phone)
     
     # Supprimer le clavier de contact
     await update.message.reply_text(
@@ -287,9 +288,8 @@ async def watch_help_video(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     if video_source:
         try:
-            await context.bot.send_video(
-                chat_id=query.from_user.id,
-                video=video_source,
+            await send_media(
+                context.bot, "video", query.from_user.id, "help_videos", video, video_source,
                 caption=caption,
                 reply_markup=keyboard,
                 parse_mode="HTML"
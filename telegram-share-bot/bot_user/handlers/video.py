@@ -8,6 +8,7 @@ from telegram.ext import ContextTypes, CommandHandler, CallbackQueryHandler
 
 from database.queries import get_user_by_telegram_id, get_active_video
 from bot_user.keyboards.menus import video_keyboard, main_menu_keyboard
+from services.media import send_media
 
 
 async def video_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -65,9 +66,8 @@ async def video_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     try:
         if video_url:
-            await context.bot.send_video(
-                chat_id=user.id,
-                video=video_url,
+            await send_media(
+                context.bot, "video", user.id, "videos", video, video_url,
                 caption=caption,
                 parse_mode="HTML",
                 reply_markup=video_keyboard()
@@ -14,6 +14,7 @@ from database.queries import (
     get_user_by_telegram_id,
     create_withdrawal
 )
+from database.connection import db
 from bot_user.keyboards.menus import (
     payment_methods_keyboard,
     withdrawal_amount_keyboard,
@@ -255,28 +256,34 @@ async def confirm_withdrawal(update: Update, context: ContextTypes.DEFAULT_TYPE)
     await query.answer()
     
     user = update.effective_user
-    db_user = await get_user_by_telegram_id(user.id)
     
     amount = context.user_data.get('amount')
     payment_method = context.user_data.get('payment_method')
     payment_details = context.user_data.get('payment_details')
     
-    # Vérification finale du solde
-    if db_user['balance'] < amount:
+    # Vérification du solde (lecture directe, sans cache) et création du retrait
+    async with db.unit_of_work(transaction=True):
+        db_user = await get_user_by_telegram_id(user.id, fresh=True)
+        
+        # Vérification finale du solde (create_withdrawal la refait à l'écriture)
+        if db_user['balance'] < amount:
+            withdrawal = None
+        else:
+            # Créer le retrait
+            withdrawal = await create_withdrawal(
+                user_id=db_user['id'],
+                amount=amount,
+                payment_method=payment_method,
+                payment_details=payment_details
+            )
+    
+    if withdrawal is None:
         await query.edit_message_text(
             "❌ Solde insuffisant. Veuillez réessayer.",
             reply_markup=back_keyboard()
         )
         return
     
-    # Créer le retrait
-    withdrawal = await create_withdrawal(
-        user_id=db_user['id'],
-        amount=amount,
-        payment_method=payment_method,
-        payment_details=payment_details
-    )
-    
     await query.edit_message_text(
         WITHDRAWAL_SUCCESS_MESSAGE,
         reply_markup=main_menu_keyboard(),
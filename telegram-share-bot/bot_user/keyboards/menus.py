@@ -96,6 +96,24 @@ def testimonials_keyboard(testimonials: List[dict]) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(keyboard)
 
 
+def testimonial_selection_keyboard(testimonials: List[dict]) -> InlineKeyboardMarkup:
+    """Choix du témoignage dans le parcours de partage (callbacks testi_*)"""
+    keyboard = []
+    for i, t in enumerate(testimonials, 1):
+        preview = t['message'][:35] + "..." if len(t['message']) > 35 else t['message']
+        keyboard.append([
+            InlineKeyboardButton(f"{i}. {preview}", callback_data=f"testi_{t['id']}")
+        ])
+    
+    keyboard.append([
+        InlineKeyboardButton("✏️ Écrire mon message", callback_data="testi_custom")
+    ])
+    keyboard.append([
+        InlineKeyboardButton("🔙 Retour", callback_data="share")
+    ])
+    return InlineKeyboardMarkup(keyboard)
+
+
 def share_content_keyboard() -> InlineKeyboardMarkup:
     """Boutons après affichage du contenu à partager"""
     keyboard = [
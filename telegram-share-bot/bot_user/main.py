@@ -13,6 +13,8 @@ from telegram.ext import (
 
 from config.settings import BOT_USER_TOKEN
 from database.connection import init_database, insert_default_testimonials, db
+from database.queries import load_blacklist, load_proof_index, load_share_limiter
+from services.image_pool import image_pool
 from bot_user.handlers import (
     get_start_handlers,
     get_video_handlers,
@@ -66,12 +68,16 @@ async def post_init(application: Application):
     """Actions après initialisation"""
     await init_database()
     await insert_default_testimonials()
+    logger.info(f"✅ Liste noire chargée ({await load_blacklist()} entrées)")
+    logger.info(f"✅ Index des empreintes chargé ({await load_proof_index()} preuves)")
+    logger.info(f"✅ Limites de soumission chargées ({await load_share_limiter()} partages récents)")
     logger.info("✅ Bot utilisateur initialisé")
 
 
 async def post_shutdown(application: Application):
     """Actions avant arrêt"""
     await db.disconnect()
+    image_pool.shutdown()
     logger.info("🔌 Bot utilisateur arrêté")
 
 
@@ -48,6 +48,31 @@ def validate_config():
 if DATABASE_URL and DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
+# Réplique en lecture seule (optionnelle) pour les statistiques et historiques
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL", "")
+if DATABASE_REPLICA_URL and DATABASE_REPLICA_URL.startswith("postgres://"):
+    DATABASE_REPLICA_URL = DATABASE_REPLICA_URL.replace("postgres://", "postgresql://", 1)
+
+# === POOL DE CONNEXIONS ===
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_MAX_INACTIVE_LIFETIME = int(os.getenv("DB_MAX_INACTIVE_LIFETIME", "300"))  # secondes
+DB_HEALTH_CHECK_INTERVAL = int(os.getenv("DB_HEALTH_CHECK_INTERVAL", "30"))  # secondes
+DB_WARM_TIMEOUT_LIMIT = int(os.getenv("DB_WARM_TIMEOUT_LIMIT", "3"))  # réchauffages expirés consécutifs
+DB_BREAKER_THRESHOLD = int(os.getenv("DB_BREAKER_THRESHOLD", "3"))  # échecs consécutifs
+DB_BREAKER_COOLDOWN = int(os.getenv("DB_BREAKER_COOLDOWN", "15"))  # secondes
+DB_REPLICA_POOL_MAX_SIZE = int(os.getenv("DB_REPLICA_POOL_MAX_SIZE", "5"))
+DB_REPLICA_MAX_LAG = int(os.getenv("DB_REPLICA_MAX_LAG", "10"))  # secondes de retard tolérées
+# Pooler en mode transaction (Neon "-pooler", PgBouncer): pas d'instructions préparées nommées
+# "auto" = détecté d'après l'hôte de l'URL, sinon "on" / "off"
+DB_TRANSACTION_POOLER = os.getenv("DB_TRANSACTION_POOLER", "auto").lower()
+
+# === CACHES EN MÉMOIRE ===
+# Durée de vie maximale d'une entrée (filet de sécurité si une invalidation est perdue)
+CACHE_MAX_TTL = int(os.getenv("CACHE_MAX_TTL", "300"))  # secondes
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))  # profils gardés (LRU)
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "60"))  # secondes
+
 # === CONFIGURATION ÉCONOMIQUE ===
 REWARD_PER_SHARE = 100  # FCFA par partage validé
 REFERRAL_BONUS = 50  # FCFA par filleul inscrit
@@ -140,6 +165,46 @@ MONTHLY_BUDGET_LIMIT = int(os.getenv("MONTHLY_BUDGET_LIMIT", "1000000"))  # FCFA
 MIN_IMAGE_SIZE = 500  # pixels minimum
 GROUP_REUSE_DAYS = 7  # jours avant de réutiliser un groupe
 MIN_DELAY_BETWEEN_SHARES = 30  # minutes entre partages
+# Rafales d'envois de captures: envois d'affilée, puis un envoi toutes les N secondes
+PROOF_BURST = int(os.getenv("PROOF_BURST", "3"))
+PROOF_REFILL_SECONDS = int(os.getenv("PROOF_REFILL_SECONDS", "20"))
+# Captures quasi identiques: bits de dHash différents (sur 64) encore considérés comme doublon
+PROOF_SIMILARITY_DISTANCE = int(os.getenv("PROOF_SIMILARITY_DISTANCE", "4"))
+
+# === SCORE DE RISQUE DE LA FILE D'ATTENTE ===
+# Points ajoutés au score de base (50) par règle déclenchée, 0-100 au final.
+# Surcharge possible: SCORING_WEIGHTS="new_user=-20,group_burst=-30"
+SCORING_WEIGHTS = {
+    "high_rate": 30,          # taux de validation >= 90%
+    "good_rate": 20,          # taux de validation >= 70%
+    "fair_rate": 10,          # taux de validation >= 50%
+    "low_rate": -20,          # taux de validation < 30%
+    "new_group": 10,          # groupe jamais utilisé
+    "busy_group": -10,        # groupe utilisé plus de 50 fois
+    "group_burst": -20,       # groupe utilisé plus de 10 fois en 24h
+    "many_shares_today": -10, # 4 partages ou plus aujourd'hui
+    "new_user": -15,          # inscrit depuis moins de 24h
+}
+SCORING_WEIGHTS.update({
+    name.strip(): int(value)
+    for name, value in (
+        item.split("=", 1) for item in os.getenv("SCORING_WEIGHTS", "").split(",") if "=" in item
+    )
+})
+SCORING_INTERVAL = int(os.getenv("SCORING_INTERVAL", "300"))  # secondes entre deux passages
+SCORING_BATCH_SIZE = int(os.getenv("SCORING_BATCH_SIZE", "5000"))  # partages lus par requête
+
+# === AUTO-APPROBATION ===
+# "off", "dry_run" (journalise ce qui serait approuvé) ou "on"
+AUTO_APPROVE = os.getenv("AUTO_APPROVE", "off").lower()
+AUTO_APPROVE_MIN_SCORE = int(os.getenv("AUTO_APPROVE_MIN_SCORE", "80"))  # score minimal (0-100)
+AUTO_APPROVE_INTERVAL = int(os.getenv("AUTO_APPROVE_INTERVAL", "120"))  # secondes entre deux passages
+AUTO_APPROVE_BATCH_SIZE = int(os.getenv("AUTO_APPROVE_BATCH_SIZE", "50"))  # partages par transaction
+
+# === TRAITEMENT DES IMAGES ===
+# Processus dédiés au hash / décodage des preuves, et nombre maximal d'images en file
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+IMAGE_QUEUE_LIMIT = int(os.getenv("IMAGE_QUEUE_LIMIT", "16"))
 
 # === CLOUDINARY (Stockage vidéos) ===
 CLOUDINARY_CLOUD_NAME = os.getenv("CLOUDINARY_CLOUD_NAME")
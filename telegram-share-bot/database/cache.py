@@ -0,0 +1,177 @@
+"""
+Caches en mémoire des lectures chaudes, invalidés par les modifications admin
+(localement et dans les autres processus via le bus d'événements)
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from config.settings import CACHE_MAX_TTL
+from database.events import EventType, bus
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class CachedValue:
+    """
+    Valeur unique chargée à la demande et gardée jusqu'à son expiration.
+    `ttl(value)` donne la durée de vie (bornée par `max_ttl`).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[Callable[[Any], float]] = None,
+        max_ttl: float = CACHE_MAX_TTL
+    ):
+        self.name = name
+        self.loader = loader
+        self.ttl = ttl
+        self.max_ttl = max_ttl
+        self.hits = 0
+        self.misses = 0
+        self._value = _MISSING
+        self._expires = 0.0
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    def peek(self, default=None):
+        """Valeur en cache sans chargement (default si absente ou expirée)"""
+        if self._value is _MISSING or time.monotonic() >= self._expires:
+            return default
+        return self._value
+
+    async def get(self):
+        """Valeur en cache, chargée une seule fois même en cas d'appels concurrents"""
+        value = self.peek(_MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+        async with self._lock:
+            value = self.peek(_MISSING)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+            self.misses += 1
+            generation = self._generation
+            value = await self.loader()
+            # Invalidé pendant le chargement: la valeur lue est peut-être déjà périmée
+            if generation == self._generation:
+                ttl = self.max_ttl if self.ttl is None else min(self.ttl(value), self.max_ttl)
+                self._value = value
+                self._expires = time.monotonic() + max(ttl, 0)
+            return value
+
+    def invalidate(self, key=None):
+        self._generation += 1
+        self._value = _MISSING
+        self._expires = 0.0
+
+
+class LRUCache:
+    """Entrées par clé, bornées en nombre (LRU) et en durée de vie (TTL)"""
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()  # clé -> (expiration, valeur)
+
+    def get(self, key, default=None):
+        key = str(key)
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() >= entry[0]:
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value):
+        key = str(key)
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def replace(self, key, value):
+        """Remplace une entrée présente sans prolonger sa durée de vie"""
+        key = str(key)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries[key] = (entry[0], value)
+
+    def invalidate(self, key=None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(str(key), None)
+
+
+# Caches nommés du processus
+caches: Dict[str, Any] = {}
+
+
+def cached_value(name: str, loader, ttl=None, max_ttl: float = CACHE_MAX_TTL) -> CachedValue:
+    """Déclare un cache nommé (invalidable par son nom)"""
+    cache = caches[name] = CachedValue(name, loader, ttl, max_ttl)
+    return cache
+
+
+def lru_cache(name: str, maxsize: int, ttl: float) -> LRUCache:
+    """Déclare un cache par clé (invalidable par nom et clé)"""
+    cache = caches[name] = LRUCache(name, maxsize, ttl)
+    return cache
+
+
+def _cache_gauges():
+    for name, cache in caches.items():
+        yield {"cache": name, "result": "hit"}, cache.hits
+        yield {"cache": name, "result": "miss"}, cache.misses
+
+
+registry.gauge("cache_requests", "Lectures des caches en mémoire (hit/miss)", _cache_gauges)
+
+
+def invalidate_local(name: str, keys: Iterable = None):
+    cache = caches.get(name)
+    if cache is None:
+        return
+    if keys is None:
+        cache.invalidate()
+    else:
+        for key in keys:
+            cache.invalidate(key)
+
+
+def invalidate_all_local():
+    for cache in caches.values():
+        cache.invalidate()
+
+
+async def invalidate(name: str, keys: Iterable = None):
+    """Invalide le cache (ou seulement `keys`) ici et dans les autres processus"""
+    if keys is not None:
+        keys = [str(key) for key in keys if key is not None]
+        if not keys:
+            return
+    await bus.publish(EventType.CACHE_INVALIDATED, name=name, keys=keys)
+
+
+def _on_cache_invalidated(event):
+    invalidate_local(event.data["name"], event.data.get("keys"))
+
+
+bus.subscribe(EventType.CACHE_INVALIDATED, _on_cache_invalidated)
+# Invalidations éventuellement manquées pendant une coupure de l'écoute
+bus.on_resubscribe(invalidate_all_local)
@@ -0,0 +1,139 @@
+"""
+Catalogue des requêtes nommées, préparées au premier usage sur chaque connexion
+"""
+from urllib.parse import urlparse
+
+import asyncpg
+
+from config.settings import DB_TRANSACTION_POOLER
+
+# Requêtes du chemin chaud préparées dès l'ouverture d'une connexion (les autres au premier usage)
+WARM_QUERIES = (
+    "get_user_by_telegram_id",
+    "update_user_last_active",
+    "get_active_video",
+    "get_fraud_signals",
+    "create_share",
+)
+
+# Erreurs après lesquelles une instruction préparée doit être recréée (schéma modifié)
+_STALE_STATEMENT_ERRORS = (
+    asyncpg.exceptions.InvalidCachedStatementError,
+    asyncpg.exceptions.OutdatedSchemaCacheError,
+)
+
+
+class Query:
+    """Requête SQL identifiée par un nom stable (étiquette des métriques)"""
+
+    __slots__ = ("name", "sql")
+
+    def __init__(self, name: str, sql: str):
+        self.name = name
+        self.sql = sql
+
+    def __repr__(self):
+        return f"<Query {self.name}>"
+
+
+class QueryCatalog:
+    """Registre central des requêtes nommées"""
+
+    def __init__(self):
+        self.queries = {}
+
+    def register(self, name: str, sql: str) -> Query:
+        """Déclare une requête (un nom = un seul texte SQL)"""
+        existing = self.queries.get(name)
+        if existing is not None:
+            if existing.sql != sql:
+                raise ValueError(f"Requête '{name}' déjà déclarée avec un autre SQL")
+            return existing
+        query = self.queries[name] = Query(name, sql)
+        return query
+
+    def get(self, name: str) -> Query:
+        return self.queries[name]
+
+    async def prepare_warm(self, conn):
+        """
+        Prépare les quelques requêtes de WARM_QUERIES sur une nouvelle connexion
+        (init du pool). Une requête qui échoue (table pas encore migrée) sera
+        préparée au premier usage, comme toutes les autres.
+        """
+        for name in WARM_QUERIES:
+            query = self.queries.get(name)
+            if query is None:
+                continue
+            try:
+                conn.prepared[name] = await conn.prepare(query.sql)
+            except asyncpg.PostgresError:
+                pass
+
+    @staticmethod
+    async def statement(conn, query: Query, refresh: bool = False):
+        """Instruction préparée de la requête sur cette connexion"""
+        statement = None if refresh else conn.prepared.get(query.name)
+        if statement is None:
+            statement = conn.prepared[query.name] = await conn.prepare(query.sql)
+        return statement
+
+    async def run(self, conn, method: str, query: Query, args: tuple):
+        """Exécute une requête du catalogue (fetch/fetchrow/fetchval/execute)"""
+        if getattr(conn, "prepared", None) is None:
+            # Pooler en mode transaction: protocole non nommé, sans cache
+            return await getattr(conn, method)(query.sql, *args)
+
+        for attempt in range(2):
+            statement = await self.statement(conn, query, refresh=attempt > 0)
+            try:
+                if method == "execute":
+                    await statement.fetch(*args)
+                    return statement.get_statusmsg()
+                return await getattr(statement, method)(*args)
+            except _STALE_STATEMENT_ERRORS:
+                # Dans une transaction, l'erreur l'a annulée: pas de nouvel essai
+                if attempt == 1 or conn.is_in_transaction():
+                    raise
+
+
+class CatalogConnection(asyncpg.Connection):
+    """Connexion qui conserve ses instructions préparées par nom"""
+
+    __slots__ = ("prepared",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = {}
+
+
+def uses_transaction_pooler(url: str) -> bool:
+    """Indique si l'URL passe par un pooler en mode transaction"""
+    if DB_TRANSACTION_POOLER in ("on", "true", "1"):
+        return True
+    if DB_TRANSACTION_POOLER in ("off", "false", "0"):
+        return False
+    host = urlparse(url).hostname or ""
+    return "-pooler" in host or "pgbouncer" in host
+
+
+def direct_url(url: str) -> str:
+    """URL sans le pooler Neon (LISTEN exige une connexion directe)"""
+    parsed = urlparse(url)
+    host = parsed.hostname or ""
+    if "-pooler" not in host:
+        return url
+    return parsed._replace(netloc=parsed.netloc.replace(host, host.replace("-pooler", ""), 1)).geturl()
+
+
+def pool_options(url: str) -> dict:
+    """Options de create_pool selon le mode (préparation nommée ou protocole non nommé)"""
+    if uses_transaction_pooler(url):
+        # Aucune instruction nommée: chaque requête part en Parse/Bind non nommé
+        return {"statement_cache_size": 0}
+    return {"connection_class": CatalogConnection, "init": catalog.prepare_warm}
+
+
+# Catalogue global (alimenté par database/queries.py à l'import)
+catalog = QueryCatalog()
+query = catalog.register
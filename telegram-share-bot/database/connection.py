@@ -1,324 +1,426 @@
 """
 Connexion à la base de données PostgreSQL (Neon) avec reconnexion automatique
 """
+import asyncio
+import time
 import asyncpg
 from contextlib import asynccontextmanager
-from config.settings import DATABASE_URL
+from contextvars import ContextVar
+from typing import Callable
+from config.settings import (
+    DATABASE_URL,
+    DATABASE_REPLICA_URL,
+    DB_POOL_MIN_SIZE,
+    DB_POOL_MAX_SIZE,
+    DB_MAX_INACTIVE_LIFETIME,
+    DB_HEALTH_CHECK_INTERVAL,
+    DB_WARM_TIMEOUT_LIMIT,
+    DB_BREAKER_THRESHOLD,
+    DB_BREAKER_COOLDOWN,
+    DB_REPLICA_POOL_MAX_SIZE,
+    DB_REPLICA_MAX_LAG
+)
+from database.health import (
+    CircuitBreaker,
+    PoolSupervisor,
+    DatabaseUnavailableError,
+    is_connection_error
+)
+from database.cache import invalidate
+from database.events import bus
+from database.catalog import Query, catalog, direct_url, pool_options
+from database.migrations import run_migrations
+from utils.metrics import registry
+
+QUERY_SECONDS = registry.histogram(
+    "db_query_duration_seconds", "Durée des requêtes par nom (catalogue) ou adhoc"
+)
+QUERY_ERRORS = registry.counter(
+    "db_query_errors_total", "Erreurs de requêtes par nom (catalogue) ou adhoc, et type"
+)
+QUERY_RETRIES = registry.counter(
+    "db_query_retries_total", "Nouveaux essais après une erreur de connexion"
+)
+ACQUIRE_SECONDS = registry.histogram(
+    "db_pool_acquire_seconds", "Attente pour obtenir une connexion du pool"
+)
+
+# Étiquette des requêtes hors catalogue (SQL brut des scripts; l'application passe par le catalogue)
+ADHOC_LABEL = "adhoc"
+
+# Unité de travail de la mise à jour Telegram en cours (voir unit_of_work)
+_current_unit: ContextVar = ContextVar("db_unit_of_work", default=None)
+
+
+class UnitOfWork:
+    """
+    Une seule connexion (prise au premier besoin) pour toutes les requêtes
+    d'un handler, avec une transaction optionnelle.
+    """
+
+    def __init__(self, database, transaction: bool = False):
+        self.database = database
+        self.transaction = transaction
+        self.lock = asyncio.Lock()  # une connexion = une requête à la fois
+        self.conn = None
+        self.closed = False
+        self.failed = False
+        self.memo = {}  # lectures mémorisées pour la durée de la mise à jour
+        self._acquire_cm = None
+        self._tx = None
+        self._on_commit = []  # effets locaux différés jusqu'au COMMIT
+
+    async def connection(self):
+        """Connexion de l'unité (acquise au premier appel)"""
+        if self.conn is None:
+            self._acquire_cm = self.database.acquire()
+            self.conn = await self._acquire_cm.__aenter__()
+            if self.transaction:
+                self._tx = self.conn.transaction()
+                try:
+                    await self._tx.start()
+                except BaseException:
+                    await self._release()
+                    raise
+        return self.conn
+
+    def on_commit(self, callback: Callable[[], object]):
+        """Appelle `callback()` après le COMMIT (jamais si la transaction est annulée)"""
+        self._on_commit.append(callback)
+
+    async def close(self, error: BaseException = None):
+        """Valide (ou annule après une erreur) puis rend la connexion au pool"""
+        self.closed = True
+        committed = error is None and not self.failed
+        if self.conn is not None:
+            try:
+                if self._tx is not None:
+                    if committed:
+                        await self._tx.commit()
+                    else:
+                        await self._tx.rollback()
+            finally:
+                await self._release()
+        callbacks, self._on_commit = self._on_commit, []
+        if committed:
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"❌ Effet après COMMIT en échec ({callback}): {e}")
+
+    async def _release(self):
+        conn_cm, self._acquire_cm, self.conn, self._tx = self._acquire_cm, None, None, None
+        await conn_cm.__aexit__(None, None, None)
+
+
+def current_unit() -> "UnitOfWork":
+    """Unité de travail ouverte dans ce contexte (None sinon)"""
+    unit = _current_unit.get()
+    return unit if unit is not None and not unit.closed else None
 
 
 class Database:
     def __init__(self):
         self.pool = None
+        self.replica_url = DATABASE_REPLICA_URL
+        self.replica_pool = None
+        self.replica_lag = None  # secondes, None = réplique inutilisable
+        self.breaker = CircuitBreaker(DB_BREAKER_THRESHOLD, DB_BREAKER_COOLDOWN)
+        self.supervisor = PoolSupervisor(self, DB_HEALTH_CHECK_INTERVAL, DB_WARM_TIMEOUT_LIMIT)
+        self._connect_lock = asyncio.Lock()
     
     async def connect(self):
         """Crée le pool de connexions"""
         try:
             self.pool = await asyncpg.create_pool(
                 DATABASE_URL,
-                min_size=2,
-                max_size=10,
+                min_size=DB_POOL_MIN_SIZE,
+                max_size=DB_POOL_MAX_SIZE,
                 command_timeout=60,
-                max_inactive_connection_lifetime=60
+                max_inactive_connection_lifetime=DB_MAX_INACTIVE_LIFETIME,
+                **pool_options(DATABASE_URL)
             )
+            self.breaker.record_success()
             print("✅ Connecté à la base de données")
         except Exception as e:
             print(f"❌ Erreur connexion DB: {e}")
             raise
     
+    async def connect_replica(self):
+        """Crée le pool de la réplique (sans échec bloquant: repli sur le primaire)"""
+        if not self.replica_url:
+            return
+        try:
+            self.replica_pool = await asyncpg.create_pool(
+                self.replica_url,
+                min_size=1,
+                max_size=DB_REPLICA_POOL_MAX_SIZE,
+                command_timeout=60,
+                max_inactive_connection_lifetime=DB_MAX_INACTIVE_LIFETIME,
+                **pool_options(self.replica_url)
+            )
+            print("✅ Connecté à la réplique de lecture")
+        except Exception as e:
+            self.replica_pool = None
+            print(f"⚠️ Réplique indisponible, lectures sur le primaire: {e}")
+    
+    def replica_available(self) -> bool:
+        """La réplique est joignable et son retard est tolérable"""
+        return (
+            self.replica_pool is not None
+            and self.replica_lag is not None
+            and self.replica_lag <= DB_REPLICA_MAX_LAG
+        )
+    
+    async def ensure_listener(self):
+        """Connexion d'écoute du bus d'événements (recréée si perdue)"""
+        await bus.connect(direct_url(DATABASE_URL))
+    
     async def disconnect(self):
         """Ferme le pool de connexions"""
+        await self.supervisor.stop()
+        await bus.close()
+        if self.replica_pool:
+            await self.replica_pool.close()
+            self.replica_pool = None
         if self.pool:
             await self.pool.close()
+            self.pool = None
             print("🔌 Déconnecté de la base de données")
     
+    async def reconnect(self):
+        """Recrée le pool (appelé par le superviseur, hors du chemin des requêtes)"""
+        async with self._connect_lock:
+            print("🔄 Reconnexion à la base de données...")
+            old_pool, self.pool = self.pool, None
+            if old_pool:
+                try:
+                    await asyncio.wait_for(old_pool.close(), timeout=10)
+                except Exception:
+                    old_pool.terminate()
+            await self.connect()
+    
     async def ensure_connection(self):
-        """Vérifie et reconnecte si nécessaire"""
+        """Crée le pool s'il n'existe pas encore (sans requête de test)"""
         if self.pool is None:
-            await self.connect()
-        else:
-            try:
-                async with self.pool.acquire() as conn:
-                    await conn.fetchval("SELECT 1")
-            except:
-                print("🔄 Reconnexion à la base de données...")
-                try:
-                    await self.pool.close()
-                except:
-                    pass
-                self.pool = None
-                await self.connect()
+            async with self._connect_lock:
+                if self.pool is None:
+                    await self.connect()
+    
+    def start_supervisor(self):
+        """Lance la surveillance du pool en tâche de fond"""
+        self.supervisor.start()
     
     @asynccontextmanager
     async def acquire(self):
         """Context manager pour obtenir une connexion"""
+        self.breaker.check()
         await self.ensure_connection()
+        start = time.perf_counter()
         async with self.pool.acquire() as connection:
+            ACQUIRE_SECONDS.observe(time.perf_counter() - start, pool="primary")
             yield connection
     
-    async def execute(self, query: str, *args):
-        """Exécute une requête sans retour"""
-        for attempt in range(2):
-            try:
-                async with self.acquire() as conn:
-                    return await conn.execute(query, *args)
-            except Exception as e:
-                if attempt == 0:
-                    await self.ensure_connection()
-                else:
-                    raise e
+    @asynccontextmanager
+    async def acquire_replica(self):
+        """Context manager pour obtenir une connexion sur la réplique"""
+        start = time.perf_counter()
+        async with self.replica_pool.acquire() as connection:
+            ACQUIRE_SECONDS.observe(time.perf_counter() - start, pool="replica")
+            yield connection
     
-    async def fetch(self, query: str, *args):
-        """Exécute une requête et retourne les résultats"""
-        for attempt in range(2):
+    @staticmethod
+    async def _timed(conn, method: str, query, args: tuple, label: str, pool: str):
+        """Exécute la requête (texte SQL ou requête du catalogue) en mesurant sa durée"""
+        start = time.perf_counter()
+        try:
+            if isinstance(query, Query):
+                return await catalog.run(conn, method, query, args)
+            return await getattr(conn, method)(query, *args)
+        except Exception as e:
+            QUERY_ERRORS.inc(query=label, pool=pool, error=type(e).__name__)
+            raise
+        finally:
+            QUERY_SECONDS.observe(time.perf_counter() - start, query=label, pool=pool)
+    
+    async def _call(self, method: str, query, *args, replica: bool = False):
+        """Exécute une requête, avec un seul nouvel essai sur erreur de connexion"""
+        # Étiquette = nom du catalogue; tout SQL brut partage l'étiquette "adhoc"
+        label = query.name if isinstance(query, Query) else ADHOC_LABEL
+        
+        unit = _current_unit.get()
+        if unit is not None and not unit.closed and not (
+            replica and not unit.transaction and self.replica_available()
+        ):
+            return await self._call_in_unit(unit, method, query, args, label)
+        
+        if replica and self.replica_available():
             try:
-                async with self.acquire() as conn:
-                    return await conn.fetch(query, *args)
+                async with self.acquire_replica() as conn:
+                    return await self._timed(conn, method, query, args, label, "replica")
             except Exception as e:
-                if attempt == 0:
-                    await self.ensure_connection()
-                else:
-                    raise e
-    
-    async def fetchrow(self, query: str, *args):
-        """Exécute une requête et retourne une seule ligne"""
+                if not is_connection_error(e):
+                    raise
+                # Réplique hors service: repli sur le primaire jusqu'au prochain contrôle
+                self.replica_lag = None
+                self.supervisor.wake()
+        
         for attempt in range(2):
             try:
                 async with self.acquire() as conn:
-                    return await conn.fetchrow(query, *args)
+                    result = await self._timed(conn, method, query, args, label, "primary")
+                self.breaker.record_success()
+                return result
+            except DatabaseUnavailableError:
+                QUERY_ERRORS.inc(query=label, pool="primary", error="DatabaseUnavailableError")
+                raise
             except Exception as e:
-                if attempt == 0:
-                    await self.ensure_connection()
-                else:
-                    raise e
+                if not is_connection_error(e):
+                    raise
+                self.breaker.record_failure()
+                self.supervisor.wake()
+                if attempt == 1 or self.breaker.state == CircuitBreaker.OPEN:
+                    raise
+                QUERY_RETRIES.inc(query=label)
     
-    async def fetchval(self, query: str, *args):
-        """Exécute une requête et retourne une seule valeur"""
-        for attempt in range(2):
+    async def _call_in_unit(self, unit: UnitOfWork, method: str, query, args: tuple, label: str):
+        """Exécute la requête sur la connexion de l'unité de travail (sans nouvel essai)"""
+        async with unit.lock:
             try:
-                async with self.acquire() as conn:
-                    return await conn.fetchval(query, *args)
+                conn = await unit.connection()
+                return await self._timed(conn, method, query, args, label, "primary")
+            except DatabaseUnavailableError:
+                QUERY_ERRORS.inc(query=label, pool="primary", error="DatabaseUnavailableError")
+                raise
             except Exception as e:
-                if attempt == 0:
-                    await self.ensure_connection()
+                # Une erreur annule la transaction: elle ne sera pas validée
+                unit.failed = True
+                if is_connection_error(e):
+                    self.breaker.record_failure()
+                    self.supervisor.wake()
+                    if not unit.transaction and unit.conn is not None:
+                        # Connexion cassée: la requête suivante en reprendra une autre
+                        await unit._release()
+                raise
+    
+    def after_commit(self, callback: Callable[[], object]):
+        """
+        Effet local (cache, abonnés du bus) d'une écriture: différé jusqu'au
+        COMMIT dans une transaction ouverte, immédiat sinon.
+        """
+        unit = current_unit()
+        if unit is not None and unit.transaction:
+            unit.on_commit(callback)
+        else:
+            callback()
+    
+    @asynccontextmanager
+    async def unit_of_work(self, transaction: bool = False):
+        """
+        Partage une connexion entre toutes les requêtes du bloc.
+        Imbriqué dans une unité déjà ouverte, réutilise celle-ci
+        (sauf si le bloc exige une transaction que l'unité n'a pas).
+        """
+        current = _current_unit.get()
+        if current is not None and not current.closed and (current.transaction or not transaction):
+            yield current
+            return
+        unit = UnitOfWork(self, transaction)
+        token = _current_unit.set(unit)
+        try:
+            yield unit
+        except BaseException as e:
+            _current_unit.reset(token)
+            await unit.close(e)
+            raise
+        else:
+            _current_unit.reset(token)
+            await unit.close()
+    
+    async def iterate(self, query, *args, prefetch: int = 500, replica: bool = False):
+        """
+        Parcourt un résultat par lots de `prefetch` lignes via un curseur
+        serveur, dans une transaction en lecture seule.
+        """
+        if replica and self.replica_available():
+            context = self.acquire_replica()
+        else:
+            context = self.acquire()
+        async with context as conn:
+            async with conn.transaction(readonly=True):
+                if isinstance(query, Query) and getattr(conn, "prepared", None) is not None:
+                    cursor = (await catalog.statement(conn, query)).cursor(*args, prefetch=prefetch)
                 else:
-                    raise e
+                    sql = query.sql if isinstance(query, Query) else query
+                    cursor = conn.cursor(sql, *args, prefetch=prefetch)
+                async for record in cursor:
+                    yield record
+    
+    async def execute(self, query, *args):
+        """Exécute une requête sans retour"""
+        return await self._call("execute", query, *args)
+    
+    async def fetch(self, query, *args, replica: bool = False):
+        """Exécute une requête et retourne les résultats (replica=True: lecture tolérant un léger retard)"""
+        return await self._call("fetch", query, *args, replica=replica)
+    
+    async def fetchrow(self, query, *args, replica: bool = False):
+        """Exécute une requête et retourne une seule ligne (replica=True: lecture tolérant un léger retard)"""
+        return await self._call("fetchrow", query, *args, replica=replica)
+    
+    async def fetchval(self, query, *args, replica: bool = False):
+        """Exécute une requête et retourne une seule valeur (replica=True: lecture tolérant un léger retard)"""
+        return await self._call("fetchval", query, *args, replica=replica)
 
 
 # Instance globale
 db = Database()
 
 
+def _pool_gauges():
+    for name, pool in (("primary", db.pool), ("replica", db.replica_pool)):
+        if pool:
+            yield {"pool": name, "state": "total"}, pool.get_size()
+            yield {"pool": name, "state": "idle"}, pool.get_idle_size()
+            yield {"pool": name, "state": "max"}, pool.get_max_size()
+
+
+registry.gauge("db_pool_connections", "Connexions du pool par état", _pool_gauges)
+registry.gauge(
+    "db_replica_lag_seconds", "Retard mesuré de la réplique",
+    lambda: [({}, db.replica_lag)]
+)
+registry.gauge(
+    "db_breaker_open", "1 si le disjoncteur DB est ouvert",
+    lambda: [({}, 1 if db.breaker.state == CircuitBreaker.OPEN else 0)]
+)
+
+
 async def init_database():
-    """Initialise les tables de la base de données"""
-    await db.connect()
-    
-    # Création des tables
-    await db.execute("""
-        -- Table des utilisateurs
-        CREATE TABLE IF NOT EXISTS users (
-            id SERIAL PRIMARY KEY,
-            telegram_id BIGINT UNIQUE NOT NULL,
-            username VARCHAR(255),
-            first_name VARCHAR(255),
-            phone VARCHAR(50),
-            balance INTEGER DEFAULT 0,
-            total_earned INTEGER DEFAULT 0,
-            referral_code VARCHAR(20) UNIQUE,
-            referred_by INTEGER REFERENCES users(id),
-            is_blocked BOOLEAN DEFAULT FALSE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        
-        -- Table des vidéos (avec stockage cloud)
-        CREATE TABLE IF NOT EXISTS videos (
-            id SERIAL PRIMARY KEY,
-            title VARCHAR(255) NOT NULL,
-            caption TEXT NOT NULL,
-            cloud_url VARCHAR(500),
-            cloud_public_id VARCHAR(255),
-            url VARCHAR(500),
-            file_size BIGINT,
-            duration INTEGER,
-            width INTEGER,
-            height INTEGER,
-            expires_at TIMESTAMP NOT NULL,
-            is_active BOOLEAN DEFAULT TRUE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        
-        -- Table des messages témoignages
-        CREATE TABLE IF NOT EXISTS testimonial_messages (
-            id SERIAL PRIMARY KEY,
-            message TEXT NOT NULL,
-            is_active BOOLEAN DEFAULT TRUE,
-            usage_count INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        
-        -- Table des partages
-        CREATE TABLE IF NOT EXISTS shares (
-            id SERIAL PRIMARY KEY,
-            user_id INTEGER REFERENCES users(id),
-            video_id INTEGER REFERENCES videos(id),
-            platform VARCHAR(20) NOT NULL,
-            testimonial_id INTEGER REFERENCES testimonial_messages(id),
-            custom_testimonial TEXT,
-            proof_image_file_id VARCHAR(255) NOT NULL,
-            proof_image_hash VARCHAR(64) NOT NULL,
-            proof_image_url VARCHAR(500),
-            proof_cloud_public_id VARCHAR(255),
-            group_name VARCHAR(255),
-            group_link VARCHAR(500),
-            group_member_count INTEGER,
-            status VARCHAR(20) DEFAULT 'pending',
-            rejection_reason VARCHAR(255),
-            auto_score INTEGER,
-            validated_by BIGINT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            validated_at TIMESTAMP
-        );
-        
-        -- Table des retraits
-        CREATE TABLE IF NOT EXISTS withdrawals (
-            id SERIAL PRIMARY KEY,
-            user_id INTEGER REFERENCES users(id),
-            amount INTEGER NOT NULL,
-            payment_method VARCHAR(50) NOT NULL,
-            payment_details VARCHAR(255) NOT NULL,
-            status VARCHAR(20) DEFAULT 'pending',
-            rejection_reason VARCHAR(255),
-            processed_by BIGINT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            processed_at TIMESTAMP
-        );
-        
-        -- Table des groupes blacklistés
-        CREATE TABLE IF NOT EXISTS blacklisted_groups (
-            id SERIAL PRIMARY KEY,
-            group_identifier VARCHAR(500) NOT NULL,
-            reason VARCHAR(255),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        
-        -- Table des admins
-        CREATE TABLE IF NOT EXISTS admins (
-            id SERIAL PRIMARY KEY,
-            telegram_id BIGINT UNIQUE NOT NULL,
-            username VARCHAR(255),
-            role VARCHAR(50) DEFAULT 'moderator',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        
-        -- Table des paramètres
-        CREATE TABLE IF NOT EXISTS settings (
-            key VARCHAR(100) PRIMARY KEY,
-            value TEXT NOT NULL,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        
-        -- Table des vidéos d'aide
-        CREATE TABLE IF NOT EXISTS help_videos (
-            id SERIAL PRIMARY KEY,
-            title VARCHAR(255) NOT NULL,
-            description TEXT,
-            video_url VARCHAR(500),
-            video_file_id VARCHAR(255),
-            cloud_url VARCHAR(500),
-            cloud_public_id VARCHAR(255),
-            thumbnail_url VARCHAR(500),
-            duration INTEGER,
-            display_order INTEGER DEFAULT 0,
-            is_active BOOLEAN DEFAULT TRUE,
-            views_count INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        
-        -- Index pour performances
-        CREATE INDEX IF NOT EXISTS idx_shares_status ON shares(status);
-        CREATE INDEX IF NOT EXISTS idx_shares_user_id ON shares(user_id);
-        CREATE INDEX IF NOT EXISTS idx_shares_created_at ON shares(created_at);
-        CREATE INDEX IF NOT EXISTS idx_withdrawals_status ON withdrawals(status);
-        CREATE INDEX IF NOT EXISTS idx_users_telegram_id ON users(telegram_id);
-        CREATE INDEX IF NOT EXISTS idx_users_referral_code ON users(referral_code);
-        CREATE INDEX IF NOT EXISTS idx_shares_proof_hash ON shares(proof_image_hash);
-        CREATE INDEX IF NOT EXISTS idx_videos_active ON videos(is_active, expires_at);
-    """)
-    
-    # Migrations - Ajouter colonnes cloud à la table videos
-    try:
-        await db.execute("ALTER TABLE videos ADD COLUMN IF NOT EXISTS cloud_url VARCHAR(500)")
-    except:
-        pass
-    try:
-        await db.execute("ALTER TABLE videos ADD COLUMN IF NOT EXISTS cloud_public_id VARCHAR(255)")
-    except:
-        pass
-    try:
-        await db.execute("ALTER TABLE videos ADD COLUMN IF NOT EXISTS file_size BIGINT")
-    except:
-        pass
-    try:
-        await db.execute("ALTER TABLE videos ADD COLUMN IF NOT EXISTS duration INTEGER")
-    except:
-        pass
-    try:
-        await db.execute("ALTER TABLE videos ADD COLUMN IF NOT EXISTS width INTEGER")
-    except:
-        pass
-    try:
-        await db.execute("ALTER TABLE videos ADD COLUMN IF NOT EXISTS height INTEGER")
-    except:
-        pass
-    
-    # Migrations - Ajouter colonnes cloud à la table shares (preuves)
-    try:
-        await db.execute("ALTER TABLE shares ADD COLUMN IF NOT EXISTS proof_image_url VARCHAR(500)")
-    except:
-        pass
-    try:
-        await db.execute("ALTER TABLE shares ADD COLUMN IF NOT EXISTS proof_cloud_public_id VARCHAR(255)")
-    except:
-        pass
-    
-    # Migration - Créer la table help_videos si elle n'existe pas
-    try:
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS help_videos (
-                id SERIAL PRIMARY KEY,
-                title VARCHAR(255) NOT NULL,
-                description TEXT,
-                video_url VARCHAR(500),
-                video_file_id VARCHAR(255),
-                cloud_url VARCHAR(500),
-                cloud_public_id VARCHAR(255),
-                thumbnail_url VARCHAR(500),
-                duration INTEGER,
-                display_order INTEGER DEFAULT 0,
-                is_active BOOLEAN DEFAULT TRUE,
-                views_count INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-    except:
-        pass
-    
-    print("✅ Tables créées avec succès")
+    """Initialise la base de données (migrations versionnées)"""
+    await db.ensure_connection()
+    await run_migrations(db)
+    await db.supervisor.check_replica()
+    await db.supervisor.check_listener()
+    db.start_supervisor()
+
+
+INSERT_DEFAULT_TESTIMONIALS = catalog.register("insert_default_testimonials", """
+    INSERT INTO testimonial_messages (message)
+    SELECT m FROM unnest($1::text[]) AS m
+    WHERE NOT EXISTS (
+        SELECT 1 FROM testimonial_messages t WHERE t.message = m
+    )
+""")
 
 
 async def insert_default_testimonials():
-    """Insère les messages témoignages par défaut"""
+    """Insère les messages témoignages par défaut (une seule requête)"""
     from config.settings import DEFAULT_TESTIMONIALS
     
-    for msg in DEFAULT_TESTIMONIALS:
-        existing = await db.fetchval(
-            "SELECT id FROM testimonial_messages WHERE message = $1",
-            msg
-        )
-        if not existing:
-            await db.execute(
-                "INSERT INTO testimonial_messages (message) VALUES ($1)",
-                msg
-            )
+    status = await db.execute(INSERT_DEFAULT_TESTIMONIALS, list(DEFAULT_TESTIMONIALS))
+    if status != "INSERT 0 0":
+        await invalidate("testimonials")
     
-    print("✅ Messages témoignages initialisés")
\ No newline at end of file
+    print("✅ Messages témoignages initialisés")
@@ -0,0 +1,163 @@
+"""
+Bus d'événements entre processus (bot utilisateur / bot admin) via LISTEN/NOTIFY,
+sur une connexion d'écoute dédiée réabonnée automatiquement si Neon la coupe
+"""
+import asyncio
+import inspect
+import json
+import logging
+import secrets
+from collections import defaultdict
+from typing import Callable, Optional
+
+import asyncpg
+
+from database.catalog import query
+
+logger = logging.getLogger(__name__)
+
+# Canal PostgreSQL unique: le type de l'événement est dans la charge utile
+CHANNEL = "app_events"
+
+NOTIFY_EVENT = query("notify_event", "SELECT pg_notify($1, $2)")
+
+# Délais entre deux tentatives de réabonnement (secondes)
+_RECONNECT_DELAYS = (1, 2, 5, 10, 30)
+
+
+class EventType:
+    CACHE_INVALIDATED = "cache_invalidated"  # name, keys (None = tout le cache)
+
+
+class Event:
+    """Événement typé, sérialisé en JSON (charge NOTIFY limitée à 8000 octets)"""
+
+    __slots__ = ("type", "data", "origin")
+
+    def __init__(self, type: str, origin: str = None, **data):
+        self.type = type
+        self.data = data
+        self.origin = origin
+
+    def encode(self) -> str:
+        return json.dumps({"type": self.type, "origin": self.origin, "data": self.data})
+
+    @classmethod
+    def decode(cls, payload: str) -> "Event":
+        raw = json.loads(payload)
+        return cls(raw["type"], raw.get("origin"), **raw.get("data", {}))
+
+    def __repr__(self):
+        return f"<Event {self.type} {self.data}>"
+
+
+class EventBus:
+    """Publication locale + NOTIFY, abonnements par type d'événement"""
+
+    def __init__(self):
+        self.origin = secrets.token_hex(8)  # identifie ce processus
+        self.connection = None
+        self.url = None
+        self._handlers = defaultdict(list)
+        self._resubscribe_handlers = []
+        self._lock = asyncio.Lock()
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    @property
+    def connected(self) -> bool:
+        return self.connection is not None and not self.connection.is_closed()
+
+    def subscribe(self, event_type: str, handler: Callable[[Event], object]):
+        """Appelle `handler(event)` pour chaque événement de ce type (ici ou ailleurs)"""
+        self._handlers[event_type].append(handler)
+
+    def on_resubscribe(self, handler: Callable[[], object]):
+        """Appelé après chaque (ré)abonnement: des événements ont pu être manqués"""
+        self._resubscribe_handlers.append(handler)
+
+    def dispatch(self, event: Event):
+        """Livre un événement aux abonnés de ce processus"""
+        for handler in self._handlers.get(event.type, ()):
+            try:
+                result = handler(event)
+                if inspect.isawaitable(result):
+                    asyncio.ensure_future(result)
+            except Exception as e:
+                logger.error(f"❌ Abonné {handler.__name__} en échec sur {event}: {e}")
+
+    async def publish(self, event_type: str, **data):
+        """Livre l'événement ici et aux autres processus (au COMMIT si dans une transaction)"""
+        from database.connection import db
+
+        event = Event(event_type, self.origin, **data)
+        db.after_commit(lambda: self.dispatch(event))
+        try:
+            await db.execute(NOTIFY_EVENT, CHANNEL, event.encode())
+        except Exception as e:
+            # Les caches des autres processus retomberont sur leur expiration (TTL)
+            logger.warning(f"⚠️ Événement {event} non diffusé: {e}")
+
+    def _on_notification(self, connection, pid, channel, payload):
+        try:
+            event = Event.decode(payload)
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"⚠️ Événement illisible ignoré: {e}")
+            return
+        if event.origin != self.origin:
+            self.dispatch(event)
+
+    def _on_termination(self, connection):
+        if connection is self.connection and not self._closing:
+            logger.warning("⚠️ Connexion d'écoute perdue, réabonnement...")
+            self._schedule_reconnect()
+
+    def _schedule_reconnect(self):
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.ensure_future(self._reconnect())
+
+    async def _reconnect(self):
+        attempt = 0
+        while not self._closing and not self.connected:
+            try:
+                await self.connect()
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                delay = _RECONNECT_DELAYS[min(attempt, len(_RECONNECT_DELAYS) - 1)]
+                attempt += 1
+                logger.warning(f"⚠️ Réabonnement impossible ({e}), nouvel essai dans {delay}s")
+                await asyncio.sleep(delay)
+
+    async def connect(self, url: str = None):
+        """Ouvre la connexion d'écoute et s'abonne (sans effet si déjà connectée)"""
+        if url is not None:
+            self.url = url
+        async with self._lock:
+            if self.connected:
+                return
+            self._closing = False
+            connection = await asyncpg.connect(self.url)
+            try:
+                await connection.add_listener(CHANNEL, self._on_notification)
+            except BaseException:
+                await connection.close()
+                raise
+            connection.add_termination_listener(self._on_termination)
+            self.connection = connection
+        for handler in self._resubscribe_handlers:
+            handler()
+
+    async def close(self):
+        self._closing = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        connection, self.connection = self.connection, None
+        if connection is not None and not connection.is_closed():
+            await connection.close()
+
+
+# Bus global du processus
+bus = EventBus()
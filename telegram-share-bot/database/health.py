@@ -0,0 +1,222 @@
+"""
+Surveillance du pool de connexions (hors du chemin des requêtes)
+"""
+import asyncio
+import logging
+import time
+
+import asyncpg
+
+from database.events import bus
+
+logger = logging.getLogger(__name__)
+
+# Retard de la réplique en secondes (0 si elle a rejoué tout le WAL reçu)
+REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+class DatabaseUnavailableError(Exception):
+    """Levée quand le disjoncteur est ouvert (base injoignable)"""
+
+
+def is_connection_error(error: Exception) -> bool:
+    """Indique si l'erreur vient de la connexion et non de la requête"""
+    return isinstance(error, (
+        asyncpg.PostgresConnectionError,
+        asyncpg.InterfaceError,
+        asyncpg.exceptions.OperatorInterventionError,
+        ConnectionError,
+        OSError,
+    ))
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur: après N échecs consécutifs, les requêtes échouent
+    immédiatement pendant `cooldown` secondes au lieu d'attendre un timeout.
+    Ensuite une requête d'essai est autorisée (état half_open).
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold: int = 3, cooldown: float = 15):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = 0.0
+        self._state = self.CLOSED
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+            self._state = self.HALF_OPEN
+        return self._state
+
+    def check(self):
+        """Lève DatabaseUnavailableError si le disjoncteur est ouvert"""
+        if self.state == self.OPEN:
+            raise DatabaseUnavailableError("❌ Base de données indisponible (disjoncteur ouvert)")
+
+    def record_success(self):
+        if self._state != self.CLOSED:
+            logger.info("✅ Disjoncteur DB refermé")
+        self.failures = 0
+        self._state = self.CLOSED
+
+    def record_failure(self):
+        self.failures += 1
+        if self._state == self.HALF_OPEN or self.failures >= self.threshold:
+            if self._state != self.OPEN:
+                logger.error(f"⛔ Disjoncteur DB ouvert après {self.failures} échec(s)")
+            self._state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class PoolSupervisor:
+    """
+    Tâche de fond qui garde `min_size` connexions chaudes, détecte les
+    connexions cassées et recrée le pool si nécessaire.
+    Un réchauffage expiré peut venir d'un pool occupé: il ne compte comme
+    échec qu'après `timeout_limit` expirations consécutives (base bloquée).
+    """
+
+    def __init__(self, database, interval: float = 30, timeout_limit: int = 3):
+        self.database = database
+        self.interval = interval
+        self.timeout_limit = timeout_limit
+        self.timeouts = 0  # réchauffages expirés consécutifs
+        self.last_check = None
+        self.last_ok = None
+        self.last_error = None
+        self._task = None
+        self._wakeup = asyncio.Event()
+
+    def start(self):
+        """Démarre la surveillance (idempotent)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Arrête la surveillance"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def wake(self):
+        """Demande une vérification immédiate"""
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            # Après un échec on revérifie rapidement (2s, 4s, 8s...)
+            failures = self.database.breaker.failures
+            delay = self.interval if not failures else min(self.interval, 2 ** failures)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.check()
+
+    async def check(self) -> bool:
+        """Réchauffe les connexions minimales et met à jour le disjoncteur"""
+        db = self.database
+        self.last_check = time.time()
+        try:
+            # Même verrou que le chemin des requêtes: un seul pool créé
+            await db.ensure_connection()
+            try:
+                await asyncio.wait_for(self._warm(db.pool), timeout=10)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                if self.timeouts >= self.timeout_limit:
+                    # Ni connexion refusée ni réponse: la base est bloquée
+                    raise ConnectionError(
+                        f"aucune réponse de la base ({self.timeouts} réchauffages expirés)"
+                    )
+                self.last_error = f"réchauffage expiré ({self.timeouts}/{self.timeout_limit})"
+                logger.warning(f"⏳ Surveillance DB: pool occupé ou base lente, {self.last_error}")
+                return False
+            self.timeouts = 0
+            db.breaker.record_success()
+            self.last_ok = self.last_check
+            self.last_error = None
+            await self.check_replica()
+            await self.check_listener()
+            return True
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.last_error = str(e)
+            db.breaker.record_failure()
+            logger.error(f"❌ Surveillance DB: {e}")
+            if is_connection_error(e):
+                try:
+                    await db.reconnect()
+                except Exception as reconnect_error:
+                    logger.error(f"❌ Reconnexion DB échouée: {reconnect_error}")
+            return False
+
+    async def check_replica(self):
+        """Mesure le retard de la réplique (None si injoignable)"""
+        db = self.database
+        if not db.replica_url:
+            return
+        try:
+            if db.replica_pool is None:
+                await db.connect_replica()
+                if db.replica_pool is None:
+                    return
+            async with db.replica_pool.acquire() as conn:
+                lag = await asyncio.wait_for(conn.fetchval(REPLICA_LAG_SQL), timeout=10)
+            db.replica_lag = float(lag)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            db.replica_lag = None
+            logger.warning(f"⚠️ Réplique injoignable, lectures sur le primaire: {e}")
+
+    async def check_listener(self):
+        """Réabonne le bus d'événements si Neon a coupé la connexion"""
+        try:
+            await asyncio.wait_for(self.database.ensure_listener(), timeout=10)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ Bus d'événements indisponible: {e}")
+
+    @staticmethod
+    async def _warm(pool):
+        """Ouvre et teste les connexions minimales en parallèle"""
+        async def ping():
+            async with pool.acquire() as conn:
+                await conn.fetchval("SELECT 1")
+
+        await asyncio.gather(*(ping() for _ in range(pool.get_min_size())))
+
+    def status(self) -> dict:
+        """Résumé pour l'endpoint /health"""
+        pool = self.database.pool
+        return {
+            "breaker": self.database.breaker.state,
+            "last_check": self.last_check,
+            "last_ok": self.last_ok,
+            "last_error": self.last_error,
+            "pool_size": pool.get_size() if pool else 0,
+            "pool_idle": pool.get_idle_size() if pool else 0,
+            "replica": self.database.replica_available(),
+            "replica_lag": self.database.replica_lag,
+            "events": bus.connected,
+        }
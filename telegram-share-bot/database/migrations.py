@@ -0,0 +1,522 @@
+"""
+Migrations versionnées du schéma de la base de données
+"""
+import asyncio
+import re
+
+import asyncpg
+
+from utils.helpers import canonical_group_key, group_key
+
+# Clé du verrou consultatif: un seul processus migre à la fois
+MIGRATION_LOCK_ID = 7320451
+
+# Attente entre deux tentatives de prise du verrou (secondes)
+MIGRATION_LOCK_POLL = 0.5
+
+# Nom de l'index créé par une étape CREATE [UNIQUE] INDEX CONCURRENTLY
+_CONCURRENT_INDEX = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?\"?(\w+)",
+    re.IGNORECASE
+)
+
+# Lignes traitées par requête dans les reprises de données en Python
+BACKFILL_BATCH_SIZE = 5000
+
+
+class Migration:
+    """
+    Une étape du schéma. Les migrations non transactionnelles
+    (ex: CREATE INDEX CONCURRENTLY) doivent être idempotentes.
+    Une étape peut être du SQL ou une fonction `async (conn)` (reprise de données).
+    """
+    def __init__(self, version: int, name: str, statements: list, transactional: bool = True):
+        self.version = version
+        self.name = name
+        self.statements = statements
+        self.transactional = transactional
+
+    @property
+    def concurrent_indexes(self) -> list:
+        """Index créés par les étapes CREATE INDEX CONCURRENTLY de la migration"""
+        return [
+            match.group(1)
+            for statement in self.statements if isinstance(statement, str)
+            for match in _CONCURRENT_INDEX.finditer(statement)
+        ]
+
+
+async def _backfill_group_keys(conn):
+    """Calcule shares.group_key des partages existants (même fonction que create_share)"""
+    last_id = 0
+    while True:
+        rows = await conn.fetch("""
+            SELECT id, platform, group_link FROM shares
+            WHERE id > $1 AND group_link IS NOT NULL
+            ORDER BY id
+            LIMIT $2
+        """, last_id, BACKFILL_BATCH_SIZE)
+        if not rows:
+            return
+        await conn.execute("""
+            UPDATE shares s SET group_key = d.group_key
+            FROM unnest($1::int[], $2::text[]) AS d(id, group_key)
+            WHERE s.id = d.id
+        """, [r['id'] for r in rows], [group_key(r['platform'], r['group_link']) for r in rows])
+        last_id = rows[-1]['id']
+
+
+async def _backfill_blacklist_keys(conn):
+    """Calcule blacklisted_groups.group_key (table courte: une passe) et retire les doublons"""
+    rows = await conn.fetch("SELECT id, group_identifier FROM blacklisted_groups ORDER BY id")
+    await conn.execute("""
+        UPDATE blacklisted_groups b SET group_key = d.group_key
+        FROM unnest($1::int[], $2::text[]) AS d(id, group_key)
+        WHERE b.id = d.id
+    """, [r['id'] for r in rows], [canonical_group_key(r['group_identifier']) for r in rows])
+    # Le même groupe saisi sous plusieurs formes: la première entrée est gardée
+    await conn.execute("""
+        DELETE FROM blacklisted_groups b
+        USING blacklisted_groups first
+        WHERE first.group_key = b.group_key AND first.id < b.id
+    """)
+
+
+MIGRATIONS = [
+    Migration(1, "schema_initial", ["""
+        -- Table des utilisateurs
+        CREATE TABLE IF NOT EXISTS users (
+            id SERIAL PRIMARY KEY,
+            telegram_id BIGINT UNIQUE NOT NULL,
+            username VARCHAR(255),
+            first_name VARCHAR(255),
+            phone VARCHAR(50),
+            balance INTEGER DEFAULT 0,
+            total_earned INTEGER DEFAULT 0,
+            referral_code VARCHAR(20) UNIQUE,
+            referred_by INTEGER REFERENCES users(id),
+            is_blocked BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    
+        -- Table des vidéos (avec stockage cloud)
+        CREATE TABLE IF NOT EXISTS videos (
+            id SERIAL PRIMARY KEY,
+            title VARCHAR(255) NOT NULL,
+            caption TEXT NOT NULL,
+            cloud_url VARCHAR(500),
+            cloud_public_id VARCHAR(255),
+            url VARCHAR(500),
+            file_size BIGINT,
+            duration INTEGER,
+            width INTEGER,
+            height INTEGER,
+            expires_at TIMESTAMP NOT NULL,
+            is_active BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    
+        -- Table des messages témoignages
+        CREATE TABLE IF NOT EXISTS testimonial_messages (
+            id SERIAL PRIMARY KEY,
+            message TEXT NOT NULL,
+            is_active BOOLEAN DEFAULT TRUE,
+            usage_count INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    
+        -- Table des partages
+        CREATE TABLE IF NOT EXISTS shares (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER REFERENCES users(id),
+            video_id INTEGER REFERENCES videos(id),
+            platform VARCHAR(20) NOT NULL,
+            testimonial_id INTEGER REFERENCES testimonial_messages(id),
+            custom_testimonial TEXT,
+            proof_image_file_id VARCHAR(255) NOT NULL,
+            proof_image_hash VARCHAR(64) NOT NULL,
+            proof_image_url VARCHAR(500),
+            proof_cloud_public_id VARCHAR(255),
+            group_name VARCHAR(255),
+            group_link VARCHAR(500),
+            group_member_count INTEGER,
+            status VARCHAR(20) DEFAULT 'pending',
+            rejection_reason VARCHAR(255),
+            auto_score INTEGER,
+            validated_by BIGINT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            validated_at TIMESTAMP
+        );
+    
+        -- Table des retraits
+        CREATE TABLE IF NOT EXISTS withdrawals (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER REFERENCES users(id),
+            amount INTEGER NOT NULL,
+            payment_method VARCHAR(50) NOT NULL,
+            payment_details VARCHAR(255) NOT NULL,
+            status VARCHAR(20) DEFAULT 'pending',
+            rejection_reason VARCHAR(255),
+            processed_by BIGINT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            processed_at TIMESTAMP
+        );
+    
+        -- Table des groupes blacklistés
+        CREATE TABLE IF NOT EXISTS blacklisted_groups (
+            id SERIAL PRIMARY KEY,
+            group_identifier VARCHAR(500) NOT NULL,
+            reason VARCHAR(255),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    
+        -- Table des admins
+        CREATE TABLE IF NOT EXISTS admins (
+            id SERIAL PRIMARY KEY,
+            telegram_id BIGINT UNIQUE NOT NULL,
+            username VARCHAR(255),
+            role VARCHAR(50) DEFAULT 'moderator',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    
+        -- Table des paramètres
+        CREATE TABLE IF NOT EXISTS settings (
+            key VARCHAR(100) PRIMARY KEY,
+            value TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    
+        -- Table des vidéos d'aide
+        CREATE TABLE IF NOT EXISTS help_videos (
+            id SERIAL PRIMARY KEY,
+            title VARCHAR(255) NOT NULL,
+            description TEXT,
+            video_url VARCHAR(500),
+            video_file_id VARCHAR(255),
+            cloud_url VARCHAR(500),
+            cloud_public_id VARCHAR(255),
+            thumbnail_url VARCHAR(500),
+            duration INTEGER,
+            display_order INTEGER DEFAULT 0,
+            is_active BOOLEAN DEFAULT TRUE,
+            views_count INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    
+        -- Index pour performances
+        CREATE INDEX IF NOT EXISTS idx_shares_status ON shares(status);
+        CREATE INDEX IF NOT EXISTS idx_shares_user_id ON shares(user_id);
+        CREATE INDEX IF NOT EXISTS idx_shares_created_at ON shares(created_at);
+        CREATE INDEX IF NOT EXISTS idx_withdrawals_status ON withdrawals(status);
+        CREATE INDEX IF NOT EXISTS idx_users_telegram_id ON users(telegram_id);
+        CREATE INDEX IF NOT EXISTS idx_users_referral_code ON users(referral_code);
+        CREATE INDEX IF NOT EXISTS idx_shares_proof_hash ON shares(proof_image_hash);
+        CREATE INDEX IF NOT EXISTS idx_videos_active ON videos(is_active, expires_at);
+    """]),
+    
+    # Anciennes bases créées avant le stockage cloud
+    Migration(2, "cloud_columns", ["""
+        ALTER TABLE videos ADD COLUMN IF NOT EXISTS cloud_url VARCHAR(500);
+        ALTER TABLE videos ADD COLUMN IF NOT EXISTS cloud_public_id VARCHAR(255);
+        ALTER TABLE videos ADD COLUMN IF NOT EXISTS file_size BIGINT;
+        ALTER TABLE videos ADD COLUMN IF NOT EXISTS duration INTEGER;
+        ALTER TABLE videos ADD COLUMN IF NOT EXISTS width INTEGER;
+        ALTER TABLE videos ADD COLUMN IF NOT EXISTS height INTEGER;
+        ALTER TABLE shares ADD COLUMN IF NOT EXISTS proof_image_url VARCHAR(500);
+        ALTER TABLE shares ADD COLUMN IF NOT EXISTS proof_cloud_public_id VARCHAR(255);
+    """]),
+    
+    # Pagination par clé (created_at DESC, id DESC)
+    Migration(3, "keyset_pagination_indexes", [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_created_id ON users(created_at DESC, id DESC)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_videos_created_id ON videos(created_at DESC, id DESC)",
+    ], transactional=False),
+    
+    # Compteurs par utilisateur maintenus à l'écriture (lectures par clé primaire)
+    Migration(4, "user_stats", ["""
+        CREATE TABLE IF NOT EXISTS user_stats (
+            user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+            approved_count INTEGER NOT NULL DEFAULT 0,
+            pending_count INTEGER NOT NULL DEFAULT 0,
+            rejected_count INTEGER NOT NULL DEFAULT 0,
+            stats_date DATE NOT NULL DEFAULT CURRENT_DATE,
+            telegram_today INTEGER NOT NULL DEFAULT 0,
+            whatsapp_today INTEGER NOT NULL DEFAULT 0,
+            total_withdrawn INTEGER NOT NULL DEFAULT 0
+        );
+        
+        INSERT INTO user_stats (
+            user_id, approved_count, pending_count, rejected_count,
+            stats_date, telegram_today, whatsapp_today, total_withdrawn
+        )
+        SELECT
+            u.id,
+            COALESCE(s.approved, 0),
+            COALESCE(s.pending, 0),
+            COALESCE(s.rejected, 0),
+            CURRENT_DATE,
+            COALESCE(s.telegram_today, 0),
+            COALESCE(s.whatsapp_today, 0),
+            COALESCE(w.withdrawn, 0)
+        FROM users u
+        LEFT JOIN (
+            SELECT
+                user_id,
+                COUNT(*) FILTER (WHERE status = 'approved') AS approved,
+                COUNT(*) FILTER (WHERE status = 'pending') AS pending,
+                COUNT(*) FILTER (WHERE status = 'rejected') AS rejected,
+                COUNT(*) FILTER (WHERE platform = 'telegram' AND created_at >= CURRENT_DATE) AS telegram_today,
+                COUNT(*) FILTER (WHERE platform = 'whatsapp' AND created_at >= CURRENT_DATE) AS whatsapp_today
+            FROM shares
+            GROUP BY user_id
+        ) s ON s.user_id = u.id
+        LEFT JOIN (
+            SELECT user_id, SUM(amount) FILTER (WHERE status = 'completed') AS withdrawn
+            FROM withdrawals
+            GROUP BY user_id
+        ) w ON w.user_id = u.id
+        ON CONFLICT (user_id) DO NOTHING;
+    """]),
+    
+    # Index des requêtes chaudes (vérifiés par explain_queries.py)
+    Migration(5, "hot_path_indexes", [
+        # Anti-fraude par soumission
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_shares_user_group_created ON shares(user_id, group_link, created_at)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_shares_group_created ON shares(group_link, created_at)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_blacklisted_groups_identifier ON blacklisted_groups(group_identifier)",
+        # Historiques (remplace idx_shares_user_id)
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_shares_user_created ON shares(user_id, created_at DESC)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_withdrawals_user_created ON withdrawals(user_id, created_at DESC)",
+        # Files d'attente admin et budget (index partiels, remplacent idx_shares_status)
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_shares_pending_created ON shares(created_at) WHERE status = 'pending'",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_shares_approved_validated ON shares(validated_at) WHERE status = 'approved'",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_withdrawals_pending_created ON withdrawals(created_at) WHERE status = 'pending'",
+        # Parrainage
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_referred_by ON users(referred_by)",
+        # Index redondants (préfixes ou doublons de contraintes UNIQUE)
+        "DROP INDEX CONCURRENTLY IF EXISTS idx_shares_user_id",
+        "DROP INDEX CONCURRENTLY IF EXISTS idx_shares_status",
+        "DROP INDEX CONCURRENTLY IF EXISTS idx_users_telegram_id",
+        "DROP INDEX CONCURRENTLY IF EXISTS idx_users_referral_code",
+    ], transactional=False),
+    
+    # file_id Telegram des médias déjà envoyés, par bot: {"<id du bot>": "<file_id>"}
+    Migration(6, "telegram_file_ids", ["""
+        ALTER TABLE videos ADD COLUMN IF NOT EXISTS telegram_file_ids JSONB NOT NULL DEFAULT '{}'::jsonb;
+        ALTER TABLE help_videos ADD COLUMN IF NOT EXISTS telegram_file_ids JSONB NOT NULL DEFAULT '{}'::jsonb;
+        ALTER TABLE shares ADD COLUMN IF NOT EXISTS telegram_file_ids JSONB NOT NULL DEFAULT '{}'::jsonb;
+    """]),
+    
+    # Plateforme des groupes bloqués (affichage admin)
+    Migration(7, "blacklist_platform", ["""
+        ALTER TABLE blacklisted_groups ADD COLUMN IF NOT EXISTS platform VARCHAR(20);
+    """]),
+    
+    # Statistiques maintenues à l'écriture: historique par jour + compteurs en direct
+    Migration(8, "stats_rollups", ["""
+        CREATE TABLE IF NOT EXISTS stats_daily (
+            day DATE NOT NULL,
+            kind VARCHAR(20) NOT NULL,               -- users / shares / withdrawals
+            platform VARCHAR(50) NOT NULL DEFAULT '', -- plateforme ou méthode de paiement
+            status VARCHAR(20) NOT NULL,             -- created / submitted / approved / requested...
+            count INTEGER NOT NULL DEFAULT 0,
+            amount BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, kind, platform, status)
+        );
+        
+        CREATE TABLE IF NOT EXISTS stats_counters (
+            name VARCHAR(40) PRIMARY KEY,
+            value BIGINT NOT NULL DEFAULT 0
+        );
+        
+        INSERT INTO stats_daily (day, kind, platform, status, count, amount)
+        SELECT created_at::date, 'users', '', 'created', COUNT(*), 0
+        FROM users GROUP BY 1
+        UNION ALL
+        SELECT created_at::date, 'shares', platform, 'submitted', COUNT(*), 0
+        FROM shares GROUP BY 1, 3
+        UNION ALL
+        SELECT validated_at::date, 'shares', platform, status, COUNT(*), 0
+        FROM shares WHERE status IN ('approved', 'rejected') AND validated_at IS NOT NULL
+        GROUP BY 1, 3, 4
+        UNION ALL
+        SELECT created_at::date, 'withdrawals', payment_method, 'requested', COUNT(*), SUM(amount)
+        FROM withdrawals GROUP BY 1, 3
+        UNION ALL
+        SELECT processed_at::date, 'withdrawals', payment_method, status, COUNT(*), SUM(amount)
+        FROM withdrawals WHERE status IN ('completed', 'rejected') AND processed_at IS NOT NULL
+        GROUP BY 1, 3, 4
+        ON CONFLICT DO NOTHING;
+        
+        INSERT INTO stats_counters (name, value)
+        SELECT 'total_users', COUNT(*) FROM users
+        UNION ALL
+        SELECT 'pending_shares', COUNT(*) FROM shares WHERE status = 'pending'
+        UNION ALL
+        SELECT 'pending_withdrawals', COUNT(*) FROM withdrawals WHERE status = 'pending'
+        UNION ALL
+        SELECT 'pending_withdrawal_amount', COALESCE(SUM(amount), 0)
+        FROM withdrawals WHERE status = 'pending'
+        ON CONFLICT DO NOTHING;
+    """]),
+    
+    # Empreinte perceptuelle (dHash 64 bits) des preuves, indexée en mémoire
+    Migration(9, "proof_dhash", ["""
+        ALTER TABLE shares ADD COLUMN IF NOT EXISTS proof_dhash BIGINT;
+    """]),
+    
+    # Score de risque des preuves en attente (auto_score existe déjà) + drapeaux
+    Migration(10, "share_risk_flags", ["""
+        ALTER TABLE shares ADD COLUMN IF NOT EXISTS risk_flags INTEGER NOT NULL DEFAULT 0;
+        ALTER TABLE shares ADD COLUMN IF NOT EXISTS scored_at TIMESTAMP;
+    """]),
+    
+    # File d'attente admin triée par risque
+    Migration(11, "pending_score_index", [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_shares_pending_score ON shares(auto_score, created_at) WHERE status = 'pending'",
+    ], transactional=False),
+    
+    # Identité canonique des groupes (plateforme + pseudo ou code d'invitation)
+    Migration(12, "share_group_key", [
+        "ALTER TABLE shares ADD COLUMN IF NOT EXISTS group_key VARCHAR(255)",
+        _backfill_group_keys,
+    ]),
+    
+    # Contrôles anti-fraude sur group_key (remplacent les index sur group_link)
+    Migration(13, "group_key_indexes", [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_shares_user_groupkey_created ON shares(user_id, group_key, created_at)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_shares_groupkey_created ON shares(group_key, created_at)",
+        "DROP INDEX CONCURRENTLY IF EXISTS idx_shares_user_group_created",
+        "DROP INDEX CONCURRENTLY IF EXISTS idx_shares_group_created",
+    ], transactional=False),
+    
+    # Clé de pagination toujours définie (un created_at NULL sortait de l'ordre des curseurs)
+    Migration(14, "keyset_created_at_not_null", ["""
+        UPDATE users SET created_at = TIMESTAMP 'epoch' WHERE created_at IS NULL;
+        UPDATE videos SET created_at = TIMESTAMP 'epoch' WHERE created_at IS NULL;
+        ALTER TABLE users ALTER COLUMN created_at SET NOT NULL;
+        ALTER TABLE videos ALTER COLUMN created_at SET NOT NULL;
+    """]),
+    
+    # Une seule entrée par groupe dans la liste noire ("@grp" = "https://t.me/grp/")
+    Migration(15, "blacklist_group_key", [
+        # Aucune insertion entre la reprise et l'index unique
+        "LOCK TABLE blacklisted_groups IN SHARE ROW EXCLUSIVE MODE",
+        "ALTER TABLE blacklisted_groups ADD COLUMN IF NOT EXISTS group_key VARCHAR(500)",
+        _backfill_blacklist_keys,
+        "ALTER TABLE blacklisted_groups ALTER COLUMN group_key SET NOT NULL",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_blacklisted_groups_key ON blacklisted_groups(group_key)",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+async def get_schema_version(database) -> int:
+    """Version actuelle du schéma (0 si aucune migration appliquée)"""
+    try:
+        version = await database.fetchval("SELECT MAX(version) FROM schema_migrations")
+    except asyncpg.UndefinedTableError:
+        return 0
+    return version or 0
+
+
+async def _drop_invalid_indexes(conn, names: list):
+    """
+    Supprime les index de `names` laissés invalides par un CREATE INDEX
+    CONCURRENTLY échoué (un index en cours de construction ailleurs est
+    aussi invalide: seuls ceux de la migration reprise sont visés)
+    """
+    if not names:
+        return
+    rows = await conn.fetch("""
+        SELECT c.relname
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE NOT i.indisvalid AND n.nspname = current_schema()
+          AND c.relname = ANY($1::text[])
+    """, names)
+    for row in rows:
+        await conn.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{row["relname"]}"')
+
+
+async def _run_statement(conn, statement):
+    if callable(statement):
+        await statement(conn)
+    else:
+        await conn.execute(statement)
+
+
+async def _apply(conn, migration: Migration):
+    """Applique une migration et l'enregistre"""
+    record = "INSERT INTO schema_migrations (version, name) VALUES ($1, $2)"
+    
+    if migration.transactional:
+        async with conn.transaction():
+            for statement in migration.statements:
+                await _run_statement(conn, statement)
+            await conn.execute(record, migration.version, migration.name)
+    else:
+        # CREATE INDEX CONCURRENTLY ne peut pas tourner dans une transaction.
+        # Un essai interrompu laisse un index invalide que IF NOT EXISTS ignorerait.
+        await _drop_invalid_indexes(conn, migration.concurrent_indexes)
+        for statement in migration.statements:
+            await _run_statement(conn, statement)
+        await conn.execute(record, migration.version, migration.name)
+
+
+async def _acquire_migration_lock(conn):
+    """
+    Prend le verrou de migration par essais successifs. Un pg_advisory_lock
+    bloquant garderait un instantané ouvert pendant l'attente, et le
+    CREATE INDEX CONCURRENTLY de l'autre processus attendrait cet instantané:
+    les deux services démarrés ensemble se bloqueraient mutuellement.
+    """
+    waiting = False
+    while not await conn.fetchval("SELECT pg_try_advisory_lock($1)", MIGRATION_LOCK_ID):
+        if not waiting:
+            print("⏳ Migration en cours dans un autre processus, attente...")
+            waiting = True
+        await asyncio.sleep(MIGRATION_LOCK_POLL)
+
+
+async def run_migrations(database) -> int:
+    """Applique les migrations manquantes (une seule requête si le schéma est à jour)"""
+    current = await get_schema_version(database)
+    if current >= LATEST_VERSION:
+        print(f"✅ Schéma à jour (version {current})")
+        return current
+    
+    async with database.acquire() as conn:
+        await _acquire_migration_lock(conn)
+        try:
+            # Relire sous verrou: un autre processus a pu migrer pendant l'attente
+            current = await get_schema_version(conn)
+            if current >= LATEST_VERSION:
+                print(f"✅ Schéma à jour (version {current})")
+                return current
+            
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    name VARCHAR(255) NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            applied = {
+                row['version']
+                for row in await conn.fetch("SELECT version FROM schema_migrations")
+            }
+            
+            for migration in MIGRATIONS:
+                if migration.version in applied:
+                    continue
+                await _apply(conn, migration)
+                print(f"✅ Migration {migration.version} appliquée: {migration.name}")
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_ID)
+    
+    print(f"✅ Schéma migré en version {LATEST_VERSION}")
+    return LATEST_VERSION
@@ -6,14 +6,44 @@ from typing import Optional, List, Dict, Any
 import secrets
 import string
 import hashlib
-
-from database.connection import db
+import time
+
+from database.cache import cached_value, invalidate, lru_cache
+from database.catalog import query
+from database.connection import current_unit, db
+from utils.fingerprint import HammingIndex, to_signed
+from utils.helpers import GroupMatcher, canonical_group_key, group_key
+from utils.rate_limit import ShareRateLimiter, database_timezone
 from config.settings import (
     REWARD_PER_SHARE, REFERRAL_BONUS, ShareStatus, WithdrawalStatus,
-    GROUP_REUSE_DAYS, MAX_TELEGRAM_SHARES_PER_DAY, MAX_WHATSAPP_SHARES_PER_DAY
+    GROUP_REUSE_DAYS, MAX_TELEGRAM_SHARES_PER_DAY, MAX_WHATSAPP_SHARES_PER_DAY,
+    CACHE_MAX_TTL, USER_CACHE_SIZE, USER_CACHE_TTL, PROOF_SIMILARITY_DISTANCE,
+    MIN_DELAY_BETWEEN_SHARES, PROOF_BURST, PROOF_REFILL_SECONDS
 )
 
 
+# Statistiques maintenues par les requêtes d'écriture (CTE ajoutées à chacune)
+
+def _stats_daily(select: str) -> str:
+    """Cumule `select` (day, kind, platform, status, count, amount) dans stats_daily"""
+    return f"""
+        INSERT INTO stats_daily (day, kind, platform, status, count, amount)
+        {select}
+        ON CONFLICT (day, kind, platform, status) DO UPDATE SET
+            count = stats_daily.count + EXCLUDED.count,
+            amount = stats_daily.amount + EXCLUDED.amount
+    """
+
+
+def _stats_counters(deltas: str) -> str:
+    """Ajoute les deltas `VALUES (nom, delta), ...` aux compteurs en direct"""
+    return f"""
+        UPDATE stats_counters c SET value = c.value + d.delta
+        FROM ({deltas}) AS d(name, delta)
+        WHERE c.name = d.name AND d.delta <> 0
+    """
+
+
 # ============================================
 # UTILISATEURS
 # ============================================
@@ -24,6 +54,63 @@ def generate_referral_code(length=8):
     return ''.join(secrets.choice(chars) for _ in range(length))
 
 
+REFERRAL_CODE_EXISTS = query(
+    "referral_code_exists", "SELECT id FROM users WHERE referral_code = $1"
+)
+
+INSERT_USER = query("insert_user", f"""
+    WITH created AS (
+        INSERT INTO users (telegram_id, username, first_name, referral_code, referred_by)
+        VALUES ($1, $2, $3, $4, $5)
+        RETURNING *
+    ),
+    rollup AS ({_stats_daily('''
+        SELECT CURRENT_DATE, 'users', '', 'created', COUNT(*), 0
+        FROM created HAVING COUNT(*) > 0
+    ''')}),
+    counters AS ({_stats_counters('''
+        VALUES ('total_users', (SELECT COUNT(*) FROM created))
+    ''')})
+    SELECT * FROM created
+""")
+
+CREDIT_USER = query("credit_user", """
+    UPDATE users SET balance = balance + $1, total_earned = total_earned + $1
+    WHERE id = $2
+    RETURNING telegram_id
+""")
+
+DEBIT_USER = query(
+    "debit_user", "UPDATE users SET balance = balance - $1 WHERE id = $2 RETURNING telegram_id"
+)
+
+# Profils par telegram_id (LRU + TTL). Toute écriture sur users doit appeler forget_users.
+user_cache = lru_cache("users", USER_CACHE_SIZE, USER_CACHE_TTL)
+
+
+def _memo():
+    """Lectures mémorisées de la mise à jour Telegram en cours (None hors unité)"""
+    unit = current_unit()
+    return unit.memo if unit is not None else None
+
+
+def _remember_user(user: dict):
+    # Cache partagé du processus: rempli seulement une fois l'écriture validée
+    db.after_commit(lambda: user_cache.set(user['telegram_id'], user))
+    memo = _memo()
+    if memo is not None:
+        memo[("user", user['telegram_id'])] = user
+
+
+async def forget_users(*telegram_ids):
+    """Évince des profils du cache (ici, dans la mise à jour en cours et dans les autres processus)"""
+    memo = _memo()
+    if memo is not None:
+        for telegram_id in telegram_ids:
+            memo.pop(("user", telegram_id), None)
+    await invalidate("users", telegram_ids)
+
+
 async def create_user(
     telegram_id: int,
     username: str = None,
@@ -33,122 +120,273 @@ async def create_user(
     """Crée un nouvel utilisateur"""
     
     # Vérifier si l'utilisateur existe déjà
-    existing = await get_user_by_telegram_id(telegram_id)
+    existing = await get_user_by_telegram_id(telegram_id, fresh=True)
     if existing:
         return existing
     
     # Générer un code de parrainage unique
     referral_code = generate_referral_code()
-    while await db.fetchval("SELECT id FROM users WHERE referral_code = $1", referral_code):
+    while await db.fetchval(REFERRAL_CODE_EXISTS, referral_code):
         referral_code = generate_referral_code()
     
     # Trouver le parrain si code fourni
     referred_by = None
     if referred_by_code:
-        referrer = await db.fetchrow(
-            "SELECT id FROM users WHERE referral_code = $1",
-            referred_by_code
-        )
+        referrer = await db.fetchrow(REFERRAL_CODE_EXISTS, referred_by_code)
         if referrer:
             referred_by = referrer['id']
     
     # Créer l'utilisateur
-    user = await db.fetchrow("""
-        INSERT INTO users (telegram_id, username, first_name, referral_code, referred_by)
-        VALUES ($1, $2, $3, $4, $5)
-        RETURNING *
-    """, telegram_id, username, first_name, referral_code, referred_by)
+    user = await db.fetchrow(
+        INSERT_USER, telegram_id, username, first_name, referral_code, referred_by
+    )
     
     # Créditer le bonus de parrainage au parrain
     if referred_by:
-        await db.execute("""
-            UPDATE users SET balance = balance + $1, total_earned = total_earned + $1
-            WHERE id = $2
-        """, REFERRAL_BONUS, referred_by)
+        referrer_telegram_id = await db.fetchval(CREDIT_USER, REFERRAL_BONUS, referred_by)
+        await forget_users(referrer_telegram_id)
     
+    user = dict(user)
+    _remember_user(user)
     return dict(user)
 
 
-async def get_user_by_telegram_id(telegram_id: int) -> Optional[dict]:
-    """Récupère un utilisateur par son ID Telegram"""
-    user = await db.fetchrow(
-        "SELECT * FROM users WHERE telegram_id = $1",
-        telegram_id
-    )
-    return dict(user) if user else None
+GET_USER_BY_TELEGRAM_ID = query(
+    "get_user_by_telegram_id", "SELECT * FROM users WHERE telegram_id = $1"
+)
+GET_USER_BY_ID = query("get_user_by_id", "SELECT * FROM users WHERE id = $1")
+UPDATE_USER_PHONE = query(
+    "update_user_phone", "UPDATE users SET phone = $1 WHERE telegram_id = $2 RETURNING *"
+)
+UPDATE_USER_LAST_ACTIVE = query(
+    "update_user_last_active",
+    "UPDATE users SET last_active = CURRENT_TIMESTAMP WHERE telegram_id = $1"
+    " RETURNING last_active"
+)
+
+
+async def get_user_by_telegram_id(telegram_id: int, fresh: bool = False) -> Optional[dict]:
+    """
+    Récupère un utilisateur par son ID Telegram (mémoire de la mise à jour, puis cache).
+    fresh=True lit la base: à utiliser pour les vérifications de solde.
+    """
+    if not fresh:
+        memo = _memo()
+        user = memo.get(("user", telegram_id)) if memo is not None else None
+        if user is None:
+            user = user_cache.get(telegram_id)
+            if user is not None and memo is not None:
+                memo[("user", telegram_id)] = user
+        if user is not None:
+            return dict(user)
+    
+    user = await db.fetchrow(GET_USER_BY_TELEGRAM_ID, telegram_id)
+    if not user:
+        return None
+    user = dict(user)
+    _remember_user(user)
+    return dict(user)
 
 
 async def get_user_by_id(user_id: int) -> Optional[dict]:
     """Récupère un utilisateur par son ID"""
-    user = await db.fetchrow("SELECT * FROM users WHERE id = $1", user_id)
+    user = await db.fetchrow(GET_USER_BY_ID, user_id)
     return dict(user) if user else None
 
 
 async def update_user_phone(telegram_id: int, phone: str):
     """Met à jour le numéro de téléphone"""
-    await db.execute(
-        "UPDATE users SET phone = $1 WHERE telegram_id = $2",
-        phone, telegram_id
-    )
+    user = await db.fetchrow(UPDATE_USER_PHONE, phone, telegram_id)
+    await forget_users(telegram_id)
+    if user:
+        _remember_user(dict(user))
 
 
 async def update_user_last_active(telegram_id: int):
-    """Met à jour la dernière activité"""
-    await db.execute(
-        "UPDATE users SET last_active = CURRENT_TIMESTAMP WHERE telegram_id = $1",
-        telegram_id
-    )
+    """Met à jour la dernière activité (l'entrée en cache est mise à jour sur place)"""
+    last_active = await db.fetchval(UPDATE_USER_LAST_ACTIVE, telegram_id)
+    if last_active is not None:
+        db.after_commit(lambda: _touch_cached_user(telegram_id, last_active))
+
+
+def _touch_cached_user(telegram_id: int, last_active):
+    cached = user_cache.get(telegram_id)
+    if cached is not None:
+        user_cache.replace(telegram_id, {**cached, 'last_active': last_active})
 
 
 async def update_user_balance(user_id: int, amount: int, add: bool = True):
     """Met à jour le solde de l'utilisateur"""
     if add:
-        await db.execute("""
-            UPDATE users SET balance = balance + $1, total_earned = total_earned + $1
-            WHERE id = $2
-        """, amount, user_id)
+        telegram_id = await db.fetchval(CREDIT_USER, amount, user_id)
     else:
-        await db.execute(
-            "UPDATE users SET balance = balance - $1 WHERE id = $2",
-            amount, user_id
-        )
+        telegram_id = await db.fetchval(DEBIT_USER, amount, user_id)
+    await forget_users(telegram_id)
+
+
+# Filleuls avec leur nombre de partages approuvés (actif = au moins un)
+GET_USER_REFERRALS = query("get_user_referrals", """
+    SELECT u.*, COALESCE(us.approved_count, 0) AS approved_shares
+    FROM users u
+    LEFT JOIN user_stats us ON us.user_id = u.id
+    WHERE u.referred_by = $1
+    ORDER BY u.created_at DESC
+""")
+BLOCK_USER = query("block_user", "UPDATE users SET is_blocked = $1 WHERE telegram_id = $2")
+BLOCK_USER_BY_ID = query(
+    "block_user_by_id", "UPDATE users SET is_blocked = $1 WHERE id = $2 RETURNING telegram_id"
+)
 
 
 async def get_user_referrals(user_id: int) -> List[dict]:
     """Récupère les filleuls d'un utilisateur"""
-    referrals = await db.fetch(
-        "SELECT * FROM users WHERE referred_by = $1",
-        user_id
-    )
+    referrals = await db.fetch(GET_USER_REFERRALS, user_id, replica=True)
     return [dict(r) for r in referrals]
 
 
+FIND_USER_BY_USERNAME = query(
+    "find_user_by_username", "SELECT * FROM users WHERE username ILIKE $1 LIMIT 1"
+)
+SEARCH_USER_BY_NAME = query(
+    "search_user_by_name",
+    "SELECT * FROM users WHERE first_name ILIKE $1 OR username ILIKE $1 LIMIT 1"
+)
+
+
+async def find_user(search: str) -> Optional[dict]:
+    """Recherche admin: ID Telegram, puis @username, puis nom partiel"""
+    user = None
+    if search.isdigit():
+        user = await db.fetchrow(GET_USER_BY_TELEGRAM_ID, int(search), replica=True)
+    
+    if not user and search.startswith("@"):
+        user = await db.fetchrow(FIND_USER_BY_USERNAME, search[1:], replica=True)
+    
+    if not user:
+        user = await db.fetchrow(SEARCH_USER_BY_NAME, f"%{search}%", replica=True)
+    return dict(user) if user else None
+
+
 async def block_user(telegram_id: int, blocked: bool = True):
     """Bloque/débloque un utilisateur"""
-    await db.execute(
-        "UPDATE users SET is_blocked = $1 WHERE telegram_id = $2",
-        blocked, telegram_id
-    )
+    await db.execute(BLOCK_USER, blocked, telegram_id)
+    await forget_users(telegram_id)
 
 
-async def get_all_users(limit: int = 100, offset: int = 0) -> List[dict]:
-    """Récupère tous les utilisateurs"""
-    users = await db.fetch(
-        "SELECT * FROM users ORDER BY created_at DESC LIMIT $1 OFFSET $2",
-        limit, offset
-    )
-    return [dict(u) for u in users]
+async def block_user_by_id(user_id: int, blocked: bool = True):
+    """Bloque/débloque un utilisateur par son ID interne"""
+    telegram_id = await db.fetchval(BLOCK_USER_BY_ID, blocked, user_id)
+    await forget_users(telegram_id)
+
+
+# Pagination par clé: une requête nommée par table et par sens
+KEYSET_PAGES = {}
+for _table in ("users", "videos"):
+    KEYSET_PAGES[(_table, "first")] = query(f"{_table}_page_first", f"""
+        SELECT * FROM {_table}
+        ORDER BY created_at DESC, id DESC
+        LIMIT $1
+    """)
+    KEYSET_PAGES[(_table, "after")] = query(f"{_table}_page_after", f"""
+        SELECT * FROM {_table}
+        WHERE (created_at, id) < ($1, $2)
+        ORDER BY created_at DESC, id DESC
+        LIMIT $3
+    """)
+    KEYSET_PAGES[(_table, "before")] = query(f"{_table}_page_before", f"""
+        SELECT * FROM {_table}
+        WHERE (created_at, id) > ($1, $2)
+        ORDER BY created_at ASC, id ASC
+        LIMIT $3
+    """)
+
+
+async def _keyset_page(
+    table: str,
+    limit: int,
+    after: tuple = None,
+    before: tuple = None,
+    replica: bool = False
+) -> List[dict]:
+    """
+    Pagination par clé sur (created_at DESC, id DESC).
+    after/before = (created_at, id) de la dernière/première ligne affichée.
+    """
+    if before is not None:
+        rows = await db.fetch(
+            KEYSET_PAGES[(table, "before")], before[0], before[1], limit, replica=replica
+        )
+        rows = list(reversed(rows))
+    elif after is not None:
+        rows = await db.fetch(
+            KEYSET_PAGES[(table, "after")], after[0], after[1], limit, replica=replica
+        )
+    else:
+        rows = await db.fetch(KEYSET_PAGES[(table, "first")], limit, replica=replica)
+    return [dict(r) for r in rows]
+
+
+async def get_all_users(limit: int = 100, after: tuple = None, before: tuple = None) -> List[dict]:
+    """Récupère les utilisateurs (pagination par clé, voir _keyset_page)"""
+    return await _keyset_page("users", limit, after, before, replica=True)
+
+
+ACTIVE_USER_IDS_CHUNK = query("active_user_ids_chunk", """
+    SELECT id, telegram_id FROM users
+    WHERE is_blocked = FALSE AND id > $1
+    ORDER BY id
+    LIMIT $2
+""")
+
+USERS_EXPORT = query("users_export", """
+    SELECT id, telegram_id, username, first_name, phone, balance,
+           total_earned, referral_code, referred_by, is_blocked, created_at
+    FROM users
+    ORDER BY id
+""")
+
+USERS_COUNT = query("users_count", "SELECT COUNT(*) FROM users")
+
+
+async def iter_active_user_ids(chunk_size: int = 500):
+    """Parcourt les telegram_id des utilisateurs non bloqués par lots courts"""
+    last_id = 0
+    while True:
+        rows = await db.fetch(ACTIVE_USER_IDS_CHUNK, last_id, chunk_size, replica=True)
+        for row in rows:
+            yield row['telegram_id']
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1]['id']
+
+
+async def stream_users_for_export():
+    """Parcourt toute la table users via un curseur serveur (export)"""
+    async for row in db.iterate(USERS_EXPORT, replica=True):
+        yield row
 
 
 async def get_users_count() -> int:
     """Compte le nombre total d'utilisateurs"""
-    return await db.fetchval("SELECT COUNT(*) FROM users")
+    return await db.fetchval(USERS_COUNT, replica=True)
 
 
 # ============================================
 # VIDÉOS
 # ============================================
 
+DEACTIVATE_ACTIVE_VIDEOS = query(
+    "deactivate_active_videos", "UPDATE videos SET is_active = FALSE WHERE is_active = TRUE"
+)
+
+INSERT_VIDEO = query("insert_video", """
+    INSERT INTO videos (title, caption, cloud_url, cloud_public_id, url, expires_at,
+                       file_size, duration, width, height)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+    RETURNING *
+""")
+
+
 async def create_video(
     title: str,
     caption: str,
@@ -165,65 +403,95 @@ async def create_video(
     expires_at = datetime.now() + timedelta(hours=validity_hours)
     
     # Désactiver les anciennes vidéos actives
-    await db.execute("UPDATE videos SET is_active = FALSE WHERE is_active = TRUE")
+    await db.execute(DEACTIVATE_ACTIVE_VIDEOS)
     
-    video = await db.fetchrow("""
-        INSERT INTO videos (title, caption, cloud_url, cloud_public_id, url, expires_at,
-                           file_size, duration, width, height)
-        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
-        RETURNING *
-    """, title, caption, cloud_url, cloud_public_id, url, expires_at,
-        file_size, duration, width, height)
+    video = await db.fetchrow(
+        INSERT_VIDEO, title, caption, cloud_url, cloud_public_id, url, expires_at,
+        file_size, duration, width, height
+    )
+    await invalidate("active_video")
     
     return dict(video)
 
 
+GET_ACTIVE_VIDEO = query("get_active_video", """
+    SELECT * FROM videos
+    WHERE is_active = TRUE
+    AND expires_at > CURRENT_TIMESTAMP
+    AND (cloud_url IS NOT NULL OR url IS NOT NULL)
+    AND caption IS NOT NULL AND caption != ''
+    ORDER BY created_at DESC
+    LIMIT 1
+""")
+
+GET_VIDEO_BY_ID = query("get_video_by_id", "SELECT * FROM videos WHERE id = $1")
+DEACTIVATE_VIDEO = query("deactivate_video", "UPDATE videos SET is_active = FALSE WHERE id = $1")
+VIDEOS_COUNT = query("videos_count", "SELECT COUNT(*) FROM videos")
+DELETE_VIDEO = query("delete_video", "DELETE FROM videos WHERE id = $1")
+
+TOGGLE_VIDEO_ACTIVE = query("toggle_video_active", """
+    UPDATE videos SET is_active = NOT is_active
+    WHERE id = $1 RETURNING *
+""")
+
+EXTEND_VIDEO_VALIDITY = query("extend_video_validity", """
+    UPDATE videos SET expires_at = expires_at + ($2 * INTERVAL '1 hour')
+    WHERE id = $1 RETURNING *
+""")
+
+
+async def _load_active_video() -> Optional[dict]:
+    video = await db.fetchrow(GET_ACTIVE_VIDEO)
+    return dict(video) if video else None
+
+
+def _active_video_ttl(video: Optional[dict]) -> float:
+    """La vidéo active reste en cache jusqu'à son expiration"""
+    if video is None:
+        return CACHE_MAX_TTL
+    return (video['expires_at'] - datetime.now()).total_seconds()
+
+
+# Vidéo active en mémoire, invalidée par les modifications admin ci-dessous
+active_video_cache = cached_value("active_video", _load_active_video, ttl=_active_video_ttl)
+
+
 async def get_active_video() -> Optional[dict]:
-    """Récupère la vidéo active du jour (avec contenu valide)"""
-    video = await db.fetchrow("""
-        SELECT * FROM videos 
-        WHERE is_active = TRUE 
-        AND expires_at > CURRENT_TIMESTAMP
-        AND (cloud_url IS NOT NULL OR url IS NOT NULL)
-        AND caption IS NOT NULL AND caption != ''
-        ORDER BY created_at DESC
-        LIMIT 1
-    """)
+    """Récupère la vidéo active du jour (avec contenu valide, depuis le cache)"""
+    video = await active_video_cache.get()
     return dict(video) if video else None
 
 
 async def get_video_by_id(video_id: int) -> Optional[dict]:
-    """Récupère une vidéo par son ID"""
-    video = await db.fetchrow("SELECT * FROM videos WHERE id = $1", video_id)
+    """Récupère une vidéo par son ID (la vidéo active est servie par le cache)"""
+    active = active_video_cache.peek()
+    if active and active['id'] == video_id:
+        return dict(active)
+    video = await db.fetchrow(GET_VIDEO_BY_ID, video_id)
     return dict(video) if video else None
 
 
 async def deactivate_video(video_id: int):
     """Désactive une vidéo"""
-    await db.execute(
-        "UPDATE videos SET is_active = FALSE WHERE id = $1",
-        video_id
-    )
+    await db.execute(DEACTIVATE_VIDEO, video_id)
+    await invalidate("active_video")
 
 
-async def get_all_videos(limit: int = 20, offset: int = 0) -> List[dict]:
-    """Récupère toutes les vidéos avec pagination"""
-    videos = await db.fetch(
-        "SELECT * FROM videos ORDER BY created_at DESC LIMIT $1 OFFSET $2",
-        limit, offset
-    )
-    return [dict(v) for v in videos]
+async def get_all_videos(limit: int = 20, after: tuple = None, before: tuple = None) -> List[dict]:
+    """Récupère les vidéos (pagination par clé, voir _keyset_page)"""
+    return await _keyset_page("videos", limit, after, before)
 
 
 async def get_videos_count() -> int:
     """Compte le nombre total de vidéos"""
-    result = await db.fetchval("SELECT COUNT(*) FROM videos")
+    result = await db.fetchval(VIDEOS_COUNT)
     return result or 0
 
 
 async def delete_video(video_id: int):
     """Supprime une vidéo"""
-    await db.execute("DELETE FROM videos WHERE id = $1", video_id)
+    await db.execute(DELETE_VIDEO, video_id)
+    await invalidate("active_video")
 
 
 async def toggle_video_active(video_id: int) -> dict:
@@ -231,21 +499,17 @@ async def toggle_video_active(video_id: int) -> dict:
     # Si on active, désactiver les autres d'abord
     video = await get_video_by_id(video_id)
     if video and not video['is_active']:
-        await db.execute("UPDATE videos SET is_active = FALSE WHERE is_active = TRUE")
+        await db.execute(DEACTIVATE_ACTIVE_VIDEOS)
     
-    updated = await db.fetchrow("""
-        UPDATE videos SET is_active = NOT is_active 
-        WHERE id = $1 RETURNING *
-    """, video_id)
+    updated = await db.fetchrow(TOGGLE_VIDEO_ACTIVE, video_id)
+    await invalidate("active_video")
     return dict(updated) if updated else None
 
 
 async def extend_video_validity(video_id: int, hours: int) -> dict:
     """Prolonge la validité d'une vidéo"""
-    updated = await db.fetchrow("""
-        UPDATE videos SET expires_at = expires_at + ($2 * INTERVAL '1 hour')
-        WHERE id = $1 RETURNING *
-    """, video_id, hours)
+    updated = await db.fetchrow(EXTEND_VIDEO_VALIDITY, video_id, hours)
+    await invalidate("active_video")
     return dict(updated) if updated else None
 
 
@@ -253,37 +517,55 @@ async def extend_video_validity(video_id: int, hours: int) -> dict:
 # MESSAGES TÉMOIGNAGES
 # ============================================
 
-async def get_active_testimonials() -> List[dict]:
-    """Récupère les messages témoignages actifs"""
-    testimonials = await db.fetch(
-        "SELECT * FROM testimonial_messages WHERE is_active = TRUE ORDER BY id"
-    )
+GET_ACTIVE_TESTIMONIALS = query(
+    "get_active_testimonials",
+    "SELECT * FROM testimonial_messages WHERE is_active = TRUE ORDER BY id"
+)
+CREATE_TESTIMONIAL = query(
+    "create_testimonial", "INSERT INTO testimonial_messages (message) VALUES ($1) RETURNING *"
+)
+INCREMENT_TESTIMONIAL_USAGE = query(
+    "increment_testimonial_usage",
+    "UPDATE testimonial_messages SET usage_count = usage_count + 1 WHERE id = $1"
+)
+DEACTIVATE_TESTIMONIAL = query(
+    "deactivate_testimonial", "UPDATE testimonial_messages SET is_active = FALSE WHERE id = $1"
+)
+
+
+async def _load_active_testimonials() -> tuple:
+    return tuple(dict(t) for t in await db.fetch(GET_ACTIVE_TESTIMONIALS))
+
+
+# Témoignages actifs en mémoire (même objet tant qu'ils ne changent pas)
+testimonials_cache = cached_value("testimonials", _load_active_testimonials)
+
+
+async def get_active_testimonials(fresh: bool = False) -> List[dict]:
+    """Récupère les messages témoignages actifs (fresh=True: lecture directe, compteurs à jour)"""
+    if fresh:
+        testimonials = await _load_active_testimonials()
+    else:
+        testimonials = await testimonials_cache.get()
     return [dict(t) for t in testimonials]
 
 
 async def create_testimonial(message: str) -> dict:
     """Crée un nouveau message témoignage"""
-    testimonial = await db.fetchrow(
-        "INSERT INTO testimonial_messages (message) VALUES ($1) RETURNING *",
-        message
-    )
+    testimonial = await db.fetchrow(CREATE_TESTIMONIAL, message)
+    await invalidate("testimonials")
     return dict(testimonial)
 
 
 async def increment_testimonial_usage(testimonial_id: int):
     """Incrémente le compteur d'utilisation"""
-    await db.execute(
-        "UPDATE testimonial_messages SET usage_count = usage_count + 1 WHERE id = $1",
-        testimonial_id
-    )
+    await db.execute(INCREMENT_TESTIMONIAL_USAGE, testimonial_id)
 
 
 async def deactivate_testimonial(testimonial_id: int):
     """Désactive un message témoignage"""
-    await db.execute(
-        "UPDATE testimonial_messages SET is_active = FALSE WHERE id = $1",
-        testimonial_id
-    )
+    await db.execute(DEACTIVATE_TESTIMONIAL, testimonial_id)
+    await invalidate("testimonials")
 
 
 # ============================================
@@ -295,6 +577,46 @@ def hash_image(image_data: bytes) -> str:
     return hashlib.sha256(image_data).hexdigest()
 
 
+CREATE_SHARE = query("create_share", f"""
+    WITH new_share AS (
+        INSERT INTO shares (
+            user_id, video_id, platform, proof_image_file_id, proof_image_hash,
+            group_name, group_link, testimonial_id, custom_testimonial, group_member_count,
+            proof_image_url, proof_cloud_public_id, proof_dhash, group_key
+        )
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14)
+        RETURNING *
+    ),
+    stats AS (
+        INSERT INTO user_stats (user_id, pending_count, stats_date, telegram_today, whatsapp_today)
+        SELECT user_id, 1, CURRENT_DATE,
+               (platform = 'telegram')::int, (platform = 'whatsapp')::int
+        FROM new_share
+        ON CONFLICT (user_id) DO UPDATE SET
+            pending_count = user_stats.pending_count + 1,
+            telegram_today = CASE WHEN user_stats.stats_date = CURRENT_DATE
+                                  THEN user_stats.telegram_today ELSE 0 END
+                             + EXCLUDED.telegram_today,
+            whatsapp_today = CASE WHEN user_stats.stats_date = CURRENT_DATE
+                                  THEN user_stats.whatsapp_today ELSE 0 END
+                             + EXCLUDED.whatsapp_today,
+            stats_date = CURRENT_DATE
+    ),
+    testimonial AS (
+        UPDATE testimonial_messages SET usage_count = usage_count + 1
+        WHERE id = (SELECT testimonial_id FROM new_share)
+    ),
+    rollup AS ({_stats_daily('''
+        SELECT CURRENT_DATE, 'shares', platform, 'submitted', COUNT(*), 0
+        FROM new_share GROUP BY platform
+    ''')}),
+    counters AS ({_stats_counters('''
+        VALUES ('pending_shares', (SELECT COUNT(*) FROM new_share))
+    ''')})
+    SELECT * FROM new_share
+""")
+
+
 async def create_share(
     user_id: int,
     video_id: int,
@@ -307,238 +629,646 @@ async def create_share(
     custom_testimonial: str = None,
     group_member_count: int = None,
     proof_image_url: str = None,
-    proof_cloud_public_id: str = None
+    proof_cloud_public_id: str = None,
+    proof_dhash: int = None
 ) -> dict:
-    """Crée une nouvelle soumission de partage"""
+    """Crée une nouvelle soumission de partage (+ compteurs et témoignage, même requête)"""
     
-    share = await db.fetchrow("""
-        INSERT INTO shares (
-            user_id, video_id, platform, proof_image_file_id, proof_image_hash,
-            group_name, group_link, testimonial_id, custom_testimonial, group_member_count,
-            proof_image_url, proof_cloud_public_id
-        )
-        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
-        RETURNING *
-    """, user_id, video_id, platform, proof_image_file_id, proof_image_hash,
+    share = await db.fetchrow(
+        CREATE_SHARE, user_id, video_id, platform, proof_image_file_id, proof_image_hash,
         group_name, group_link, testimonial_id, custom_testimonial, group_member_count,
-        proof_image_url, proof_cloud_public_id)
-    
-    # Incrémenter l'utilisation du témoignage
-    if testimonial_id:
-        await increment_testimonial_usage(testimonial_id)
+        proof_image_url, proof_cloud_public_id,
+        to_signed(proof_dhash) if proof_dhash is not None else None,
+        group_key(platform, group_link)
+    )
     
+    if proof_dhash is not None:
+        proof_index.add(proof_dhash)
     return dict(share)
 
 
+GET_SHARE_BY_ID = query("get_share_by_id", """
+    SELECT s.*, u.telegram_id as user_telegram_id, u.username, u.first_name
+    FROM shares s
+    JOIN users u ON s.user_id = u.id
+    WHERE s.id = $1
+""")
+
+
 async def get_share_by_id(share_id: int) -> Optional[dict]:
     """Récupère un partage par son ID avec les infos utilisateur"""
-    share = await db.fetchrow("""
-        SELECT s.*, u.telegram_id as user_telegram_id, u.username, u.first_name
-        FROM shares s
-        JOIN users u ON s.user_id = u.id
-        WHERE s.id = $1
-    """, share_id)
+    share = await db.fetchrow(GET_SHARE_BY_ID, share_id)
     return dict(share) if share else None
 
 
-async def get_pending_shares(limit: int = 50) -> List[dict]:
-    """Récupère les partages en attente de validation"""
-    shares = await db.fetch("""
-        SELECT s.*, u.username, u.first_name, u.telegram_id as user_telegram_id,
-               v.title as video_title
-        FROM shares s
-        JOIN users u ON s.user_id = u.id
-        JOIN videos v ON s.video_id = v.id
-        WHERE s.status = 'pending'
-        ORDER BY s.created_at ASC
-        LIMIT $1
-    """, limit)
+GET_PENDING_SHARES = query("get_pending_shares", """
+    SELECT s.*, u.username, u.first_name, u.telegram_id as user_telegram_id,
+           v.title as video_title
+    FROM shares s
+    JOIN users u ON s.user_id = u.id
+    JOIN videos v ON s.video_id = v.id
+    WHERE s.status = 'pending'
+    ORDER BY s.created_at ASC
+    LIMIT $1
+""")
+
+# Plus risqués d'abord (score bas), les partages pas encore scorés à la fin
+GET_PENDING_SHARES_BY_RISK = query("get_pending_shares_by_risk", """
+    SELECT s.*, u.username, u.first_name, u.telegram_id as user_telegram_id,
+           v.title as video_title
+    FROM shares s
+    JOIN users u ON s.user_id = u.id
+    JOIN videos v ON s.video_id = v.id
+    WHERE s.status = 'pending'
+    ORDER BY s.auto_score ASC NULLS LAST, s.created_at ASC
+    LIMIT $1
+""")
+
+
+async def get_pending_shares(limit: int = 50, by_risk: bool = False) -> List[dict]:
+    """Récupère les partages en attente de validation (par date ou par risque)"""
+    sql = GET_PENDING_SHARES_BY_RISK if by_risk else GET_PENDING_SHARES
+    shares = await db.fetch(sql, limit)
     return [dict(s) for s in shares]
 
 
-async def approve_share(share_id: int, admin_telegram_id: int):
-    """Approuve un partage et crédite l'utilisateur"""
-    share = await get_share_by_id(share_id)
-    if not share or share['status'] != ShareStatus.PENDING:
-        return None
-    
-    # Mettre à jour le statut
-    await db.execute("""
-        UPDATE shares 
-        SET status = $1, validated_by = $2, validated_at = CURRENT_TIMESTAMP
-        WHERE id = $3
-    """, ShareStatus.APPROVED, admin_telegram_id, share_id)
-    
-    # Créditer l'utilisateur
-    await update_user_balance(share['user_id'], REWARD_PER_SHARE)
-    
-    # Récupérer le nouvel utilisateur avec son solde mis à jour
-    user = await db.fetchrow("SELECT * FROM users WHERE id = $1", share['user_id'])
-    
-    # Vérifier bonus parrainage (seulement si premier partage validé)
-    referral_bonus_given = False
-    referrer_id = None
+COUNT_PENDING_SHARES = query(
+    "count_pending_shares", "SELECT COUNT(*) FROM shares WHERE status = 'pending'"
+)
+
+
+async def count_pending_shares() -> int:
+    """Nombre exact de partages en attente (index partiel des partages en attente)"""
+    return await db.fetchval(COUNT_PENDING_SHARES)
+
+
+# Caractéristiques de scoring de la file d'attente, par lots (pagination par id)
+# Lot d'ids en attente pris d'abord dans shares (index partiel), puis chaque
+# utilisateur lu par clé primaire: pas de parcours complet de users
+GET_SCORING_FEATURES = query("get_scoring_features", """
+    SELECT
+        s.id,
+        s.platform,
+        u.new_user,
+        COALESCE(us.approved_count, 0) AS approved_count,
+        COALESCE(us.pending_count, 0) AS pending_count,
+        COALESCE(us.rejected_count, 0) AS rejected_count,
+        CASE WHEN us.stats_date = CURRENT_DATE THEN us.telegram_today ELSE 0 END AS telegram_today,
+        CASE WHEN us.stats_date = CURRENT_DATE THEN us.whatsapp_today ELSE 0 END AS whatsapp_today,
+        g.group_uses,
+        g.group_uses_24h
+    FROM (
+        SELECT id, user_id, platform, group_key
+        FROM shares
+        WHERE status = 'pending' AND id > $1
+        ORDER BY id
+        LIMIT $2
+    ) s
+    CROSS JOIN LATERAL (
+        SELECT created_at > NOW() - INTERVAL '24 hours' AS new_user
+        FROM users
+        WHERE id = s.user_id
+    ) u
+    LEFT JOIN user_stats us ON us.user_id = s.user_id
+    CROSS JOIN LATERAL (
+        SELECT
+            COUNT(*) AS group_uses,
+            COUNT(*) FILTER (WHERE o.created_at > NOW() - INTERVAL '24 hours') AS group_uses_24h
+        FROM shares o
+        WHERE o.group_key = s.group_key AND o.id <> s.id
+    ) g
+    ORDER BY s.id
+""")
+
+SAVE_SHARE_SCORES = query("save_share_scores", """
+    UPDATE shares s
+    SET auto_score = d.score, risk_flags = d.flags, scored_at = CURRENT_TIMESTAMP
+    FROM unnest($1::int[], $2::int[], $3::int[]) AS d(id, score, flags)
+    WHERE s.id = d.id AND s.status = 'pending'
+""")
+
+
+async def get_scoring_features(after_id: int = 0, limit: int = 5000) -> List[dict]:
+    """Caractéristiques des partages en attente d'id > after_id (un lot)"""
+    rows = await db.fetch(GET_SCORING_FEATURES, after_id, limit)
+    return [dict(r) for r in rows]
+
+
+async def save_share_scores(ids: List[int], scores: List[int], flags: List[int]) -> int:
+    """Enregistre score et drapeaux de risque d'un lot en un seul UPDATE"""
+    status = await db.execute(SAVE_SHARE_SCORES, ids, scores, flags)
+    return int(status.split()[-1])
+
+
+# Approbation + crédit + bonus de parrainage + compteurs en une seule requête.
+# Toutes les CTE voient le même instantané: le NOT EXISTS ne voit donc pas
+# les partages approuvés par cette même requête (= premier partage validé).
+APPROVE_SHARES = query("approve_shares", f"""
+    WITH approved AS (
+        UPDATE shares
+        SET status = 'approved', validated_by = $2, validated_at = CURRENT_TIMESTAMP
+        WHERE id = ANY($1::int[]) AND status = 'pending'
+        RETURNING id, user_id, platform
+    ),
+    counters AS ({_stats_counters('''
+        VALUES ('pending_shares', -(SELECT COUNT(*) FROM approved))
+    ''')}),
+    ranked AS (
+        SELECT id, user_id, ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY id) AS rn
+        FROM approved
+    ),
+    per_user AS (
+        SELECT user_id, COUNT(*) AS approved_count
+        FROM approved
+        GROUP BY user_id
+    ),
+    stats AS (
+        INSERT INTO user_stats (user_id, approved_count)
+        SELECT user_id, approved_count FROM per_user
+        ON CONFLICT (user_id) DO UPDATE SET
+            approved_count = user_stats.approved_count + EXCLUDED.approved_count,
+            pending_count = GREATEST(user_stats.pending_count - EXCLUDED.approved_count, 0)
+    ),
+    first_approvals AS (
+        SELECT u.id AS user_id, u.referred_by AS referrer_id
+        FROM per_user p
+        JOIN users u ON u.id = p.user_id
+        WHERE u.referred_by IS NOT NULL
+        AND NOT EXISTS (
+            SELECT 1 FROM shares s
+            WHERE s.user_id = p.user_id AND s.status = 'approved'
+        )
+    ),
+    -- amount = montant crédité (récompenses + bonus de parrainage): budget journalier
+    rollup AS ({_stats_daily('''
+        SELECT CURRENT_DATE, 'shares', a.platform, 'approved', COUNT(*),
+               COUNT(*) * $3 + COUNT(f.user_id) * $4
+        FROM approved a
+        LEFT JOIN ranked r ON r.id = a.id AND r.rn = 1
+        LEFT JOIN first_approvals f ON f.user_id = r.user_id
+        GROUP BY a.platform
+    ''')}),
+    credits AS (
+        SELECT user_id, SUM(amount)::int AS amount
+        FROM (
+            SELECT user_id, approved_count * $3 AS amount FROM per_user
+            UNION ALL
+            SELECT referrer_id, $4 FROM first_approvals
+        ) c
+        GROUP BY user_id
+    ),
+    credited AS (
+        UPDATE users u
+        SET balance = u.balance + c.amount, total_earned = u.total_earned + c.amount
+        FROM credits c
+        WHERE u.id = c.user_id
+        RETURNING u.id, u.balance, u.telegram_id, u.first_name, u.username
+    )
+    SELECT
+        r.id AS share_id,
+        r.user_id,
+        cu.balance AS new_balance,
+        cu.telegram_id,
+        cu.first_name,
+        cu.username,
+        f.referrer_id,
+        ref.telegram_id AS referrer_telegram_id
+    FROM ranked r
+    JOIN credited cu ON cu.id = r.user_id
+    LEFT JOIN first_approvals f ON f.user_id = r.user_id AND r.rn = 1
+    LEFT JOIN credited ref ON ref.id = f.referrer_id
+    ORDER BY r.id
+""")
+
+
+async def approve_shares(share_ids: List[int], admin_telegram_id: int) -> List[dict]:
+    """Approuve plusieurs partages en une seule requête (crédit + bonus parrainage)"""
+    if not share_ids:
+        return []
     
-    if user and user.get('referred_by'):
-        # Compter les partages approuvés de cet utilisateur
-        approved_count = await db.fetchval("""
-            SELECT COUNT(*) FROM shares 
-            WHERE user_id = $1 AND status = 'approved'
-        """, share['user_id'])
-        
-        # Si c'est le premier partage approuvé, donner le bonus au parrain
-        if approved_count == 1:
-            referrer = await db.fetchrow("SELECT * FROM users WHERE id = $1", user['referred_by'])
-            if referrer:
-                await update_user_balance(referrer['id'], REFERRAL_BONUS)
-                referral_bonus_given = True
-                referrer_id = referrer['id']
+    rows = await db.fetch(
+        APPROVE_SHARES,
+        list(share_ids), admin_telegram_id, REWARD_PER_SHARE, REFERRAL_BONUS
+    )
+    results = []
+    for row in rows:
+        result = dict(row)
+        result['referral_bonus_given'] = result['referrer_id'] is not None
+        results.append(result)
     
-    return {
-        'user_id': share['user_id'],
-        'new_balance': user['balance'] if user else 0,
-        'referral_bonus_given': referral_bonus_given,
-        'referrer_id': referrer_id
-    }
+    # Soldes modifiés: profils à évincer (utilisateurs et parrains)
+    credited = {r['telegram_id'] for r in results}
+    credited.update(r['referrer_telegram_id'] for r in results if r['referrer_telegram_id'])
+    if credited:
+        await forget_users(*credited)
+    return results
+
+
+# Preuves sûres (score suffisant, aucun drapeau), verrouillées jusqu'à la fin de la transaction
+GET_AUTO_APPROVE_CANDIDATES = query("get_auto_approve_candidates", """
+    SELECT s.id, s.auto_score, s.platform, s.created_at, u.telegram_id AS user_telegram_id
+    FROM shares s
+    JOIN users u ON u.id = s.user_id
+    WHERE s.status = 'pending' AND s.auto_score >= $1 AND s.risk_flags = 0
+      AND u.is_blocked = FALSE
+    ORDER BY s.created_at ASC
+    LIMIT $2
+    FOR UPDATE OF s SKIP LOCKED
+""")
+
+TRY_ADVISORY_XACT_LOCK = query(
+    "try_advisory_xact_lock", "SELECT pg_try_advisory_xact_lock($1)"
+)
 
 
-async def reject_share(share_id: int, admin_telegram_id: int, reason: str = None):
-    """Rejette un partage"""
-    await db.execute("""
-        UPDATE shares 
+async def get_auto_approve_candidates(min_score: int, limit: int) -> List[dict]:
+    """Partages en attente auto-approuvables (à appeler dans une transaction)"""
+    rows = await db.fetch(GET_AUTO_APPROVE_CANDIDATES, min_score, limit)
+    return [dict(r) for r in rows]
+
+
+async def try_advisory_xact_lock(key: int) -> bool:
+    """Verrou applicatif tenu jusqu'à la fin de la transaction (False si déjà pris ailleurs)"""
+    return await db.fetchval(TRY_ADVISORY_XACT_LOCK, key)
+
+
+async def approve_share(share_id: int, admin_telegram_id: int):
+    """Approuve un partage et crédite l'utilisateur"""
+    results = await approve_shares([share_id], admin_telegram_id)
+    return results[0] if results else None
+
+
+REJECT_SHARE = query("reject_share", f"""
+    WITH old AS (
+        SELECT id, user_id, platform, status FROM shares WHERE id = $4 FOR UPDATE
+    ),
+    rejected AS (
+        UPDATE shares s
         SET status = $1, validated_by = $2, validated_at = CURRENT_TIMESTAMP, rejection_reason = $3
-        WHERE id = $4
-    """, ShareStatus.REJECTED, admin_telegram_id, reason, share_id)
+        FROM old
+        WHERE s.id = old.id
+        RETURNING old.user_id, old.platform, old.status AS old_status
+    ),
+    stats AS (
+        UPDATE user_stats us
+        SET rejected_count = us.rejected_count + 1,
+            pending_count = GREATEST(us.pending_count - (r.old_status = 'pending')::int, 0),
+            approved_count = GREATEST(us.approved_count - (r.old_status = 'approved')::int, 0)
+        FROM rejected r
+        WHERE us.user_id = r.user_id AND r.old_status <> 'rejected'
+    ),
+    rollup AS ({_stats_daily('''
+        SELECT CURRENT_DATE, 'shares', platform, 'rejected', COUNT(*), 0
+        FROM rejected WHERE old_status <> 'rejected' GROUP BY platform
+    ''')})
+    {_stats_counters('''
+        VALUES ('pending_shares', -(SELECT COUNT(*) FROM rejected WHERE old_status = 'pending'))
+    ''')}
+""")
+
+
+async def reject_share(share_id: int, admin_telegram_id: int, reason: str = None):
+    """Rejette un partage (et met à jour les compteurs dans la même requête)"""
+    await db.execute(REJECT_SHARE, ShareStatus.REJECTED, admin_telegram_id, reason, share_id)
+
+
+GET_USER_STATS = query("get_user_stats", """
+    SELECT
+        approved_count,
+        pending_count,
+        rejected_count,
+        total_withdrawn,
+        CASE WHEN stats_date = CURRENT_DATE THEN telegram_today ELSE 0 END AS telegram_today,
+        CASE WHEN stats_date = CURRENT_DATE THEN whatsapp_today ELSE 0 END AS whatsapp_today
+    FROM user_stats
+    WHERE user_id = $1
+""")
+
+
+async def get_user_stats(user_id: int) -> dict:
+    """Compteurs de l'utilisateur (une ligne lue par clé primaire)"""
+    stats = await db.fetchrow(GET_USER_STATS, user_id)
+    if not stats:
+        return {
+            'approved_count': 0, 'pending_count': 0, 'rejected_count': 0,
+            'total_withdrawn': 0, 'telegram_today': 0, 'whatsapp_today': 0
+        }
+    return dict(stats)
 
 
 async def get_user_shares_today(user_id: int, platform: str) -> int:
     """Compte les partages de l'utilisateur aujourd'hui pour une plateforme"""
-    count = await db.fetchval("""
-        SELECT COUNT(*) FROM shares 
-        WHERE user_id = $1 
-        AND platform = $2
-        AND created_at >= CURRENT_DATE
-    """, user_id, platform)
-    return count or 0
+    stats = await get_user_stats(user_id)
+    return stats.get(f"{platform}_today", 0)
+
+
+GET_USER_SHARES_HISTORY = query("get_user_shares_history", """
+    SELECT s.*, v.title as video_title
+    FROM shares s
+    JOIN videos v ON s.video_id = v.id
+    WHERE s.user_id = $1
+    ORDER BY s.created_at DESC
+    LIMIT $2
+""")
 
 
 async def get_user_shares_history(user_id: int, limit: int = 20) -> List[dict]:
     """Récupère l'historique des partages d'un utilisateur"""
-    shares = await db.fetch("""
-        SELECT s.*, v.title as video_title
-        FROM shares s
-        JOIN videos v ON s.video_id = v.id
-        WHERE s.user_id = $1
-        ORDER BY s.created_at DESC
-        LIMIT $2
-    """, user_id, limit)
+    shares = await db.fetch(GET_USER_SHARES_HISTORY, user_id, limit, replica=True)
     return [dict(s) for s in shares]
 
 
-async def check_duplicate_proof(proof_hash: str) -> bool:
-    """Vérifie si cette preuve a déjà été soumise"""
-    existing = await db.fetchval(
-        "SELECT id FROM shares WHERE proof_image_hash = $1",
-        proof_hash
-    )
-    return existing is not None
+PROOF_DHASHES = query(
+    "proof_dhashes", "SELECT proof_dhash FROM shares WHERE proof_dhash IS NOT NULL"
+)
+
+# Empreintes de toutes les preuves, reconstruites au démarrage puis complétées par create_share
+proof_index = HammingIndex(PROOF_SIMILARITY_DISTANCE)
+
+
+async def load_proof_index() -> int:
+    """Reconstruit l'index des empreintes depuis la base (retourne sa taille)"""
+    global proof_index
+    index = HammingIndex(PROOF_SIMILARITY_DISTANCE)
+    async for row in db.iterate(PROOF_DHASHES, prefetch=5000):
+        index.add(row['proof_dhash'])
+    proof_index = index
+    return len(index)
+
+
+def find_similar_proof(proof_dhash: int) -> bool:
+    """Vérifie si une preuve quasi identique (recadrée, recompressée...) a déjà été soumise"""
+    return proof_index.find(proof_dhash) is not None
+
+
+# Partages du jour (et du délai minimal), par âge: indépendant du fuseau de la base
+# Fenêtre par âge (24 h + délai minimal): couvre la journée du limiteur quel que soit
+# son fuseau, sans dépendre de CURRENT_DATE.
+# telegram_id lu par clé primaire pour chaque partage (pas de parcours de users).
+GET_RECENT_SHARE_TIMES = query("get_recent_share_times", """
+    SELECT (SELECT telegram_id FROM users WHERE id = s.user_id) AS telegram_id, s.platform,
+           EXTRACT(EPOCH FROM (LOCALTIMESTAMP - s.created_at))::float8 AS age
+    FROM shares s
+    WHERE s.created_at >= LOCALTIMESTAMP - INTERVAL '24 hours' - make_interval(mins => $1)
+    ORDER BY s.created_at
+""")
+
 
+# Fuseau de CURRENT_DATE (jour des compteurs user_stats et stats_daily)
+DB_TIMEZONE = query("db_timezone", """
+    SELECT current_setting('TimeZone') AS name,
+           EXTRACT(TIMEZONE FROM now())::int AS utc_offset
+""")
 
-async def check_group_recently_used(user_id: int, group_link: str) -> bool:
-    """Vérifie si ce groupe a été utilisé récemment par cet utilisateur"""
+
+# Limites de soumission en mémoire, reconstruites au démarrage puis complétées par le bot
+share_limiter = ShareRateLimiter(
+    min_delay=MIN_DELAY_BETWEEN_SHARES * 60,
+    daily_limits={"telegram": MAX_TELEGRAM_SHARES_PER_DAY, "whatsapp": MAX_WHATSAPP_SHARES_PER_DAY},
+    burst=PROOF_BURST,
+    refill_seconds=PROOF_REFILL_SECONDS
+)
+
+
+async def load_share_limiter() -> int:
+    """Reconstruit les limites de soumission depuis les partages récents (retourne leur nombre)"""
+    # Même minuit que la base: le limiteur et le plafond de user_stats changent de jour ensemble
+    zone = await db.fetchrow(DB_TIMEZONE)
+    share_limiter.tz = database_timezone(zone['name'], zone['utc_offset'])
+    rows = await db.fetch(GET_RECENT_SHARE_TIMES, MIN_DELAY_BETWEEN_SHARES)
+    now = time.time()
+    share_limiter.clear()
+    for row in rows:
+        share_limiter.record(row['telegram_id'], row['platform'], now - max(row['age'], 0))
+    return len(share_limiter)
+
+
+# Tous les signaux anti-fraude d'une soumission en un seul aller-retour
+GET_FRAUD_SIGNALS = query("get_fraud_signals", """
+    SELECT
+        u.created_at > NOW() - INTERVAL '24 hours' AS new_user,
+        COALESCE(us.approved_count, 0) AS approved_count,
+        COALESCE(us.pending_count, 0) AS pending_count,
+        COALESCE(us.rejected_count, 0) AS rejected_count,
+        CASE WHEN us.stats_date = CURRENT_DATE THEN us.telegram_today ELSE 0 END AS telegram_today,
+        CASE WHEN us.stats_date = CURRENT_DATE THEN us.whatsapp_today ELSE 0 END AS whatsapp_today,
+        EXISTS (SELECT 1 FROM shares WHERE proof_image_hash = $2) AS duplicate_proof,
+        EXISTS (
+            SELECT 1 FROM shares
+            WHERE user_id = $1 AND group_key = $3 AND created_at > $4
+        ) AS group_recently_used,
+        g.group_uses,
+        g.group_uses_24h
+    FROM users u
+    LEFT JOIN user_stats us ON us.user_id = u.id
+    CROSS JOIN LATERAL (
+        SELECT
+            COUNT(*) AS group_uses,
+            COUNT(*) FILTER (WHERE created_at > NOW() - INTERVAL '24 hours') AS group_uses_24h
+        FROM shares
+        WHERE group_key = $3
+    ) g
+    WHERE u.id = $1
+""")
+
+_NO_SIGNALS = {
+    'new_user': False, 'approved_count': 0, 'pending_count': 0, 'rejected_count': 0,
+    'telegram_today': 0, 'whatsapp_today': 0, 'duplicate_proof': False,
+    'group_recently_used': False, 'group_uses': 0, 'group_uses_24h': 0
+}
+
+
+async def get_fraud_signals(
+    user_id: int,
+    platform: str,
+    group_link: str = "",
+    proof_hash: str = None,
+    proof_dhash: int = None
+) -> dict:
+    """
+    Signaux anti-fraude d'une soumission: une requête pour la base,
+    puis la blacklist et l'index des empreintes (en mémoire)
+    """
     days_ago = datetime.now() - timedelta(days=GROUP_REUSE_DAYS)
-    existing = await db.fetchval("""
-        SELECT id FROM shares 
-        WHERE user_id = $1 AND group_link = $2 AND created_at > $3
-    """, user_id, group_link, days_ago)
-    return existing is not None
-
-
-async def get_user_validation_rate(user_id: int) -> float:
-    """Calcule le taux de validation d'un utilisateur"""
-    stats = await db.fetchrow("""
-        SELECT 
-            COUNT(*) FILTER (WHERE status = 'approved') as approved,
-            COUNT(*) as total
-        FROM shares WHERE user_id = $1
-    """, user_id)
+    key = group_key(platform, group_link) if group_link else None
+    row = await db.fetchrow(GET_FRAUD_SIGNALS, user_id, proof_hash, key, days_ago)
+    signals = dict(row) if row else dict(_NO_SIGNALS)
     
-    if stats['total'] == 0:
-        return 0.0
-    return (stats['approved'] / stats['total']) * 100
+    total = signals['approved_count'] + signals['pending_count'] + signals['rejected_count']
+    signals['validation_rate'] = (signals['approved_count'] / total) * 100 if total else 0.0
+    signals['shares_today'] = signals.get(f"{platform}_today", 0)
+    signals['similar_proof'] = proof_dhash is not None and find_similar_proof(proof_dhash)
+    signals['blacklisted'] = await is_group_blacklisted(group_link)
+    return signals
 
 
 # ============================================
 # RETRAITS
 # ============================================
 
+# Débit et demande en une requête: rien n'est créé si le solde est insuffisant
+INSERT_WITHDRAWAL = query("insert_withdrawal", f"""
+    WITH debited AS (
+        UPDATE users SET balance = balance - $2
+        WHERE id = $1 AND balance >= $2
+        RETURNING id, telegram_id
+    ),
+    created AS (
+        INSERT INTO withdrawals (user_id, amount, payment_method, payment_details)
+        SELECT id, $2, $3, $4 FROM debited
+        RETURNING *
+    ),
+    rollup AS ({_stats_daily('''
+        SELECT CURRENT_DATE, 'withdrawals', payment_method, 'requested', COUNT(*), SUM(amount)
+        FROM created GROUP BY payment_method
+    ''')}),
+    counters AS ({_stats_counters('''
+        VALUES ('pending_withdrawals', (SELECT COUNT(*) FROM created)),
+               ('pending_withdrawal_amount', (SELECT COALESCE(SUM(amount), 0) FROM created))
+    ''')})
+    SELECT c.*, d.telegram_id AS user_telegram_id
+    FROM created c
+    JOIN debited d ON d.id = c.user_id
+""")
+
+
 async def create_withdrawal(
     user_id: int,
     amount: int,
     payment_method: str,
     payment_details: str
 ) -> dict:
-    """Crée une demande de retrait"""
+    """Crée une demande de retrait et débite le solde (None si solde insuffisant)"""
     
-    withdrawal = await db.fetchrow("""
-        INSERT INTO withdrawals (user_id, amount, payment_method, payment_details)
-        VALUES ($1, $2, $3, $4)
-        RETURNING *
-    """, user_id, amount, payment_method, payment_details)
-    
-    # Débiter le solde de l'utilisateur
-    await update_user_balance(user_id, amount, add=False)
+    withdrawal = await db.fetchrow(
+        INSERT_WITHDRAWAL, user_id, amount, payment_method, payment_details
+    )
+    if not withdrawal:
+        return None
     
-    return dict(withdrawal)
+    withdrawal = dict(withdrawal)
+    await forget_users(withdrawal.pop('user_telegram_id'))
+    return withdrawal
+
+
+GET_WITHDRAWAL_BY_ID = query("get_withdrawal_by_id", "SELECT * FROM withdrawals WHERE id = $1")
+
+
+async def get_withdrawal_by_id(withdrawal_id: int) -> Optional[dict]:
+    """Récupère un retrait par son ID"""
+    withdrawal = await db.fetchrow(GET_WITHDRAWAL_BY_ID, withdrawal_id)
+    return dict(withdrawal) if withdrawal else None
+
+
+GET_PENDING_WITHDRAWALS = query("get_pending_withdrawals", """
+    SELECT w.*, u.username, u.first_name, u.telegram_id as user_telegram_id
+    FROM withdrawals w
+    JOIN users u ON w.user_id = u.id
+    WHERE w.status = 'pending'
+    ORDER BY w.created_at ASC
+    LIMIT $1
+""")
 
 
 async def get_pending_withdrawals(limit: int = 50) -> List[dict]:
     """Récupère les retraits en attente"""
-    withdrawals = await db.fetch("""
-        SELECT w.*, u.username, u.first_name, u.telegram_id as user_telegram_id
-        FROM withdrawals w
-        JOIN users u ON w.user_id = u.id
-        WHERE w.status = 'pending'
-        ORDER BY w.created_at ASC
-        LIMIT $1
-    """, limit)
+    withdrawals = await db.fetch(GET_PENDING_WITHDRAWALS, limit)
     return [dict(w) for w in withdrawals]
 
 
-async def complete_withdrawal(withdrawal_id: int, admin_telegram_id: int):
-    """Marque un retrait comme complété"""
-    await db.execute("""
-        UPDATE withdrawals 
+COMPLETE_WITHDRAWAL = query("complete_withdrawal", f"""
+    WITH old AS (
+        SELECT id, user_id, amount, payment_method, status
+        FROM withdrawals WHERE id = $3 FOR UPDATE
+    ),
+    done AS (
+        UPDATE withdrawals w
         SET status = $1, processed_by = $2, processed_at = CURRENT_TIMESTAMP
-        WHERE id = $3
-    """, WithdrawalStatus.COMPLETED, admin_telegram_id, withdrawal_id)
+        FROM old
+        WHERE w.id = old.id
+        RETURNING old.user_id, old.amount, old.payment_method, old.status AS old_status
+    ),
+    stats AS (
+        INSERT INTO user_stats (user_id, total_withdrawn)
+        SELECT user_id, amount FROM done WHERE old_status <> 'completed'
+        ON CONFLICT (user_id) DO UPDATE SET
+            total_withdrawn = user_stats.total_withdrawn + EXCLUDED.total_withdrawn
+    ),
+    rollup AS ({_stats_daily('''
+        SELECT CURRENT_DATE, 'withdrawals', payment_method, 'completed', COUNT(*), SUM(amount)
+        FROM done WHERE old_status <> 'completed' GROUP BY payment_method
+    ''')})
+    {_stats_counters('''
+        VALUES ('pending_withdrawals', -(SELECT COUNT(*) FROM done WHERE old_status = 'pending')),
+               ('pending_withdrawal_amount',
+                -(SELECT COALESCE(SUM(amount), 0) FROM done WHERE old_status = 'pending'))
+    ''')}
+""")
+
+
+async def complete_withdrawal(withdrawal_id: int, admin_telegram_id: int):
+    """Marque un retrait comme complété (et cumule le total retiré)"""
+    await db.execute(
+        COMPLETE_WITHDRAWAL, WithdrawalStatus.COMPLETED, admin_telegram_id, withdrawal_id
+    )
+
+
+REJECT_WITHDRAWAL = query("reject_withdrawal", f"""
+    WITH old AS (
+        SELECT id, user_id, amount, payment_method, status
+        FROM withdrawals WHERE id = $4 FOR UPDATE
+    ),
+    rejected AS (
+        UPDATE withdrawals w
+        SET status = $1, processed_by = $2, processed_at = CURRENT_TIMESTAMP, rejection_reason = $3
+        FROM old
+        WHERE w.id = old.id
+        RETURNING old.user_id, old.amount, old.payment_method, old.status AS old_status
+    ),
+    rollup AS ({_stats_daily('''
+        SELECT CURRENT_DATE, 'withdrawals', payment_method, 'rejected', COUNT(*), SUM(amount)
+        FROM rejected WHERE old_status <> 'rejected' GROUP BY payment_method
+    ''')}),
+    counters AS ({_stats_counters('''
+        VALUES ('pending_withdrawals', -(SELECT COUNT(*) FROM rejected WHERE old_status = 'pending')),
+               ('pending_withdrawal_amount',
+                -(SELECT COALESCE(SUM(amount), 0) FROM rejected WHERE old_status = 'pending'))
+    ''')}),
+    refund AS (
+        UPDATE users u
+        SET balance = u.balance + r.amount, total_earned = u.total_earned + r.amount
+        FROM rejected r
+        WHERE u.id = r.user_id AND r.old_status <> 'rejected'
+        RETURNING u.telegram_id
+    ),
+    stats AS (
+        UPDATE user_stats us
+        SET total_withdrawn = GREATEST(us.total_withdrawn - r.amount, 0)
+        FROM rejected r
+        WHERE us.user_id = r.user_id AND r.old_status = 'completed'
+    )
+    SELECT telegram_id FROM refund
+""")
 
 
 async def reject_withdrawal(withdrawal_id: int, admin_telegram_id: int, reason: str = None):
-    """Rejette un retrait et rembourse l'utilisateur"""
-    withdrawal = await db.fetchrow(
-        "SELECT * FROM withdrawals WHERE id = $1",
-        withdrawal_id
+    """Rejette un retrait et rembourse l'utilisateur (une seule requête)"""
+    refunded = await db.fetchval(
+        REJECT_WITHDRAWAL, WithdrawalStatus.REJECTED, admin_telegram_id, reason, withdrawal_id
     )
-    
-    if withdrawal:
-        # Rembourser l'utilisateur
-        await update_user_balance(withdrawal['user_id'], withdrawal['amount'], add=True)
-        
-        # Mettre à jour le statut
-        await db.execute("""
-            UPDATE withdrawals 
-            SET status = $1, processed_by = $2, processed_at = CURRENT_TIMESTAMP, rejection_reason = $3
-            WHERE id = $4
-        """, WithdrawalStatus.REJECTED, admin_telegram_id, reason, withdrawal_id)
+    if refunded:
+        await forget_users(refunded)
+
+
+GET_USER_WITHDRAWALS = query(
+    "get_user_withdrawals",
+    "SELECT * FROM withdrawals WHERE user_id = $1 ORDER BY created_at DESC LIMIT $2"
+)
 
 
 async def get_user_withdrawals(user_id: int, limit: int = 20) -> List[dict]:
     """Récupère l'historique des retraits d'un utilisateur"""
-    withdrawals = await db.fetch(
-        "SELECT * FROM withdrawals WHERE user_id = $1 ORDER BY created_at DESC LIMIT $2",
-        user_id, limit
-    )
+    withdrawals = await db.fetch(GET_USER_WITHDRAWALS, user_id, limit, replica=True)
     return [dict(w) for w in withdrawals]
 
 
@@ -546,84 +1276,223 @@ async def get_user_withdrawals(user_id: int, limit: int = 20) -> List[dict]:
 # BLACKLIST
 # ============================================
 
-async def blacklist_group(group_identifier: str, reason: str = None):
-    """Ajoute un groupe à la blacklist"""
-    await db.execute(
-        "INSERT INTO blacklisted_groups (group_identifier, reason) VALUES ($1, $2) ON CONFLICT DO NOTHING",
-        group_identifier, reason
+BLACKLIST_GROUP = query("blacklist_group", """
+    INSERT INTO blacklisted_groups (group_identifier, reason, platform, group_key)
+    VALUES ($1, $2, $3, $4)
+    ON CONFLICT (group_key) DO NOTHING
+""")
+GET_BLACKLIST_ENTRIES = query(
+    "get_blacklist_entries", "SELECT group_identifier FROM blacklisted_groups"
+)
+GET_BLACKLISTED_GROUPS = query(
+    "get_blacklisted_groups", "SELECT * FROM blacklisted_groups ORDER BY created_at DESC"
+)
+REMOVE_FROM_BLACKLIST = query(
+    "remove_from_blacklist", "DELETE FROM blacklisted_groups WHERE id = $1"
+)
+CLEAR_BLACKLIST = query("clear_blacklist", "DELETE FROM blacklisted_groups")
+
+
+async def _load_blacklist() -> GroupMatcher:
+    rows = await db.fetch(GET_BLACKLIST_ENTRIES)
+    return GroupMatcher(row['group_identifier'] for row in rows)
+
+
+# Liste noire compilée en mémoire: la vérification d'un groupe ne fait aucune requête
+blacklist_cache = cached_value("blacklist", _load_blacklist)
+
+
+async def load_blacklist() -> int:
+    """Charge la liste noire en mémoire (démarrage), retourne le nombre d'entrées"""
+    return len(await blacklist_cache.get())
+
+
+async def blacklist_group(group_identifier: str, reason: str = None, platform: str = None) -> bool:
+    """
+    Ajoute un groupe (ou un motif "préfixe*" / domaine) à la blacklist.
+    Retourne False si le groupe y était déjà (même clé canonique).
+    """
+    identifier = group_identifier.strip().lower()
+    status = await db.execute(
+        BLACKLIST_GROUP, identifier, reason, platform, canonical_group_key(identifier)
     )
+    if status == "INSERT 0 0":
+        return False
+    await invalidate("blacklist")
+    return True
+
+
+async def add_to_blacklist(group_identifier: str, platform: str = None, reason: str = None) -> bool:
+    """Ajoute un groupe à la blacklist (handlers admin)"""
+    return await blacklist_group(group_identifier, reason, platform)
+
+
+async def remove_from_blacklist(blacklist_id: int) -> bool:
+    """Retire une entrée de la blacklist"""
+    status = await db.execute(REMOVE_FROM_BLACKLIST, blacklist_id)
+    if status == "DELETE 0":
+        return False
+    await invalidate("blacklist")
+    return True
+
+
+async def clear_blacklist():
+    """Vide la blacklist"""
+    await db.execute(CLEAR_BLACKLIST)
+    await invalidate("blacklist")
 
 
 async def is_group_blacklisted(group_identifier: str) -> bool:
-    """Vérifie si un groupe est blacklisté"""
-    existing = await db.fetchval(
-        "SELECT id FROM blacklisted_groups WHERE group_identifier = $1",
-        group_identifier
-    )
-    return existing is not None
+    """Vérifie si un groupe est blacklisté (clé canonique, motifs compris)"""
+    matcher = await blacklist_cache.get()
+    return matcher.matches(canonical_group_key(group_identifier))
 
 
 async def get_blacklisted_groups() -> List[dict]:
     """Récupère tous les groupes blacklistés"""
-    groups = await db.fetch("SELECT * FROM blacklisted_groups ORDER BY created_at DESC")
+    groups = await db.fetch(GET_BLACKLISTED_GROUPS)
     return [dict(g) for g in groups]
 
 
+get_blacklist = get_blacklisted_groups
+
+
 # ============================================
 # STATISTIQUES
 # ============================================
 
-async def get_daily_stats() -> dict:
-    """Récupère les statistiques du jour"""
-    stats = await db.fetchrow("""
+# Jour courant de stats_daily (clé primaire) + compteurs en direct
+GET_DAILY_STATS = query("get_daily_stats", """
+    WITH today AS (
         SELECT
-            (SELECT COUNT(*) FROM users WHERE created_at >= CURRENT_DATE) as new_users_today,
-            (SELECT COUNT(*) FROM shares WHERE created_at >= CURRENT_DATE) as shares_today,
-            (SELECT COUNT(*) FROM shares WHERE status = 'pending') as pending_shares,
-            (SELECT COUNT(*) FROM shares WHERE status = 'approved' AND validated_at >= CURRENT_DATE) as approved_today,
-            (SELECT COUNT(*) FROM withdrawals WHERE status = 'pending') as pending_withdrawals,
-            (SELECT COALESCE(SUM(amount), 0) FROM withdrawals WHERE status = 'pending') as pending_amount,
-            (SELECT COALESCE(SUM(amount), 0) FROM withdrawals WHERE status = 'completed' AND processed_at >= CURRENT_DATE) as paid_today,
-            (SELECT COUNT(*) FROM users) as total_users
-    """)
+            COALESCE(SUM(count) FILTER (WHERE kind = 'users' AND status = 'created'), 0) AS new_users_today,
+            COALESCE(SUM(count) FILTER (WHERE kind = 'shares' AND status = 'submitted'), 0) AS shares_today,
+            COALESCE(SUM(count) FILTER (WHERE kind = 'shares' AND status = 'approved'), 0) AS approved_today,
+            COALESCE(SUM(amount) FILTER (WHERE kind = 'withdrawals' AND status = 'completed'), 0)::bigint AS paid_today
+        FROM stats_daily
+        WHERE day = CURRENT_DATE
+    ),
+    live AS (
+        SELECT
+            COALESCE(MAX(value) FILTER (WHERE name = 'pending_shares'), 0) AS pending_shares,
+            COALESCE(MAX(value) FILTER (WHERE name = 'pending_withdrawals'), 0) AS pending_withdrawals,
+            COALESCE(MAX(value) FILTER (WHERE name = 'pending_withdrawal_amount'), 0) AS pending_amount,
+            COALESCE(MAX(value) FILTER (WHERE name = 'total_users'), 0) AS total_users
+        FROM stats_counters
+    )
+    SELECT today.*, live.* FROM today, live
+""")
+
+
+async def get_daily_stats() -> dict:
+    """Récupère les statistiques du jour (rollup maintenu à l'écriture)"""
+    stats = await db.fetchrow(GET_DAILY_STATS, replica=True)
     return dict(stats)
 
 
+GET_STATS_HISTORY = query("get_stats_history", """
+    SELECT
+        day,
+        COALESCE(SUM(count) FILTER (WHERE kind = 'users' AND status = 'created'), 0) AS new_users,
+        COALESCE(SUM(count) FILTER (WHERE kind = 'shares' AND status = 'submitted'), 0) AS shares,
+        COALESCE(SUM(count) FILTER (WHERE kind = 'shares' AND status = 'approved'), 0) AS approved,
+        COALESCE(SUM(amount) FILTER (WHERE kind = 'withdrawals' AND status = 'completed'), 0)::bigint AS paid
+    FROM stats_daily
+    WHERE day > CURRENT_DATE - $1::int
+    GROUP BY day
+    ORDER BY day DESC
+""")
+
+
+async def get_stats_history(days: int = 7) -> List[dict]:
+    """Tendance des derniers jours (un jour par ligne, le plus récent d'abord)"""
+    rows = await db.fetch(GET_STATS_HISTORY, days, replica=True)
+    return [dict(r) for r in rows]
+
+
+RECONCILE_STATS_COUNTERS = query("reconcile_stats_counters", """
+    WITH actual (name, value) AS (
+        SELECT 'total_users', COUNT(*) FROM users
+        UNION ALL
+        SELECT 'pending_shares', COUNT(*) FROM shares WHERE status = 'pending'
+        UNION ALL
+        SELECT 'pending_withdrawals', COUNT(*) FROM withdrawals WHERE status = 'pending'
+        UNION ALL
+        SELECT 'pending_withdrawal_amount', COALESCE(SUM(amount), 0)
+        FROM withdrawals WHERE status = 'pending'
+    )
+    INSERT INTO stats_counters (name, value)
+    SELECT name, value FROM actual
+    ON CONFLICT (name) DO UPDATE SET value = EXCLUDED.value
+    WHERE stats_counters.value <> EXCLUDED.value
+""")
+
+
+async def reconcile_stats_counters() -> int:
+    """Recalcule les compteurs en direct (écarts laissés par une écriture hors requêtes)"""
+    status = await db.execute(RECONCILE_STATS_COUNTERS)
+    return int(status.split()[-1])
+
+
+# Montant réellement crédité aujourd'hui (amount des approbations). Les lignes
+# écrites avant que amount ne soit renseigné comptent au moins count * récompense.
+GET_BUDGET_USED_TODAY = query("get_budget_used_today", """
+    SELECT COALESCE(SUM(GREATEST(amount, count * $1::bigint)), 0) FROM stats_daily
+    WHERE day = CURRENT_DATE AND kind = 'shares' AND status = 'approved'
+""")
+
+
 async def get_budget_used_today() -> int:
-    """Calcule le budget utilisé aujourd'hui"""
-    approved = await db.fetchval("""
-        SELECT COUNT(*) FROM shares 
-        WHERE status = 'approved' AND validated_at >= CURRENT_DATE
-    """)
-    return (approved or 0) * REWARD_PER_SHARE
+    """
+    Calcule le budget utilisé aujourd'hui (récompenses et bonus crédités).
+    Un partage rejeté après approbation reste compté: son crédit n'est pas repris.
+    """
+    used = await db.fetchval(GET_BUDGET_USED_TODAY, REWARD_PER_SHARE)
+    return int(used or 0)
 
 
 # ============================================
 # VIDÉOS D'AIDE
 # ============================================
 
+GET_ACTIVE_HELP_VIDEOS = query("get_active_help_videos", """
+    SELECT * FROM help_videos
+    WHERE is_active = TRUE
+    ORDER BY display_order ASC, created_at DESC
+""")
+GET_ALL_HELP_VIDEOS = query("get_all_help_videos", """
+    SELECT * FROM help_videos
+    ORDER BY display_order ASC, created_at DESC
+""")
+GET_HELP_VIDEO_BY_ID = query("get_help_video_by_id", "SELECT * FROM help_videos WHERE id = $1")
+DELETE_HELP_VIDEO = query("delete_help_video", "DELETE FROM help_videos WHERE id = $1")
+
+
 async def get_help_videos(active_only: bool = True) -> List[dict]:
     """Récupère les vidéos d'aide"""
     if active_only:
-        videos = await db.fetch("""
-            SELECT * FROM help_videos 
-            WHERE is_active = TRUE 
-            ORDER BY display_order ASC, created_at DESC
-        """)
+        videos = await db.fetch(GET_ACTIVE_HELP_VIDEOS)
     else:
-        videos = await db.fetch("""
-            SELECT * FROM help_videos 
-            ORDER BY display_order ASC, created_at DESC
-        """)
+        videos = await db.fetch(GET_ALL_HELP_VIDEOS)
     return [dict(v) for v in videos]
 
 
 async def get_help_video_by_id(video_id: int) -> Optional[dict]:
     """Récupère une vidéo d'aide par son ID"""
-    video = await db.fetchrow("SELECT * FROM help_videos WHERE id = $1", video_id)
+    video = await db.fetchrow(GET_HELP_VIDEO_BY_ID, video_id)
     return dict(video) if video else None
 
 
+CREATE_HELP_VIDEO = query("create_help_video", """
+    INSERT INTO help_videos (
+        title, description, video_url, video_file_id,
+        cloud_url, cloud_public_id, thumbnail_url, duration, display_order
+    )
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+    RETURNING *
+""")
+
+
 async def create_help_video(
     title: str,
     description: str = None,
@@ -636,21 +1505,16 @@ async def create_help_video(
     display_order: int = 0
 ) -> dict:
     """Crée une nouvelle vidéo d'aide"""
-    video = await db.fetchrow("""
-        INSERT INTO help_videos (
-            title, description, video_url, video_file_id, 
-            cloud_url, cloud_public_id, thumbnail_url, duration, display_order
-        )
-        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-        RETURNING *
-    """, title, description, video_url, video_file_id, 
-        cloud_url, cloud_public_id, thumbnail_url, duration, display_order)
+    video = await db.fetchrow(
+        CREATE_HELP_VIDEO, title, description, video_url, video_file_id,
+        cloud_url, cloud_public_id, thumbnail_url, duration, display_order
+    )
     return dict(video)
 
 
 async def update_help_video(video_id: int, **kwargs) -> Optional[dict]:
     """Met à jour une vidéo d'aide"""
-    # Construire la requête dynamiquement
+    # Construire la requête dynamiquement (hors catalogue: texte variable)
     updates = []
     values = []
     i = 1
@@ -671,44 +1535,83 @@ async def update_help_video(video_id: int, **kwargs) -> Optional[dict]:
         return await get_help_video_by_id(video_id)
     
     values.append(video_id)
-    query = f"UPDATE help_videos SET {', '.join(updates)} WHERE id = ${i} RETURNING *"
+    sql = f"UPDATE help_videos SET {', '.join(updates)} WHERE id = ${i} RETURNING *"
     
-    video = await db.fetchrow(query, *values)
+    video = await db.fetchrow(sql, *values)
     return dict(video) if video else None
 
 
 async def delete_help_video(video_id: int) -> bool:
     """Supprime une vidéo d'aide"""
-    result = await db.execute("DELETE FROM help_videos WHERE id = $1", video_id)
+    result = await db.execute(DELETE_HELP_VIDEO, video_id)
     return "DELETE 1" in result
 
 
+TOGGLE_HELP_VIDEO = query("toggle_help_video", """
+    UPDATE help_videos
+    SET is_active = NOT is_active
+    WHERE id = $1
+    RETURNING *
+""")
+
+
 async def toggle_help_video(video_id: int) -> Optional[dict]:
     """Active/désactive une vidéo d'aide"""
-    video = await db.fetchrow("""
-        UPDATE help_videos 
-        SET is_active = NOT is_active 
-        WHERE id = $1 
-        RETURNING *
-    """, video_id)
+    video = await db.fetchrow(TOGGLE_HELP_VIDEO, video_id)
     return dict(video) if video else None
 
 
+INCREMENT_HELP_VIDEO_VIEWS = query("increment_help_video_views", """
+    UPDATE help_videos
+    SET views_count = views_count + 1
+    WHERE id = $1
+""")
+
+
 async def increment_help_video_views(video_id: int):
     """Incrémente le compteur de vues"""
-    await db.execute("""
-        UPDATE help_videos 
-        SET views_count = views_count + 1 
-        WHERE id = $1
-    """, video_id)
+    await db.execute(INCREMENT_HELP_VIDEO_VIEWS, video_id)
+
+
+REORDER_HELP_VIDEO = query("reorder_help_video", """
+    UPDATE help_videos
+    SET display_order = $1
+    WHERE id = $2
+    RETURNING *
+""")
 
 
 async def reorder_help_video(video_id: int, new_order: int) -> Optional[dict]:
     """Change l'ordre d'affichage d'une vidéo"""
-    video = await db.fetchrow("""
-        UPDATE help_videos 
-        SET display_order = $1 
-        WHERE id = $2 
-        RETURNING *
-    """, new_order, video_id)
-    return dict(video) if video else None
\ No newline at end of file
+    video = await db.fetchrow(REORDER_HELP_VIDEO, new_order, video_id)
+    return dict(video) if video else None
+
+# ============================================
+# FICHIERS TELEGRAM (file_id par bot)
+# ============================================
+
+# Une requête nommée par table de médias
+SAVE_TELEGRAM_FILE_ID = {}
+FORGET_TELEGRAM_FILE_ID = {}
+for _table in ("videos", "help_videos", "shares"):
+    SAVE_TELEGRAM_FILE_ID[_table] = query(f"save_{_table}_file_id", f"""
+        UPDATE {_table}
+        SET telegram_file_ids = telegram_file_ids || jsonb_build_object($2::text, $3::text)
+        WHERE id = $1
+    """)
+    FORGET_TELEGRAM_FILE_ID[_table] = query(f"forget_{_table}_file_id", f"""
+        UPDATE {_table}
+        SET telegram_file_ids = telegram_file_ids - $2::text
+        WHERE id = $1
+    """)
+
+
+async def save_telegram_file_id(table: str, row_id: int, bot_key: str, file_id: Optional[str]):
+    """Enregistre (ou efface si None) le file_id d'un média pour un bot"""
+    if file_id is None:
+        await db.execute(FORGET_TELEGRAM_FILE_ID[table], row_id, bot_key)
+    else:
+        await db.execute(SAVE_TELEGRAM_FILE_ID[table], row_id, bot_key, file_id)
+    
+    if table == "videos":
+        await invalidate("active_video")
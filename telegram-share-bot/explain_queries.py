@@ -0,0 +1,278 @@
+"""
+Vérification des plans d'exécution des requêtes chaudes
+Crée un schéma jetable sur une base PostgreSQL LOCALE, applique les migrations,
+insère un jeu de données synthétique puis lance EXPLAIN sur chaque requête du catalogue.
+Échoue (code 1) si une grande table est lue en Seq Scan.
+
+Usage: EXPLAIN_DATABASE_URL=postgresql://localhost/sharebot_test python explain_queries.py
+"""
+import asyncio
+import json
+import os
+import sys
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import List
+
+import asyncpg
+from dotenv import load_dotenv
+
+load_dotenv()
+
+EXPLAIN_DATABASE_URL = os.getenv("EXPLAIN_DATABASE_URL", "")
+SCHEMA = "explain_check"
+
+# Tables dont un Seq Scan est une régression (les petites tables sont ignorées)
+LARGE_TABLES = {"users", "shares", "withdrawals", "blacklisted_groups", "user_stats"}
+
+# Volume du jeu de données synthétique
+USERS = 100_000
+SHARES = 300_000
+WITHDRAWALS = 50_000
+BLACKLISTED = 5_000
+
+SEED_SQL = f"""
+    INSERT INTO users (telegram_id, username, first_name, balance, total_earned,
+                       referral_code, referred_by, created_at)
+    SELECT 1000000 + g, 'user' || g, 'User ' || g, g % 5000, g % 9000,
+           'REF' || g, NULLIF(g / 10, 0), NOW() - (g || ' minutes')::interval
+    FROM generate_series(1, {USERS}) g;
+
+    INSERT INTO videos (title, caption, url, expires_at, is_active, created_at)
+    SELECT 'Vidéo ' || g, 'Caption ' || g, 'https://example.com/' || g,
+           NOW() + INTERVAL '1 day', g = 1000, NOW() - (g || ' hours')::interval
+    FROM generate_series(1, 1000) g;
+
+    INSERT INTO shares (user_id, video_id, platform, proof_image_file_id, proof_image_hash,
+                        group_name, group_link, group_key, status, validated_at, created_at)
+    SELECT 1 + (g::bigint * 7919) % {USERS}, 1 + g % 1000,
+           CASE WHEN g % 2 = 0 THEN 'telegram' ELSE 'whatsapp' END,
+           'file_' || g, md5(g::text) || md5((g + 1)::text),
+           'Groupe ' || (g % 20000), 'https://t.me/groupe' || (g % 20000),
+           CASE WHEN g % 2 = 0 THEN 'telegram' ELSE 'whatsapp' END || ':groupe' || (g % 20000),
+           CASE WHEN g % 50 = 0 THEN 'pending' WHEN g % 7 = 0 THEN 'rejected' ELSE 'approved' END,
+           CASE WHEN g % 50 = 0 THEN NULL ELSE NOW() - (g || ' minutes')::interval END,
+           NOW() - (g || ' minutes')::interval
+    FROM generate_series(1, {SHARES}) g;
+
+    INSERT INTO withdrawals (user_id, amount, payment_method, payment_details, status, created_at)
+    SELECT 1 + (g::bigint * 104729) % {USERS}, 500 + g % 5000, 'orange_money', '690000000',
+           CASE WHEN g % 40 = 0 THEN 'pending' ELSE 'completed' END,
+           NOW() - (g || ' minutes')::interval
+    FROM generate_series(1, {WITHDRAWALS}) g;
+
+    INSERT INTO blacklisted_groups (group_identifier, reason, group_key)
+    SELECT 'https://t.me/spam' || g, 'test', 't.me/spam' || g
+    FROM generate_series(1, {BLACKLISTED}) g;
+
+    INSERT INTO user_stats (user_id, approved_count)
+    SELECT id, id % 30 FROM users
+    ON CONFLICT (user_id) DO NOTHING;
+
+    ANALYZE;
+"""
+
+NOW = datetime.now()
+AGO = NOW - timedelta(days=3)
+
+# Paramètres d'exemple de chaque requête du catalogue, par nom.
+# Une requête du catalogue absente d'ici fait échouer la vérification.
+SAMPLE_PARAMS = {
+    # Utilisateurs
+    "referral_code_exists": ["REF42"],
+    "insert_user": [5000001, "nouveau", "Nouveau", "REFNEW", 42],
+    "credit_user": [100, 42],
+    "debit_user": [100, 42],
+    "get_user_by_telegram_id": [1000042],
+    "get_user_by_id": [42],
+    "update_user_phone": ["690000000", 1000042],
+    "update_user_last_active": [1000042],
+    "get_user_referrals": [42],
+    "find_user_by_username": ["user42"],
+    "search_user_by_name": ["%user42%"],
+    "block_user": [True, 1000042],
+    "block_user_by_id": [True, 42],
+    "users_page_first": [10],
+    "users_page_after": [AGO, 5000, 10],
+    "users_page_before": [AGO, 5000, 10],
+    "active_user_ids_chunk": [50000, 500],
+    "users_export": [],
+    "users_count": [],
+    # Vidéos
+    "videos_page_first": [10],
+    "videos_page_after": [AGO, 500, 10],
+    "videos_page_before": [AGO, 500, 10],
+    "deactivate_active_videos": [],
+    "insert_video": ["Vidéo", "Caption", "https://example.com/v", "v1", "https://example.com/v",
+                     NOW + timedelta(days=1), 1_000_000, 60, 720, 1280],
+    "get_active_video": [],
+    "get_video_by_id": [42],
+    "deactivate_video": [42],
+    "videos_count": [],
+    "delete_video": [42],
+    "toggle_video_active": [42],
+    "extend_video_validity": [42, 24],
+    # Témoignages
+    "get_active_testimonials": [],
+    "insert_default_testimonials": [["Merci !", "Super vidéo"]],
+    "create_testimonial": ["Merci !"],
+    "increment_testimonial_usage": [1],
+    "deactivate_testimonial": [1],
+    # Partages
+    "create_share": [42, 1, "telegram", "file_new", "0" * 64, "Groupe", "https://t.me/groupe42",
+                     None, None, None, None, None, None, "telegram:groupe42"],
+    "get_share_by_id": [4200],
+    "get_pending_shares": [50],
+    "get_pending_shares_by_risk": [50],
+    "count_pending_shares": [],
+    "get_scoring_features": [0, 5000],
+    "save_share_scores": [[50, 100], [80, 30], [0, 2]],
+    "approve_shares": [[42, 4200], 1, 100, 50],
+    "get_auto_approve_candidates": [80, 50],
+    "try_advisory_xact_lock": [1],
+    "reject_share": ["rejected", 1, "Preuve invalide", 4200],
+    "get_user_stats": [42],
+    "get_user_shares_history": [42, 20],
+    "proof_dhashes": [],
+    "get_recent_share_times": [30],
+    "db_timezone": [],
+    "get_fraud_signals": [42, "0" * 64, "telegram:groupe42", NOW - timedelta(days=7)],
+    # Retraits
+    "get_withdrawal_by_id": [420],
+    "insert_withdrawal": [42, 500, "orange_money", "690000000"],
+    "get_pending_withdrawals": [50],
+    "complete_withdrawal": ["completed", 1, 420],
+    "reject_withdrawal": ["rejected", 1, "Numéro invalide", 420],
+    "get_user_withdrawals": [42, 20],
+    # Liste noire
+    "blacklist_group": ["https://t.me/spam1", "test", "telegram", "t.me/spam1"],
+    "get_blacklist_entries": [],
+    "get_blacklisted_groups": [],
+    "remove_from_blacklist": [42],
+    "clear_blacklist": [],
+    # Statistiques
+    "get_daily_stats": [],
+    "get_stats_history": [30],
+    "reconcile_stats_counters": [],
+    "get_budget_used_today": [100],
+    # Vidéos d'aide
+    "get_active_help_videos": [],
+    "get_all_help_videos": [],
+    "get_help_video_by_id": [1],
+    "delete_help_video": [1],
+    "create_help_video": ["Aide", "Description", "https://example.com/h", "file_h",
+                          "https://example.com/h", "h1", "https://example.com/t", 60, 1],
+    "toggle_help_video": [1],
+    "increment_help_video_views": [1],
+    "reorder_help_video": [2, 1],
+    # file_id Telegram des médias
+    "save_videos_file_id": [42, "123", "file_v"],
+    "forget_videos_file_id": [42, "123"],
+    "save_help_videos_file_id": [1, "123", "file_h"],
+    "forget_help_videos_file_id": [1, "123"],
+    "save_shares_file_id": [4200, "123", "file_s"],
+    "forget_shares_file_id": [4200, "123"],
+    # Bus d'événements
+    "notify_event": ["app_events", "{}"],
+}
+
+# Lectures complètes voulues (chargements au démarrage, export, réconciliation)
+ALLOWED_SEQ_SCANS = {
+    "proof_dhashes": ("shares",),  # index des empreintes reconstruit au démarrage
+    "get_blacklist_entries": ("blacklisted_groups",),  # liste noire compilée en mémoire
+    "get_blacklisted_groups": ("blacklisted_groups",),  # écran admin (liste complète)
+    "clear_blacklist": ("blacklisted_groups",),
+    "users_count": ("users",),
+    "find_user_by_username": ("users",),  # recherche admin (ILIKE, sans index)
+    "search_user_by_name": ("users",),
+    "reconcile_stats_counters": ("users",),  # réconciliation périodique des compteurs
+}
+
+
+class _SingleConnection:
+    """Adaptateur minimal pour run_migrations sur une connexion unique"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def fetchval(self, query, *args):
+        return await self.conn.fetchval(query, *args)
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
+def _seq_scans(plan: dict):
+    """Liste les tables lues en Seq Scan dans un plan (récursif)"""
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan.get("Relation Name"))
+    for child in plan.get("Plans", []):
+        found.extend(_seq_scans(child))
+    return found
+
+
+async def check_plans(url: str) -> List[str]:
+    """
+    Applique les migrations dans un schéma jetable, insère le jeu de données
+    puis lance EXPLAIN sur chaque requête du catalogue.
+    Retourne la liste des échecs (vide si tout passe).
+    """
+    from database.catalog import catalog
+    from database.migrations import run_migrations
+    import database.queries  # noqa: F401 (enregistre les requêtes du catalogue)
+
+    failures = []
+    conn = await asyncpg.connect(url)
+    try:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.execute(f"CREATE SCHEMA {SCHEMA}")
+        await conn.execute(f"SET search_path TO {SCHEMA}")
+
+        print("🔧 Migrations...")
+        await run_migrations(_SingleConnection(conn))
+
+        print("🌱 Jeu de données synthétique...")
+        await conn.execute(SEED_SQL)
+
+        print("🔍 EXPLAIN des requêtes\n" + "=" * 50)
+        for name, entry in sorted(catalog.queries.items()):
+            if name not in SAMPLE_PARAMS:
+                failures.append(f"{name}: paramètres d'exemple manquants (SAMPLE_PARAMS)")
+                print(f"❌ {failures[-1]}")
+                continue
+            raw = await conn.fetchval(f"EXPLAIN (FORMAT JSON) {entry.sql}", *SAMPLE_PARAMS[name])
+            plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+            allowed = ALLOWED_SEQ_SCANS.get(name, ())
+            bad = sorted({t for t in _seq_scans(plan) if t in LARGE_TABLES and t not in allowed})
+            if bad:
+                failures.append(f"{name}: Seq Scan sur {', '.join(bad)}")
+                print(f"❌ {failures[-1]}")
+            else:
+                print(f"✅ {name}")
+    finally:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.close()
+    return failures
+
+
+async def main():
+    if not EXPLAIN_DATABASE_URL:
+        print("❌ EXPLAIN_DATABASE_URL non défini (base PostgreSQL locale de test)")
+        sys.exit(2)
+    if EXPLAIN_DATABASE_URL == os.getenv("DATABASE_URL"):
+        print("❌ EXPLAIN_DATABASE_URL ne doit pas pointer vers la base de production")
+        sys.exit(2)
+
+    failures = await check_plans(EXPLAIN_DATABASE_URL)
+
+    print("=" * 50)
+    if failures:
+        print(f"❌ {len(failures)} requête(s) en échec")
+        sys.exit(1)
+    print("✅ Aucun Seq Scan sur les grandes tables")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -13,6 +13,13 @@ from config.settings import BOT_USER_TOKEN, BOT_ADMIN_TOKEN, validate_config
 validate_config()
 
 from database.connection import init_database, insert_default_testimonials, db
+from database.queries import (
+    load_blacklist, load_proof_index, load_share_limiter, reconcile_stats_counters
+)
+from services.image_pool import image_pool
+from services.auto_approver import auto_approver
+from services.scoring import risk_scorer
+from utils.metrics import registry
 
 # Imports bot utilisateur
 from bot_user.handlers import (
@@ -59,10 +66,8 @@ async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Gère les erreurs"""
     logger.error(f"Exception: {context.error}")
     
-    try:
-        await db.ensure_connection()
-    except:
-        pass
+    # Vérification DB hors du chemin des requêtes
+    db.supervisor.wake()
     
     if update and update.effective_message:
         try:
@@ -191,49 +196,40 @@ async def run_admin_bot():
     return application
 
 
-# ============ KEEPALIVE DB ============
-
-async def keepalive_db():
-    """Garde la connexion DB active"""
-    while True:
-        try:
-            await asyncio.sleep(300)  # 5 minutes
-            await db.fetchval("SELECT 1")
-            logger.info("💓 DB keepalive OK")
-        except Exception as e:
-            logger.error(f"❌ DB keepalive error: {e}")
-            try:
-                await db.ensure_connection()
-            except:
-                pass
-
-
 # ============ HEALTH CHECK SERVER ============
 
 from aiohttp import web
 
 async def health_check(request):
     """Endpoint de santé pour UptimeRobot et Render"""
-    try:
-        # Vérifier la connexion DB
-        await db.fetchval("SELECT 1")
-        db_status = "✅ Connected"
-    except:
+    # État fourni par le superviseur du pool (pas de requête ici)
+    pool_status = db.supervisor.status()
+    if pool_status["breaker"] == "open":
         db_status = "❌ Disconnected"
+    else:
+        db_status = "✅ Connected"
     
     return web.json_response({
         "status": "running",
         "database": db_status,
+        "pool": pool_status,
         "bots": {
             "user": "active",
             "admin": "active"
         }
     })
 
+async def metrics(request):
+    """Métriques au format Prometheus (latences DB, pool, erreurs)"""
+    return web.Response(
+        body=registry.render().encode("utf-8"),
+        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+    )
+
 async def home(request):
     """Page d'accueil simple"""
     return web.Response(
-        text="🤖 Telegram Share Bot is running!\n\nEndpoints:\n- /health - Status check",
+        text="🤖 Telegram Share Bot is running!\n\nEndpoints:\n- /health - Status check\n- /metrics - Prometheus metrics",
         content_type="text/plain"
     )
 
@@ -242,6 +238,7 @@ async def start_health_server():
     app = web.Application()
     app.router.add_get("/", home)
     app.router.add_get("/health", health_check)
+    app.router.add_get("/metrics", metrics)
     
     # Port depuis variable d'environnement (Render définit PORT automatiquement)
     port = int(os.environ.get("PORT", 10000))
@@ -252,7 +249,7 @@ async def start_health_server():
     await site.start()
     
     logger.info(f"🌐 Health server running on port {port}")
-    logger.info(f"📍 Endpoints: / and /health")
+    logger.info(f"📍 Endpoints: /, /health and /metrics")
     return runner
 
 
@@ -263,6 +260,14 @@ async def main():
     # Initialiser la base de données
     await init_database()
     await insert_default_testimonials()
+    logger.info(f"✅ Liste noire chargée ({await load_blacklist()} entrées)")
+    logger.info(f"✅ Index des empreintes chargé ({await load_proof_index()} preuves)")
+    logger.info(f"✅ Limites de soumission chargées ({await load_share_limiter()} partages récents)")
+    logger.info(f"✅ Compteurs de statistiques recalés ({await reconcile_stats_counters()} corrigés)")
+    
+    # Score de risque périodique de la file d'attente admin
+    risk_scorer.start()
+    auto_approver.start()
     
     # Démarrer le serveur HTTP (pour Render + UptimeRobot)
     health_runner = await start_health_server()
@@ -271,9 +276,6 @@ async def main():
     user_app = await run_user_bot()
     admin_app = await run_admin_bot()
     
-    # Lancer le keepalive DB
-    asyncio.create_task(keepalive_db())
-    
     logger.info("✅ Les deux bots sont en cours d'exécution")
     logger.info("📌 Gestion vidéos via bot ADMIN: Menu → 📹 Vidéos")
     logger.info("🔗 Configurez UptimeRobot sur: https://votre-app.onrender.com/health")
@@ -295,7 +297,10 @@ async def main():
         await admin_app.stop()
         await admin_app.shutdown()
         
+        await auto_approver.stop()
+        await risk_scorer.stop()
         await db.disconnect()
+        image_pool.shutdown()
 
 
 if __name__ == "__main__":
@@ -1,6 +1,10 @@
-from .fraud_detector import validate_proof_image, validate_group_link, FraudDetector, ValidationResult
+from .fraud_detector import (
+    validate_proof_image, validate_share_group, validate_group_link, FraudDetector, ValidationResult
+)
 from .notifications import (
     notify_user, notify_share_approved, notify_share_rejected,
     notify_withdrawal_completed, notify_withdrawal_rejected,
     notify_new_video, broadcast_message, notify_referral_bonus
 )
+from .media import send_media
+from .scoring import risk_scorer, score_features, risk_flag_labels
@@ -0,0 +1,177 @@
+"""
+Auto-approbation en tâche de fond des preuves à faible risque
+(score de services.scoring), dans la limite du budget journalier
+"""
+import asyncio
+import logging
+import time
+from typing import List
+
+from config.settings import (
+    AUTO_APPROVE, AUTO_APPROVE_MIN_SCORE, AUTO_APPROVE_INTERVAL, AUTO_APPROVE_BATCH_SIZE,
+    DAILY_BUDGET_LIMIT, REWARD_PER_SHARE, REFERRAL_BONUS
+)
+from database.connection import db
+from database.queries import (
+    approve_shares,
+    get_auto_approve_candidates,
+    get_budget_used_today,
+    try_advisory_xact_lock
+)
+from services.notifications import notify_share_approved, notify_referral_bonus
+from services.scoring import risk_scorer
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Un seul passage à la fois, tous processus confondus (pg_try_advisory_xact_lock)
+ADVISORY_LOCK_KEY = 0x5348415245  # "SHARE"
+
+# validated_by des partages approuvés sans admin
+AUTO_APPROVER_ID = 0
+
+# Délai entre deux notifications (limites de débit Telegram)
+NOTIFY_DELAY = 0.05
+
+
+class AutoApprover:
+    """Passages périodiques: scoring, sélection des preuves sûres, approbation par lots"""
+
+    def __init__(
+        self,
+        mode: str = AUTO_APPROVE,
+        min_score: int = AUTO_APPROVE_MIN_SCORE,
+        interval: float = AUTO_APPROVE_INTERVAL,
+        batch_size: int = AUTO_APPROVE_BATCH_SIZE
+    ):
+        self.mode = mode
+        self.min_score = min_score
+        self.interval = interval
+        self.batch_size = batch_size
+        self.approved_total = 0
+        self.last_run = None
+        self._task = None
+        self._lock = asyncio.Lock()
+        self._notifications = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode in ("on", "dry_run")
+
+    async def run(self, dry_run: bool = None) -> dict:
+        """
+        Un passage complet. dry_run (par défaut: mode "dry_run") n'approuve rien
+        et retourne les preuves qui le seraient.
+        """
+        if dry_run is None:
+            dry_run = self.mode != "on"
+
+        summary = {
+            "dry_run": dry_run, "approved": 0, "candidates": [],
+            "budget_left": 0, "budget_reached": False, "locked": False
+        }
+
+        # Scores à jour avant de décider
+        await risk_scorer.run()
+
+        async with self._lock:
+            while True:
+                async with db.unit_of_work(transaction=True):
+                    if not await try_advisory_xact_lock(ADVISORY_LOCK_KEY):
+                        summary["locked"] = True  # passage en cours dans un autre processus
+                        break
+
+                    # Pire cas par preuve: récompense + bonus de parrainage. Le budget
+                    # est relu à chaque lot sur les montants réellement crédités.
+                    budget_left = max(DAILY_BUDGET_LIMIT - await get_budget_used_today(), 0)
+                    limit = min(self.batch_size, budget_left // (REWARD_PER_SHARE + REFERRAL_BONUS))
+                    summary["budget_left"] = budget_left
+                    summary["budget_reached"] = limit < self.batch_size
+                    candidates = (
+                        await get_auto_approve_candidates(self.min_score, limit) if limit > 0 else []
+                    )
+
+                    if dry_run:
+                        summary["candidates"] = candidates
+                        break
+
+                    results = await approve_shares([c['id'] for c in candidates], AUTO_APPROVER_ID)
+
+                # Après COMMIT: les crédits sont acquis
+                summary["approved"] += len(results)
+                summary["candidates"].extend(candidates)
+                self._queue_notifications(results)
+                if len(candidates) < limit or limit < self.batch_size or not results:
+                    break
+
+        self.approved_total += summary["approved"]
+        self.last_run = time.time()
+        return summary
+
+    def _queue_notifications(self, results: List[dict]):
+        """Notifications envoyées en arrière-plan, sans bloquer le passage suivant"""
+        if not results:
+            return
+        task = asyncio.create_task(self._notify(results))
+        self._notifications.add(task)
+        task.add_done_callback(self._notifications.discard)
+
+    async def _notify(self, results: List[dict]):
+        for result in results:
+            try:
+                await notify_share_approved(result['telegram_id'], REWARD_PER_SHARE, result['new_balance'])
+                if result.get('referral_bonus_given') and result.get('referrer_telegram_id'):
+                    await notify_referral_bonus(
+                        result['referrer_telegram_id'],
+                        REFERRAL_BONUS,
+                        result.get('first_name') or result.get('username') or 'Un utilisateur'
+                    )
+            except Exception as e:
+                logger.error(f"❌ Notification d'auto-approbation en échec: {e}")
+            await asyncio.sleep(NOTIFY_DELAY)
+
+    def start(self):
+        """Démarre les passages périodiques si l'auto-approbation est activée (idempotent)"""
+        if not self.enabled:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+            logger.info(f"🤖 Auto-approbation activée ({self.mode}, score >= {self.min_score})")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Laisser partir les notifications déjà en file
+        if self._notifications:
+            await asyncio.gather(*self._notifications, return_exceptions=True)
+
+    async def _loop(self):
+        while True:
+            try:
+                summary = await self.run()
+                if summary["dry_run"] and summary["candidates"]:
+                    ids = ", ".join(f"#{c['id']}" for c in summary["candidates"])
+                    logger.info(f"🧪 Auto-approbation (simulation): {len(summary['candidates'])} preuves seraient approuvées: {ids}")
+                elif summary["approved"]:
+                    logger.info(f"🤖 {summary['approved']} preuves auto-approuvées")
+                if summary["budget_reached"]:
+                    logger.info("💵 Budget journalier atteint, auto-approbation limitée")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Auto-approbation en échec: {e}")
+            await asyncio.sleep(self.interval)
+
+
+# Auto-approbateur global du processus
+auto_approver = AutoApprover()
+
+registry.gauge(
+    "auto_approved_shares", "Preuves auto-approuvées depuis le démarrage",
+    lambda: [({}, auto_approver.approved_total)]
+)
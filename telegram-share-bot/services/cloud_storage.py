@@ -7,6 +7,7 @@ import tempfile
 import os
 import asyncio
 from functools import partial
+from io import BytesIO
 
 from config.settings import (
     CLOUDINARY_CLOUD_NAME,
@@ -37,8 +38,8 @@ async def download_telegram_file(bot, file_id: str, extension: str = "mp4") -> s
     return local_path
 
 
-def _upload_sync(local_path: str, resource_type: str = "video", title: str = None) -> dict:
-    """Upload synchrone vers Cloudinary"""
+def _upload_sync(local_path, resource_type: str = "video", title: str = None) -> dict:
+    """Upload synchrone vers Cloudinary (chemin local ou objet fichier en mémoire)"""
     try:
         import time
         public_id = f"{resource_type}_{int(time.time())}"
@@ -103,15 +104,27 @@ async def upload_video_from_telegram(bot, file_id: str, title: str = None) -> di
         return {"success": False, "error": str(e)}
 
 
+async def upload_image_bytes(image_data: bytes, title: str = None) -> dict:
+    """Upload d'une image déjà en mémoire (sans fichier temporaire)"""
+    if not CLOUDINARY_CONFIGURED:
+        return {"success": False, "error": "Cloudinary non configuré"}
+    
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None,
+        partial(_upload_sync, BytesIO(image_data), "image", title)
+    )
+
+
 async def upload_image_from_telegram(bot, file_id: str, title: str = None) -> dict:
-    """Pipeline complet : Telegram Image -> Local -> Cloudinary"""
+    """Pipeline complet : Telegram Image -> mémoire -> Cloudinary"""
     if not CLOUDINARY_CONFIGURED:
         return {"success": False, "error": "Cloudinary non configuré"}
     
     try:
-        local_path = await download_telegram_file(bot, file_id, "jpg")
-        result = await upload_to_cloudinary(local_path, "image", title)
-        return result
+        file = await bot.get_file(file_id)
+        image_data = await file.download_as_bytearray()
+        return await upload_image_bytes(image_data, title)
     except Exception as e:
         return {"success": False, "error": str(e)}
 
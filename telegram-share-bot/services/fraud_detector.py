@@ -1,19 +1,12 @@
 """
 Service de validation d'images et détection de fraudes
 """
-import hashlib
-from io import BytesIO
 from typing import Tuple, Optional
-from PIL import Image
 
 from config.settings import MIN_IMAGE_SIZE, GROUP_REUSE_DAYS
-from database.queries import (
-    check_duplicate_proof, 
-    check_group_recently_used,
-    get_user_validation_rate,
-    get_user_shares_today,
-    is_group_blacklisted
-)
+from services.image_pool import ImagePoolBusyError, image_pool
+from utils.fingerprint import analyze_proof
+from database.queries import get_fraud_signals
 
 
 class ValidationResult:
@@ -21,6 +14,7 @@ class ValidationResult:
         self.is_valid = is_valid
         self.error = error
         self.score = score  # Score de confiance (0-100)
+        self.proof_dhash = None  # Empreinte perceptuelle de la preuve (si calculée)
 
 
 async def validate_proof_image(
@@ -34,60 +28,50 @@ async def validate_proof_image(
     
     Vérifications:
     1. Taille de l'image
-    2. Image non dupliquée
-    3. Groupe non blacklisté
-    4. Groupe non récemment utilisé par cet utilisateur
-    5. Limite journalière non atteinte
+    2. Image non dupliquée (identique ou quasi identique)
+    3. Limite journalière non atteinte
     
+    Le groupe n'est pas encore connu à cette étape: voir validate_share_group.
     Retourne: (ValidationResult, image_hash)
     """
     
     score = 100
     
-    # 1. Calculer le hash de l'image
-    image_hash = hashlib.sha256(image_data).hexdigest()
-    
-    # 2. Vérifier la taille de l'image
+    # 1-2. Hash, dimensions et empreinte, calculés dans le pool d'images
     try:
-        img = Image.open(BytesIO(image_data))
-        width, height = img.size
-        
-        if width < MIN_IMAGE_SIZE or height < MIN_IMAGE_SIZE:
-            return ValidationResult(
-                False, 
-                f"❌ Image trop petite. Minimum requis: {MIN_IMAGE_SIZE}x{MIN_IMAGE_SIZE} pixels"
-            ), image_hash
-    except Exception as e:
-        return ValidationResult(False, "❌ Fichier image invalide"), image_hash
-    
-    # 3. Vérifier si l'image est dupliquée
-    if await check_duplicate_proof(image_hash):
+        analysis = await image_pool.run(analyze_proof, image_data, MIN_IMAGE_SIZE)
+    except ImagePoolBusyError:
         return ValidationResult(
-            False, 
-            "❌ Cette capture d'écran a déjà été soumise"
-        ), image_hash
+            False,
+            "⏳ Trop de preuves en cours de traitement, réessayez dans quelques secondes"
+        ), None
     
-    # 4. Vérifier si le groupe est blacklisté
-    if await is_group_blacklisted(group_link):
+    image_hash = analysis["sha256"]
+    proof_dhash = analysis["dhash"]
+    
+    if analysis["error"] == "too_small":
         return ValidationResult(
             False, 
-            "❌ Ce groupe est sur liste noire"
+            f"❌ Image trop petite. Minimum requis: {MIN_IMAGE_SIZE}x{MIN_IMAGE_SIZE} pixels"
         ), image_hash
+    if analysis["error"]:
+        return ValidationResult(False, "❌ Fichier image invalide"), image_hash
     
-    # 5. Vérifier si le groupe a été utilisé récemment
-    if await check_group_recently_used(user_id, group_link):
+    # Tous les signaux suivants en un seul aller-retour
+    signals = await get_fraud_signals(user_id, platform, group_link, image_hash, proof_dhash)
+    
+    # 3. Vérifier si l'image est dupliquée (ou réenregistrée / recadrée)
+    if signals['duplicate_proof'] or signals['similar_proof']:
         return ValidationResult(
             False, 
-            f"❌ Vous avez déjà partagé dans ce groupe ces {GROUP_REUSE_DAYS} derniers jours"
+            "❌ Cette capture d'écran a déjà été soumise"
         ), image_hash
     
-    # 6. Vérifier la limite journalière
+    # 4. Vérifier la limite journalière
     from config.settings import MAX_TELEGRAM_SHARES_PER_DAY, MAX_WHATSAPP_SHARES_PER_DAY
     
     max_shares = MAX_TELEGRAM_SHARES_PER_DAY if platform == "telegram" else MAX_WHATSAPP_SHARES_PER_DAY
-    shares_today = await get_user_shares_today(user_id, platform)
-    
-    if shares_today >= max_shares:
+    if signals['shares_today'] >= max_shares:
         platform_name = "Telegram" if platform == "telegram" else "WhatsApp"
         return ValidationResult(
             False, 
@@ -95,7 +79,7 @@ async def validate_proof_image(
         ), image_hash
     
     # Calculer le score de confiance basé sur l'historique
-    validation_rate = await get_user_validation_rate(user_id)
+    validation_rate = signals['validation_rate']
     
     # Ajuster le score basé sur l'historique
     if validation_rate >= 90:
@@ -109,7 +93,31 @@ async def validate_proof_image(
     else:
         score = 50  # Nouvel utilisateur
     
-    return ValidationResult(True, score=score), image_hash
+    result = ValidationResult(True, score=score)
+    result.proof_dhash = proof_dhash
+    return result, image_hash
+
+
+async def validate_share_group(user_id: int, group_link: str, platform: str) -> ValidationResult:
+    """
+    Contrôles anti-fraude du groupe, une fois son lien connu
+    
+    Vérifications:
+    1. Groupe non blacklisté
+    2. Groupe non récemment utilisé par cet utilisateur
+    """
+    signals = await get_fraud_signals(user_id, platform, group_link)
+    
+    if signals['blacklisted']:
+        return ValidationResult(False, "❌ Ce groupe est sur liste noire")
+    
+    if signals['group_recently_used']:
+        return ValidationResult(
+            False,
+            f"❌ Vous avez déjà partagé dans ce groupe ces {GROUP_REUSE_DAYS} derniers jours"
+        )
+    
+    return ValidationResult(True)
 
 
 def validate_group_link(link: str, platform: str) -> ValidationResult:
@@ -166,10 +174,12 @@ async def calculate_auto_score(
     
     Retourne un score de 0 à 100
     """
+    signals = await get_fraud_signals(user_id, platform, group_link)
+    
     score = 50  # Score de base
     
     # Bonus basé sur l'historique
-    validation_rate = await get_user_validation_rate(user_id)
+    validation_rate = signals['validation_rate']
     if validation_rate >= 90:
         score += 30
     elif validation_rate >= 70:
@@ -180,11 +190,7 @@ async def calculate_auto_score(
         score -= 20
     
     # Vérifier si c'est un nouveau groupe (jamais utilisé par personne)
-    from database.connection import db
-    group_uses = await db.fetchval(
-        "SELECT COUNT(*) FROM shares WHERE group_link = $1",
-        group_link
-    )
+    group_uses = signals['group_uses']
     
     if group_uses == 0:
         score += 10  # Bonus pour nouveau groupe
@@ -214,42 +220,31 @@ class FraudDetector:
         - flags: liste des alertes
         - recommendation: "auto_approve", "manual_review", "auto_reject"
         """
+        signals = await get_fraud_signals(user_id, platform, group_link, image_hash)
+        
         flags = []
         risk_score = 0
         
         # 1. Vérifier le taux de validation de l'utilisateur
-        validation_rate = await get_user_validation_rate(user_id)
+        validation_rate = signals['validation_rate']
         if validation_rate < 30 and validation_rate > 0:
             flags.append("⚠️ Faible taux de validation historique")
             risk_score += 30
         
         # 2. Vérifier le nombre de partages aujourd'hui
-        shares_today = await get_user_shares_today(user_id, platform)
-        if shares_today >= 4:
+        if signals['shares_today'] >= 4:
             flags.append("⚠️ Beaucoup de partages aujourd'hui")
             risk_score += 10
         
         # 3. Vérifier l'utilisation du groupe globalement
-        from database.connection import db
-        
-        group_uses_24h = await db.fetchval("""
-            SELECT COUNT(*) FROM shares 
-            WHERE group_link = $1 AND created_at > NOW() - INTERVAL '24 hours'
-        """, group_link)
-        
-        if group_uses_24h > 10:
+        if signals['group_uses_24h'] > 10:
             flags.append("⚠️ Groupe très utilisé ces dernières 24h")
             risk_score += 20
         
         # 4. Vérifier si l'utilisateur est nouveau
-        user = await db.fetchrow(
-            "SELECT created_at FROM users WHERE id = $1", user_id
-        )
-        if user:
-            from datetime import datetime, timedelta
-            if user['created_at'] > datetime.now() - timedelta(days=1):
-                flags.append("ℹ️ Nouvel utilisateur (< 24h)")
-                risk_score += 15
+        if signals['new_user']:
+            flags.append("ℹ️ Nouvel utilisateur (< 24h)")
+            risk_score += 15
         
         # Déterminer le niveau de risque et la recommandation
         if risk_score <= 10:
@@ -0,0 +1,68 @@
+"""
+Pool de processus borné pour le travail CPU sur les images (hash, dimensions,
+empreintes), hors de la boucle asyncio qui sert les deux bots
+"""
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+from config.settings import IMAGE_WORKERS, IMAGE_QUEUE_LIMIT
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+class ImagePoolBusyError(Exception):
+    """File d'attente du pool pleine: la demande est refusée plutôt que mise en attente"""
+
+
+class ImagePool:
+    """Exécute des fonctions de module (picklables) dans un pool de processus"""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # "spawn": pas de fork d'un processus qui a déjà des threads et des sockets
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def run(self, func: Callable, *args):
+        """Exécute func(*args) dans un processus du pool (ImagePoolBusyError si saturé)"""
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise ImagePoolBusyError(f"{self.pending} images en cours de traitement")
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Pool global du processus (démarré au premier usage)
+image_pool = ImagePool(IMAGE_WORKERS, IMAGE_QUEUE_LIMIT)
+
+registry.gauge(
+    "image_pool_pending", "Images en cours de traitement ou en attente dans le pool",
+    lambda: [({}, image_pool.pending)]
+)
+registry.gauge(
+    "image_pool_rejected", "Images refusées car la file du pool était pleine",
+    lambda: [({}, image_pool.rejected)]
+)
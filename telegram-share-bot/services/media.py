@@ -0,0 +1,78 @@
+"""
+Envoi des médias en réutilisant les file_id Telegram déjà obtenus
+(Telegram ne retélécharge plus le fichier depuis Cloudinary)
+"""
+import json
+import logging
+from typing import Optional
+
+from telegram import Bot, Message
+from telegram.error import BadRequest
+
+from database.queries import save_telegram_file_id
+
+logger = logging.getLogger(__name__)
+
+
+def bot_key(bot: Bot) -> str:
+    """Identifiant du bot (partie publique du token): un file_id n'est valable que pour son bot"""
+    return bot.token.split(":", 1)[0]
+
+
+def stored_file_id(row: dict, bot: Bot) -> Optional[str]:
+    """file_id mémorisé pour ce bot sur la ligne (videos, help_videos, shares)"""
+    file_ids = row.get('telegram_file_ids') or {}
+    if isinstance(file_ids, str):
+        file_ids = json.loads(file_ids)
+    return file_ids.get(bot_key(bot))
+
+
+def _sent_file_id(message: Message, kind: str) -> Optional[str]:
+    if kind == "photo":
+        return message.photo[-1].file_id if message.photo else None
+    # Telegram peut convertir une vidéo en animation ou en document
+    media = message.video or message.animation or message.document
+    return media.file_id if media else None
+
+
+async def _remember(table: str, row_id: int, key: str, file_id: Optional[str]):
+    try:
+        await save_telegram_file_id(table, row_id, key, file_id)
+    except Exception as e:
+        # Le média est parti: seul le prochain envoi repassera par l'URL
+        logger.warning(f"⚠️ file_id non enregistré pour {table} #{row_id}: {e}")
+
+
+async def send_media(
+    bot: Bot,
+    kind: str,
+    chat_id: int,
+    table: str,
+    row: dict,
+    source: Optional[str],
+    **kwargs
+) -> Message:
+    """
+    Envoie un média ("video" ou "photo") depuis le file_id mémorisé pour ce bot,
+    sinon depuis `source` (URL), puis mémorise le file_id renvoyé par Telegram.
+    """
+    send = bot.send_video if kind == "video" else bot.send_photo
+    key = bot_key(bot)
+
+    file_id = stored_file_id(row, bot)
+    if file_id:
+        try:
+            return await send(chat_id=chat_id, **{kind: file_id}, **kwargs)
+        except BadRequest as e:
+            # file_id refusé (fichier expiré ou supprimé): retour à l'URL
+            logger.warning(f"⚠️ file_id refusé pour {table} #{row['id']}: {e}")
+            if not source:
+                await _remember(table, row['id'], key, None)
+                raise
+
+    message = await send(chat_id=chat_id, **{kind: source}, **kwargs)
+
+    sent_file_id = _sent_file_id(message, kind)
+    if sent_file_id and sent_file_id != file_id:
+        await _remember(table, row['id'], key, sent_file_id)
+    return message
@@ -3,7 +3,7 @@ Service de notifications Telegram
 """
 from telegram import Bot
 from telegram.error import TelegramError
-from typing import List, Optional
+from typing import AsyncIterable, List, Optional, Union
 import asyncio
 import logging
 
@@ -138,19 +138,27 @@ Tapez /video pour commencer 👇
 
 
 async def broadcast_message(
-    user_ids: List[int],
+    user_ids: Union[List[int], AsyncIterable[int]],
     message: str,
     delay: float = 0.05  # Délai entre chaque envoi pour éviter le rate limiting
 ) -> dict:
     """
-    Envoie un message broadcast à une liste d'utilisateurs
+    Envoie un message broadcast à une liste (ou un flux asynchrone) d'utilisateurs
     
     Retourne des statistiques d'envoi
     """
     success = 0
     failed = 0
     
-    for user_id in user_ids:
+    async def recipients():
+        if hasattr(user_ids, "__aiter__"):
+            async for user_id in user_ids:
+                yield user_id
+        else:
+            for user_id in user_ids:
+                yield user_id
+    
+    async for user_id in recipients():
         result = await notify_user(user_id, message)
         if result:
             success += 1
@@ -160,7 +168,7 @@ async def broadcast_message(
         await asyncio.sleep(delay)
     
     return {
-        "total": len(user_ids),
+        "total": success + failed,
         "success": success,
         "failed": failed
     }
@@ -0,0 +1,180 @@
+"""
+Score de risque de la file d'attente: caractéristiques lues par lots,
+règles appliquées en un passage vectorisé (NumPy), résultats écrits en un UPDATE
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from config.settings import SCORING_WEIGHTS, SCORING_INTERVAL, SCORING_BATCH_SIZE
+from database.queries import get_scoring_features, save_share_scores
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+BASE_SCORE = 50
+
+
+class RiskFlag:
+    """Bits de shares.risk_flags"""
+    LOW_RATE = 1
+    BUSY_GROUP = 2
+    GROUP_BURST = 4
+    MANY_SHARES_TODAY = 8
+    NEW_USER = 16
+
+
+RISK_FLAG_LABELS = {
+    RiskFlag.LOW_RATE: "⚠️ Faible taux de validation historique",
+    RiskFlag.BUSY_GROUP: "⚠️ Groupe très utilisé",
+    RiskFlag.GROUP_BURST: "⚠️ Groupe très utilisé ces dernières 24h",
+    RiskFlag.MANY_SHARES_TODAY: "⚠️ Beaucoup de partages aujourd'hui",
+    RiskFlag.NEW_USER: "ℹ️ Nouvel utilisateur (< 24h)",
+}
+
+# Ordre des règles (colonnes de la matrice) et drapeau levé par chacune (0 = bonus)
+RULES = (
+    ("high_rate", 0),
+    ("good_rate", 0),
+    ("fair_rate", 0),
+    ("low_rate", RiskFlag.LOW_RATE),
+    ("new_group", 0),
+    ("busy_group", RiskFlag.BUSY_GROUP),
+    ("group_burst", RiskFlag.GROUP_BURST),
+    ("many_shares_today", RiskFlag.MANY_SHARES_TODAY),
+    ("new_user", RiskFlag.NEW_USER),
+)
+
+
+def risk_flag_labels(flags: int) -> List[str]:
+    """Libellés des drapeaux levés dans `flags`"""
+    return [label for bit, label in RISK_FLAG_LABELS.items() if flags & bit]
+
+
+def _column(rows: List[dict], name: str, dtype) -> np.ndarray:
+    return np.fromiter((row[name] or 0 for row in rows), dtype=dtype, count=len(rows))
+
+
+def score_features(rows: List[dict], weights: Dict[str, int] = None):
+    """
+    Score (0-100, bas = risqué) et drapeaux de chaque ligne de get_scoring_features.
+    Retourne (ids, scores, flags) sous forme de tableaux NumPy.
+    """
+    weights = SCORING_WEIGHTS if weights is None else weights
+
+    approved = _column(rows, 'approved_count', np.int64)
+    total = approved + _column(rows, 'pending_count', np.int64) + _column(rows, 'rejected_count', np.int64)
+    rate = np.divide(approved * 100.0, total, out=np.zeros(len(rows)), where=total > 0)
+
+    telegram_today = _column(rows, 'telegram_today', np.int64)
+    whatsapp_today = _column(rows, 'whatsapp_today', np.int64)
+    is_telegram = np.fromiter((row['platform'] == "telegram" for row in rows), dtype=bool, count=len(rows))
+    shares_today = np.where(is_telegram, telegram_today, whatsapp_today)
+
+    group_uses = _column(rows, 'group_uses', np.int64)
+    group_uses_24h = _column(rows, 'group_uses_24h', np.int64)
+
+    # Une colonne par règle, dans l'ordre de RULES
+    matrix = np.column_stack([
+        rate >= 90,
+        (rate >= 70) & (rate < 90),
+        (rate >= 50) & (rate < 70),
+        (rate > 0) & (rate < 30),
+        group_uses == 0,
+        group_uses > 50,
+        group_uses_24h > 10,
+        shares_today >= 4,
+        _column(rows, 'new_user', bool),
+    ])
+
+    rule_weights = np.array([weights.get(name, 0) for name, _ in RULES], dtype=np.int64)
+    rule_bits = np.array([bit for _, bit in RULES], dtype=np.int64)
+
+    scores = np.clip(BASE_SCORE + matrix @ rule_weights, 0, 100)
+    flags = matrix @ rule_bits
+    ids = _column(rows, 'id', np.int64)
+    return ids, scores, flags
+
+
+class RiskScorer:
+    """Passages de scoring périodiques (et à la demande depuis le bot admin)"""
+
+    def __init__(self, interval: float = SCORING_INTERVAL, batch_size: int = SCORING_BATCH_SIZE):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.last_run = None
+        self.last_count = 0
+        self.last_duration = 0.0
+        self._task = None
+        self._lock = asyncio.Lock()
+
+    async def run(self) -> dict:
+        """Score toute la file d'attente; retourne le nombre de partages par niveau de risque"""
+        async with self._lock:
+            started = time.monotonic()
+            summary = {"scored": 0, "high": 0, "medium": 0, "low": 0}
+            after_id = 0
+            while True:
+                rows = await get_scoring_features(after_id, self.batch_size)
+                if not rows:
+                    break
+                ids, scores, flags = score_features(rows)
+                await save_share_scores(ids.tolist(), scores.tolist(), flags.tolist())
+
+                summary["scored"] += len(rows)
+                summary["high"] += int(np.count_nonzero(scores < 40))
+                summary["medium"] += int(np.count_nonzero((scores >= 40) & (scores < 70)))
+                summary["low"] += int(np.count_nonzero(scores >= 70))
+                after_id = rows[-1]['id']
+                if len(rows) < self.batch_size:
+                    break
+
+            self.last_run = time.time()
+            self.last_count = summary["scored"]
+            self.last_duration = time.monotonic() - started
+            return summary
+
+    def start(self):
+        """Démarre les passages périodiques (idempotent)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                summary = await self.run()
+                if summary["scored"]:
+                    logger.info(
+                        f"🎯 {summary['scored']} preuves scorées en {self.last_duration:.2f}s "
+                        f"({summary['high']} à risque)"
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Scoring de la file d'attente en échec: {e}")
+            await asyncio.sleep(self.interval)
+
+
+# Scoreur global du processus
+risk_scorer = RiskScorer()
+
+registry.gauge(
+    "risk_scoring_last_count", "Preuves scorées au dernier passage",
+    lambda: [({}, risk_scorer.last_count)]
+)
+registry.gauge(
+    "risk_scoring_last_duration_seconds", "Durée du dernier passage de scoring",
+    lambda: [({}, risk_scorer.last_duration)]
+)
@@ -0,0 +1,83 @@
+"""
+Caches en mémoire (database/cache.py)
+"""
+import asyncio
+
+from database.cache import CachedValue
+
+
+class Loader:
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.invalidate_during_load = None
+
+    async def __call__(self):
+        self.calls += 1
+        if self.invalidate_during_load is not None:
+            self.invalidate_during_load.invalidate()
+            self.invalidate_during_load = None
+        await self.release.wait()
+        return f"valeur {self.calls}"
+
+
+def test_concurrent_gets_load_once():
+    async def scenario():
+        loader = Loader()
+        cache = CachedValue("test", loader)
+        tasks = [asyncio.create_task(cache.get()) for _ in range(5)]
+        await asyncio.sleep(0)
+        loader.release.set()
+        values = await asyncio.gather(*tasks)
+        assert values == ["valeur 1"] * 5
+        assert loader.calls == 1
+        assert (cache.hits, cache.misses) == (4, 1)
+
+    asyncio.run(scenario())
+
+
+def test_invalidated_during_load_is_not_kept():
+    async def scenario():
+        loader = Loader()
+        loader.release.set()
+        cache = CachedValue("test", loader)
+        loader.invalidate_during_load = cache
+        # La valeur lue est rendue à l'appelant, mais pas gardée: elle peut être périmée
+        assert await cache.get() == "valeur 1"
+        assert cache.peek() is None
+        assert await cache.get() == "valeur 2"
+        assert cache.peek() == "valeur 2"
+
+    asyncio.run(scenario())
+
+
+def test_invalidate_forces_reload():
+    async def scenario():
+        loader = Loader()
+        loader.release.set()
+        cache = CachedValue("test", loader)
+        assert await cache.get() == "valeur 1"
+        assert await cache.get() == "valeur 1"
+        cache.invalidate()
+        assert await cache.get() == "valeur 2"
+
+    asyncio.run(scenario())
+
+
+def test_ttl_bounded_by_max_ttl():
+    async def scenario():
+        loader = Loader()
+        loader.release.set()
+        expired = CachedValue("test", loader, ttl=lambda value: -1)
+        await expired.get()
+        assert expired.peek() is None
+
+        capped = CachedValue("test", loader, ttl=lambda value: 10**9, max_ttl=0)
+        await capped.get()
+        assert capped.peek() is None
+
+        kept = CachedValue("test", loader, ttl=lambda value: 60)
+        await kept.get()
+        assert kept.peek() is not None
+
+    asyncio.run(scenario())
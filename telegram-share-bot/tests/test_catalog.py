@@ -0,0 +1,34 @@
+"""
+Requêtes de l'application toutes nommées dans le catalogue (étiquettes des métriques)
+"""
+import ast
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SOURCES = ("bot_admin", "bot_user", "database", "services", "utils")
+METHODS = {"fetch", "fetchrow", "fetchval", "execute", "executemany"}
+
+
+def _raw_sql_calls(path: Path):
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    for node in ast.walk(tree):
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and node.func.attr in METHODS
+            and isinstance(node.func.value, ast.Name)
+            and node.func.value.id == "db"
+            and node.args
+            and isinstance(node.args[0], (ast.Constant, ast.JoinedStr))
+        ):
+            yield f"{path.relative_to(ROOT)}:{node.lineno}"
+
+
+def test_no_raw_sql_through_db():
+    calls = [
+        call
+        for package in SOURCES
+        for path in sorted((ROOT / package).rglob("*.py"))
+        for call in _raw_sql_calls(path)
+    ]
+    assert calls == []
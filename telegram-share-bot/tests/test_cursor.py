@@ -0,0 +1,26 @@
+"""
+Curseurs de pagination par clé (utils/helpers.py)
+"""
+from datetime import datetime
+
+from utils.helpers import decode_cursor, encode_cursor
+
+
+def test_round_trip_keeps_microseconds():
+    created_at = datetime(2024, 5, 17, 13, 45, 12, 345678)
+    assert decode_cursor(encode_cursor({'created_at': created_at, 'id': 42})) == (created_at, 42)
+
+
+def test_cursor_fits_callback_data():
+    cursor = encode_cursor({'created_at': datetime(2099, 12, 31, 23, 59, 59, 999999), 'id': 2**31 - 1})
+    # callback_data limité à 64 octets, préfixe et numéro de page compris
+    assert len(f"users_page_n_{cursor}_9999".encode()) <= 64
+
+
+def test_cursor_before_epoch():
+    created_at = datetime(1969, 7, 20, 20, 17, 40)
+    assert decode_cursor(encode_cursor({'created_at': created_at, 'id': 1})) == (created_at, 1)
+
+
+def test_null_created_at_is_epoch():
+    assert decode_cursor(encode_cursor({'created_at': None, 'id': 7})) == (datetime(1970, 1, 1), 7)
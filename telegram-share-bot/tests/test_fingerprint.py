@@ -0,0 +1,108 @@
+"""
+Empreintes des preuves et index de Hamming (utils/fingerprint.py)
+"""
+import random
+from io import BytesIO
+
+from PIL import Image
+
+from utils.fingerprint import HammingIndex, analyze_proof, dhash, to_signed, to_unsigned
+
+
+def _flip(value: int, *bits) -> int:
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+
+def test_segments_cover_64_bits():
+    for distance in (0, 3, 5, 10):
+        index = HammingIndex(distance)
+        assert len(index.segments) == distance + 1
+        assert sum(mask.bit_length() for _, mask in index.segments) == 64
+
+
+def test_exact_match():
+    index = HammingIndex(6)
+    index.add(0x0123456789ABCDEF)
+    assert index.find(0x0123456789ABCDEF) == (0x0123456789ABCDEF, 0)
+
+
+def test_match_within_radius():
+    index = HammingIndex(6)
+    value = 0x0123456789ABCDEF
+    index.add(value)
+    # Bits modifiés dans tous les segments sauf un
+    assert index.find(_flip(value, 0, 11, 22, 33, 44, 63)) == (value, 6)
+
+
+def test_no_match_beyond_radius():
+    index = HammingIndex(6)
+    value = 0x0123456789ABCDEF
+    index.add(value)
+    assert index.find(_flip(value, 0, 9, 18, 27, 36, 45, 54)) is None
+
+
+def test_closest_candidate_wins():
+    index = HammingIndex(6)
+    value = 0x0F0F0F0F0F0F0F0F
+    index.add(_flip(value, 1, 2, 3))
+    index.add(_flip(value, 40))
+    assert index.find(value) == (_flip(value, 40), 1)
+    assert len(index) == 2
+
+
+def test_matches_brute_force():
+    rng = random.Random(42)
+    index = HammingIndex(5)
+    stored = [rng.getrandbits(64) for _ in range(300)]
+    for value in stored:
+        index.add(value)
+    for _ in range(200):
+        probe = _flip(rng.choice(stored), *rng.sample(range(64), rng.randint(0, 8)))
+        best = min((bin(v ^ probe).count("1") for v in stored))
+        found = index.find(probe)
+        if best <= 5:
+            assert found is not None and found[1] == best
+        else:
+            assert found is None
+
+
+def test_signed_round_trip():
+    for value in (0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1):
+        signed = to_signed(value)
+        assert -(1 << 63) <= signed < (1 << 63)
+        assert to_unsigned(signed) == value
+    # Une empreinte lue en BIGINT négatif est retrouvée dans l'index
+    index = HammingIndex(3)
+    index.add(to_signed((1 << 64) - 1))
+    assert index.find((1 << 64) - 1) == ((1 << 64) - 1, 0)
+
+
+def _png(image: Image.Image) -> bytes:
+    buffer = BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _gradient(width: int, height: int) -> Image.Image:
+    image = Image.new("L", (width, height))
+    image.putdata([(x * 255 // width + y * 64 // height) % 256 for y in range(height) for x in range(width)])
+    return image
+
+
+def test_dhash_survives_rescaling():
+    original = dhash(_gradient(400, 300))
+    resized = dhash(_gradient(400, 300).resize((200, 150)))
+    assert bin(original ^ resized).count("1") <= 3
+
+
+def test_analyze_proof():
+    result = analyze_proof(_png(_gradient(400, 300)), min_size=200)
+    assert result["error"] is None
+    assert (result["width"], result["height"]) == (400, 300)
+    assert result["dhash"] is not None
+    assert len(result["sha256"]) == 64
+
+    assert analyze_proof(_png(_gradient(100, 100)), min_size=200)["error"] == "too_small"
+    assert analyze_proof(b"not an image", min_size=200)["error"] == "invalid"
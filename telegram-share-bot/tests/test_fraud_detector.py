@@ -0,0 +1,40 @@
+"""
+Contrôles anti-fraude du groupe à la finalisation d'un partage (services/fraud_detector.py)
+"""
+import asyncio
+
+from services import fraud_detector
+
+
+def _signals(**overrides) -> dict:
+    signals = {'blacklisted': False, 'group_recently_used': False}
+    signals.update(overrides)
+    return signals
+
+
+def _check(monkeypatch, signals: dict, calls: list = None):
+    async def fake_get_fraud_signals(user_id, platform, group_link="", *args):
+        if calls is not None:
+            calls.append((user_id, platform, group_link))
+        return signals
+
+    monkeypatch.setattr(fraud_detector, "get_fraud_signals", fake_get_fraud_signals)
+    return asyncio.run(fraud_detector.validate_share_group(7, "https://t.me/groupe", "telegram"))
+
+
+def test_group_signals_read_with_the_link(monkeypatch):
+    calls = []
+    assert _check(monkeypatch, _signals(), calls).is_valid
+    assert calls == [(7, "telegram", "https://t.me/groupe")]
+
+
+def test_blacklisted_group_refused(monkeypatch):
+    result = _check(monkeypatch, _signals(blacklisted=True))
+    assert not result.is_valid
+    assert "liste noire" in result.error
+
+
+def test_recently_used_group_refused(monkeypatch):
+    result = _check(monkeypatch, _signals(group_recently_used=True))
+    assert not result.is_valid
+    assert "déjà partagé" in result.error
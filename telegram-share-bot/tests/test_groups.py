@@ -0,0 +1,83 @@
+"""
+Clés canoniques des groupes et liste noire compilée (utils/helpers.py)
+"""
+import pytest
+
+from utils.helpers import GroupMatcher, canonical_group_key, group_key
+
+
+@pytest.mark.parametrize("link", [
+    "@Grp",
+    "t.me/grp",
+    "https://t.me/grp/",
+    "http://www.t.me/grp?start=1#top",
+    "https://telegram.me/grp",
+    "https://telegram.dog/grp",
+    "https://t.me/s/grp",
+    "  HTTPS://T.ME/GRP  ",
+])
+def test_telegram_links_share_one_key(link):
+    assert canonical_group_key(link) == "t.me/grp"
+
+
+def test_joinchat_is_an_invite():
+    assert canonical_group_key("https://t.me/joinchat/AbC") == canonical_group_key("https://t.me/+abc")
+
+
+def test_whatsapp_link():
+    assert canonical_group_key("https://chat.whatsapp.com/ABC123/") == "chat.whatsapp.com/abc123"
+
+
+@pytest.fixture
+def matcher():
+    return GroupMatcher([
+        "https://t.me/badgrp",
+        "@other",
+        "t.me/spam*",
+        "spam.com",
+        "*.evil.org",
+    ])
+
+
+@pytest.mark.parametrize("link", [
+    "https://t.me/badgrp/",
+    "@other",
+    "https://t.me/spammers",
+    "https://spam.com/groupe",
+    "https://sub.spam.com",
+    "evil.org",
+    "https://a.b.evil.org/x",
+])
+def test_blocked(matcher, link):
+    assert matcher.matches(canonical_group_key(link))
+
+
+@pytest.mark.parametrize("link", [
+    "https://t.me/badgrp2",
+    "https://t.me/good",
+    "https://notspam.com",
+    "https://spam.com.example.org",
+    "https://evil.org.example.com",
+])
+def test_not_blocked(matcher, link):
+    assert not matcher.matches(canonical_group_key(link))
+
+
+def test_size_and_empty():
+    assert len(GroupMatcher(["@a", "@b", "t.me/c*"])) == 3
+    empty = GroupMatcher([])
+    assert len(empty) == 0
+    assert not empty.matches("t.me/a")
+
+
+@pytest.mark.parametrize("platform, link, expected", [
+    ("telegram", "@Grp", "telegram:grp"),
+    ("telegram", "https://telegram.me/grp/", "telegram:grp"),
+    ("telegram", "https://t.me/joinchat/AbC", "telegram:+abc"),
+    ("whatsapp", "https://chat.whatsapp.com/ABC123", "whatsapp:abc123"),
+    ("telegram", "https://example.com/grp", "telegram:example.com/grp"),
+    ("telegram", "", "telegram:"),
+    ("telegram", None, "telegram:"),
+])
+def test_group_key(platform, link, expected):
+    assert group_key(platform, link) == expected
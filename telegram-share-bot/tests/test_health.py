@@ -0,0 +1,143 @@
+"""
+Classement des erreurs par le superviseur du pool (database/health.py)
+"""
+import asyncio
+
+import asyncpg
+import pytest
+
+from database.health import CircuitBreaker, PoolSupervisor, is_connection_error
+
+
+class FakePool:
+    def __init__(self, acquire_delay: float = 0):
+        self.acquire_delay = acquire_delay
+
+    def get_min_size(self):
+        return 2
+
+    def acquire(self):
+        pool = self
+
+        class _Acquire:
+            async def __aenter__(self):
+                await asyncio.sleep(pool.acquire_delay)
+                return FakeConnection()
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return _Acquire()
+
+
+class FakeConnection:
+    async def fetchval(self, query):
+        return 1
+
+
+class FakeDatabase:
+    def __init__(self, pool=None, connect_error: Exception = None):
+        self.pool = pool
+        self.replica_url = None
+        self.breaker = CircuitBreaker(threshold=1, cooldown=60)
+        self.connect_error = connect_error
+        self.connects = 0
+        self.reconnects = 0
+
+    async def ensure_connection(self):
+        if self.pool is None:
+            self.connects += 1
+            if self.connect_error:
+                raise self.connect_error
+            self.pool = FakePool()
+
+    async def reconnect(self):
+        self.reconnects += 1
+
+    async def ensure_listener(self):
+        pass
+
+
+def _check(db: FakeDatabase, supervisor: PoolSupervisor = None) -> bool:
+    return asyncio.run((supervisor or PoolSupervisor(db)).check())
+
+
+@pytest.mark.parametrize("error, expected", [
+    (ConnectionResetError(), True),
+    (OSError("network unreachable"), True),
+    (asyncpg.InterfaceError("connection is closed"), True),
+    (asyncpg.exceptions.AdminShutdownError(), True),
+    (asyncpg.exceptions.UndefinedTableError(), False),
+    (ValueError("bad"), False),
+])
+def test_is_connection_error(error, expected):
+    assert is_connection_error(error) is expected
+
+
+def test_healthy_pool_closes_breaker():
+    db = FakeDatabase(FakePool())
+    db.breaker.record_failure()
+    assert _check(db) is True
+    assert db.breaker.state == CircuitBreaker.CLOSED
+    assert db.reconnects == 0
+
+
+def test_missing_pool_is_created_through_ensure_connection():
+    db = FakeDatabase()
+    assert _check(db) is True
+    assert db.connects == 1
+
+
+def test_connection_error_reconnects():
+    db = FakeDatabase(connect_error=ConnectionRefusedError())
+    assert _check(db) is False
+    assert db.breaker.state == CircuitBreaker.OPEN
+    assert db.reconnects == 1
+
+
+def test_query_error_does_not_reconnect():
+    db = FakeDatabase(connect_error=asyncpg.exceptions.InvalidPasswordError("password authentication failed"))
+    assert _check(db) is False
+    assert db.breaker.state == CircuitBreaker.OPEN
+    assert db.reconnects == 0
+
+
+def _short_timeouts(monkeypatch):
+    real_wait_for = asyncio.wait_for
+
+    async def short_wait_for(awaitable, timeout):
+        return await real_wait_for(awaitable, timeout=0.01)
+
+    monkeypatch.setattr(asyncio, "wait_for", short_wait_for)
+
+
+def test_single_timeout_is_not_a_failure(monkeypatch):
+    _short_timeouts(monkeypatch)
+    db = FakeDatabase(FakePool(acquire_delay=1))
+    assert _check(db) is False
+    assert db.breaker.state == CircuitBreaker.CLOSED
+    assert db.breaker.failures == 0
+    assert db.reconnects == 0
+
+
+def test_repeated_timeouts_trip_breaker_and_reconnect(monkeypatch):
+    _short_timeouts(monkeypatch)
+    db = FakeDatabase(FakePool(acquire_delay=1))
+    supervisor = PoolSupervisor(db, timeout_limit=2)
+    assert _check(db, supervisor) is False
+    assert db.breaker.failures == 0
+    assert _check(db, supervisor) is False
+    assert db.breaker.state == CircuitBreaker.OPEN
+    assert db.reconnects == 1
+
+
+def test_success_resets_timeouts(monkeypatch):
+    _short_timeouts(monkeypatch)
+    db = FakeDatabase(FakePool(acquire_delay=1))
+    supervisor = PoolSupervisor(db, timeout_limit=2)
+    assert _check(db, supervisor) is False
+    db.pool = FakePool()
+    assert _check(db, supervisor) is True
+    db.pool = FakePool(acquire_delay=1)
+    assert _check(db, supervisor) is False
+    assert db.breaker.failures == 0
@@ -0,0 +1,26 @@
+"""
+Index visés par la reprise d'une migration non transactionnelle (database/migrations.py)
+"""
+from database.migrations import MIGRATIONS, Migration
+
+
+def test_concurrent_indexes_are_parsed():
+    migration = Migration(99, "test", [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_a ON t(a)",
+        'create unique index concurrently "idx_b" on t(b)',
+        "DROP INDEX CONCURRENTLY IF EXISTS idx_old",
+        lambda conn: None,
+    ], transactional=False)
+    assert migration.concurrent_indexes == ["idx_a", "idx_b"]
+
+
+def test_every_concurrent_migration_declares_its_indexes():
+    for migration in MIGRATIONS:
+        if migration.transactional:
+            continue
+        creates = sum(
+            statement.upper().count("CREATE INDEX CONCURRENTLY")
+            + statement.upper().count("CREATE UNIQUE INDEX CONCURRENTLY")
+            for statement in migration.statements if isinstance(statement, str)
+        )
+        assert len(migration.concurrent_indexes) == creates, migration.name
@@ -0,0 +1,19 @@
+"""
+Plans d'exécution du catalogue de requêtes (voir explain_queries.py).
+Ignoré sans base PostgreSQL locale: EXPLAIN_DATABASE_URL=postgresql://localhost/sharebot_test
+"""
+import asyncio
+import os
+
+import pytest
+
+from explain_queries import EXPLAIN_DATABASE_URL, check_plans
+
+pytestmark = pytest.mark.skipif(
+    not EXPLAIN_DATABASE_URL or EXPLAIN_DATABASE_URL == os.getenv("DATABASE_URL"),
+    reason="EXPLAIN_DATABASE_URL non défini (base PostgreSQL locale de test)"
+)
+
+
+def test_no_seq_scan_on_large_tables():
+    assert asyncio.run(check_plans(EXPLAIN_DATABASE_URL)) == []
@@ -0,0 +1,107 @@
+"""
+Limites de soumission en mémoire (utils/rate_limit.py)
+"""
+from datetime import datetime
+
+from utils import rate_limit
+from utils.rate_limit import ShareRateLimiter
+
+NOON = datetime(2024, 5, 17, 12, 0).timestamp()
+
+
+def _limiter(**overrides) -> ShareRateLimiter:
+    options = dict(min_delay=600, daily_limits={"telegram": 3}, burst=2, refill_seconds=20)
+    options.update(overrides)
+    return ShareRateLimiter(**options)
+
+
+def test_first_check_allowed():
+    assert _limiter().check(1, "telegram", now=NOON) is None
+
+
+def test_min_delay_after_recorded_share():
+    limiter = _limiter()
+    limiter.record(1, "telegram", NOON)
+    reason, wait = limiter.check(1, "telegram", now=NOON + 60)
+    assert reason == rate_limit.DELAY
+    assert wait == 540
+    assert limiter.check(1, "telegram", now=NOON + 601) is None
+
+
+def test_delay_is_per_platform_and_user():
+    limiter = _limiter()
+    limiter.record(1, "telegram", NOON)
+    assert limiter.check(1, "whatsapp", now=NOON + 1) is None
+    assert limiter.check(2, "telegram", now=NOON + 1) is None
+
+
+def test_daily_limit_until_midnight():
+    limiter = _limiter(min_delay=0)
+    for i in range(3):
+        limiter.record(1, "telegram", NOON + i)
+    reason, wait = limiter.check(1, "telegram", now=NOON + 10)
+    assert reason == rate_limit.DAILY
+    assert wait == 12 * 3600 - 10
+    # Lendemain: les partages de la veille ne comptent plus
+    assert limiter.check(1, "telegram", now=NOON + 12 * 3600 + 1) is None
+
+
+def test_platform_without_daily_limit():
+    limiter = _limiter(min_delay=0, burst=100)
+    for i in range(10):
+        limiter.record(1, "whatsapp", NOON + i)
+    assert limiter.check(1, "whatsapp", now=NOON + 10) is None
+
+
+def test_burst_tokens_refill():
+    limiter = _limiter()
+    assert limiter.check(1, "telegram", now=NOON) is None
+    assert limiter.check(1, "telegram", now=NOON) is None
+    reason, wait = limiter.check(1, "telegram", now=NOON)
+    assert reason == rate_limit.BURST
+    assert wait == 20
+    assert limiter.check(1, "telegram", now=NOON + 20) is None
+    assert limiter.rejected == 1
+
+
+def test_records_kept_in_order():
+    limiter = _limiter()
+    limiter.record(1, "telegram", NOON + 10)
+    limiter.record(1, "telegram", NOON)  # horloge en retard: ramené au dernier horodatage
+    assert len(limiter) == 2
+    reason, wait = limiter.check(1, "telegram", now=NOON + 20)
+    assert reason == rate_limit.DELAY
+    assert wait == 590
+
+
+def test_old_shares_pruned():
+    limiter = _limiter()
+    limiter.record(1, "telegram", NOON - 86400)
+    assert limiter.check(1, "telegram", now=NOON) is None
+    assert len(limiter) == 0
+
+
+def test_clear():
+    limiter = _limiter()
+    limiter.record(1, "telegram", NOON)
+    limiter.clear()
+    assert len(limiter) == 0
+    assert limiter.check(1, "telegram", now=NOON + 1) is None
+
+
+def test_daily_window_follows_database_timezone():
+    utc = rate_limit.database_timezone("UTC", 0)
+    plus_three = rate_limit.database_timezone("<+03>-03", 3 * 3600)
+    evening = datetime(2024, 5, 17, 19, 0, tzinfo=utc).timestamp()
+    late = evening + 3 * 3600  # 22:00 UTC, déjà le lendemain à UTC+3
+    for tz, expected in ((utc, rate_limit.DAILY), (plus_three, None)):
+        limiter = _limiter(min_delay=0, tz=tz)
+        for i in range(3):
+            limiter.record(1, "telegram", evening + i)
+        refused = limiter.check(1, "telegram", now=late)
+        assert (refused[0] if refused else None) == expected
+
+
+def test_database_timezone_names():
+    assert str(rate_limit.database_timezone("Africa/Douala", 3600)) == "Africa/Douala"
+    assert rate_limit.database_timezone("<+03>-03", 10800).utcoffset(None).total_seconds() == 10800
@@ -0,0 +1,58 @@
+"""
+Score de risque vectorisé (services/scoring.py)
+"""
+from services.scoring import RiskFlag, risk_flag_labels, score_features
+
+WEIGHTS = {
+    "high_rate": 30, "good_rate": 20, "fair_rate": 10, "low_rate": -20,
+    "new_group": 10, "busy_group": -10, "group_burst": -20,
+    "many_shares_today": -10, "new_user": -15,
+}
+
+
+def _row(id, **values):
+    row = {
+        "id": id, "platform": "telegram", "new_user": False,
+        "approved_count": 0, "pending_count": 0, "rejected_count": 0,
+        "telegram_today": 0, "whatsapp_today": 0, "group_uses": 1, "group_uses_24h": 0,
+    }
+    row.update(values)
+    return row
+
+
+def test_scores_and_flags():
+    rows = [
+        _row(1),                                              # aucun historique
+        _row(2, approved_count=19, rejected_count=1, group_uses=0),  # 95%, groupe neuf
+        _row(3, approved_count=1, rejected_count=9, new_user=True),  # 10%, nouveau
+        _row(4, group_uses=80, group_uses_24h=20, telegram_today=5),
+        _row(5, platform="whatsapp", telegram_today=9, whatsapp_today=1),
+    ]
+    ids, scores, flags = score_features(rows, WEIGHTS)
+    assert ids.tolist() == [1, 2, 3, 4, 5]
+    assert scores.tolist() == [50, 90, 15, 10, 50]
+    assert flags.tolist() == [
+        0,
+        0,
+        RiskFlag.LOW_RATE | RiskFlag.NEW_USER,
+        RiskFlag.BUSY_GROUP | RiskFlag.GROUP_BURST | RiskFlag.MANY_SHARES_TODAY,
+        0,
+    ]
+
+
+def test_scores_clipped_and_nulls_tolerated():
+    rows = [_row(1, approved_count=None, group_uses=None, group_uses_24h=None)]
+    _, scores, _ = score_features(rows, {**WEIGHTS, "new_group": 200})
+    assert scores.tolist() == [100]
+    _, scores, _ = score_features([_row(2, new_user=True)], {"new_user": -500})
+    assert scores.tolist() == [0]
+
+
+def test_empty_batch():
+    ids, scores, flags = score_features([], WEIGHTS)
+    assert len(ids) == len(scores) == len(flags) == 0
+
+
+def test_flag_labels():
+    assert risk_flag_labels(0) == []
+    assert len(risk_flag_labels(RiskFlag.LOW_RATE | RiskFlag.NEW_USER)) == 2
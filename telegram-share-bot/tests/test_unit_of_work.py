@@ -0,0 +1,113 @@
+"""
+Effets locaux différés jusqu'au COMMIT (database/connection.py, database/events.py)
+"""
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from database.connection import current_unit, db
+from database.events import EventType, bus
+
+
+class FakeTransaction:
+    def __init__(self, log):
+        self.log = log
+
+    async def start(self):
+        self.log.append("begin")
+
+    async def commit(self):
+        self.log.append("commit")
+
+    async def rollback(self):
+        self.log.append("rollback")
+
+
+class FakeConnection:
+    def __init__(self, log):
+        self.log = log
+
+    def transaction(self):
+        return FakeTransaction(self.log)
+
+    async def execute(self, query, *args):
+        self.log.append("execute")
+
+
+@pytest.fixture
+def log(monkeypatch):
+    log = []
+
+    @asynccontextmanager
+    async def acquire():
+        yield FakeConnection(log)
+
+    async def execute(query, *args):
+        unit = current_unit()
+        if unit is not None:
+            await (await unit.connection()).execute(query, *args)
+
+    monkeypatch.setattr(db, "acquire", acquire)
+    monkeypatch.setattr(db, "execute", execute)
+    return log
+
+
+def test_after_commit_runs_after_commit(log):
+    async def scenario():
+        async with db.unit_of_work(transaction=True):
+            await db.execute("UPDATE users SET balance = 0")
+            db.after_commit(lambda: log.append("callback"))
+            log.append("body done")
+
+    asyncio.run(scenario())
+    assert log == ["begin", "execute", "body done", "commit", "callback"]
+
+
+def test_after_commit_dropped_on_rollback(log):
+    async def scenario():
+        async with db.unit_of_work(transaction=True):
+            await db.execute("UPDATE users SET balance = 0")
+            db.after_commit(lambda: log.append("callback"))
+            raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        asyncio.run(scenario())
+    assert log == ["begin", "execute", "rollback"]
+
+
+def test_after_commit_immediate_without_transaction(log):
+    async def scenario():
+        async with db.unit_of_work():
+            db.after_commit(lambda: log.append("callback"))
+            log.append("body done")
+
+    asyncio.run(scenario())
+    assert log == ["callback", "body done"]
+
+
+def test_publish_dispatches_locally_after_commit(log, monkeypatch):
+    received = []
+    monkeypatch.setitem(bus._handlers, "test_event", [received.append])
+
+    async def scenario():
+        async with db.unit_of_work(transaction=True):
+            await bus.publish("test_event", value=1)
+            assert received == []
+        assert [event.data for event in received] == [{"value": 1}]
+
+    asyncio.run(scenario())
+
+
+def test_publish_not_dispatched_on_rollback(log, monkeypatch):
+    received = []
+    monkeypatch.setitem(bus._handlers, EventType.CACHE_INVALIDATED, [received.append])
+
+    async def scenario():
+        async with db.unit_of_work(transaction=True):
+            await bus.publish(EventType.CACHE_INVALIDATED, name="users", keys=["1"])
+            raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        asyncio.run(scenario())
+    assert received == []
@@ -0,0 +1,119 @@
+"""
+Empreintes perceptuelles des captures (dHash 64 bits) et index de recherche
+par distance de Hamming (multi-index hashing)
+"""
+import hashlib
+from array import array
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image
+
+HASH_BITS = 64
+_SIGN_BIT = 1 << (HASH_BITS - 1)
+_HASH_MASK = (1 << HASH_BITS) - 1
+
+
+def dhash(image: Image.Image, size: int = 8) -> int:
+    """
+    Hash de différence: compare chaque pixel à son voisin de droite sur une
+    miniature en niveaux de gris. Résiste au réenregistrement, à la recompression
+    et aux recadrages de quelques pixels.
+    """
+    width = size + 1
+    pixels = image.convert("L").resize((width, size), Image.LANCZOS).tobytes()
+    value = 0
+    for row in range(size):
+        offset = row * width
+        for col in range(size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def analyze_proof(image_data: bytes, min_size: int) -> dict:
+    """
+    Travail CPU d'une preuve, exécuté dans un processus du pool d'images:
+    SHA-256, dimensions (lues dans l'en-tête) puis dHash si l'image est assez grande.
+    error: None, "invalid" ou "too_small".
+    """
+    result = {
+        "sha256": hashlib.sha256(image_data).hexdigest(),
+        "width": None,
+        "height": None,
+        "dhash": None,
+        "error": None,
+    }
+    try:
+        # Image.open ne lit que l'en-tête: rien n'est décodé pour une image refusée
+        with Image.open(BytesIO(image_data)) as image:
+            result["width"], result["height"] = image.size
+            if result["width"] < min_size or result["height"] < min_size:
+                result["error"] = "too_small"
+                return result
+            # JPEG: décodage direct à échelle réduite, suffisant pour une miniature 9x8
+            image.draft("L", (64, 64))
+            result["dhash"] = dhash(image)
+    except Exception:
+        result["error"] = "invalid"
+    return result
+
+
+def to_signed(value: int) -> int:
+    """Empreinte 64 bits -> BIGINT PostgreSQL (signé)"""
+    return value - (1 << HASH_BITS) if value & _SIGN_BIT else value
+
+
+def to_unsigned(value: int) -> int:
+    """BIGINT PostgreSQL -> empreinte 64 bits"""
+    return value & _HASH_MASK
+
+
+class HammingIndex:
+    """
+    Empreintes à distance de Hamming <= max_distance.
+    Les 64 bits sont découpés en max_distance + 1 segments: deux empreintes
+    assez proches ont forcément un segment identique (principe des tiroirs),
+    donc seules les empreintes d'un même seau sont comparées.
+    """
+
+    def __init__(self, max_distance: int):
+        self.max_distance = max_distance
+        self.segments = self._split(max_distance + 1)
+        self.tables: List[Dict[int, array]] = [{} for _ in self.segments]
+        self.size = 0
+
+    @staticmethod
+    def _split(count: int) -> List[Tuple[int, int]]:
+        """(décalage, masque) de chaque segment, largeurs aussi égales que possible"""
+        base, extra = divmod(HASH_BITS, count)
+        segments, shift = [], 0
+        for i in range(count):
+            width = base + (1 if i < extra else 0)
+            segments.append((shift, (1 << width) - 1))
+            shift += width
+        return segments
+
+    def __len__(self):
+        return self.size
+
+    def add(self, value: int):
+        value = to_unsigned(value)
+        for table, (shift, mask) in zip(self.tables, self.segments):
+            bucket = table.get((value >> shift) & mask)
+            if bucket is None:
+                bucket = table[(value >> shift) & mask] = array("Q")
+            bucket.append(value)
+        self.size += 1
+
+    def find(self, value: int) -> Optional[Tuple[int, int]]:
+        """Empreinte la plus proche dans le rayon: (empreinte, distance) ou None"""
+        value = to_unsigned(value)
+        best = None
+        for table, (shift, mask) in zip(self.tables, self.segments):
+            for candidate in table.get((value >> shift) & mask, ()):
+                distance = (candidate ^ value).bit_count()
+                if distance <= self.max_distance and (best is None or distance < best[1]):
+                    best = (candidate, distance)
+                    if distance == 0:
+                        return best
+        return best
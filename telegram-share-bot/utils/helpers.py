@@ -1,8 +1,9 @@
 """
 Fonctions utilitaires
 """
+import re
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Iterable, Optional
 
 
 def format_amount(amount: int) -> str:
@@ -195,3 +196,103 @@ def normalize_link(link: str) -> str:
         link = "https://t.me/" + link[1:]
     
     return link
+
+
+# Domaines équivalents pour un même groupe Telegram
+_GROUP_HOST_ALIASES = {"telegram.me": "t.me", "telegram.dog": "t.me"}
+
+
+def canonical_group_key(link: str) -> str:
+    """
+    Clé canonique d'un groupe: "@grp", "t.me/grp" et "https://t.me/grp/"
+    donnent tous "t.me/grp"
+    """
+    key = link.strip().lower()
+    if key.startswith("@"):
+        key = "t.me/" + key[1:]
+    key = re.sub(r"^[a-z]+://", "", key)
+    key = key.split("?", 1)[0].split("#", 1)[0].rstrip("/")
+    
+    host, sep, path = key.partition("/")
+    if host.startswith("www."):
+        host = host[4:]
+    host = _GROUP_HOST_ALIASES.get(host, host)
+    if host == "t.me":
+        if path.startswith("s/"):
+            path = path[2:]  # aperçu web du canal
+        elif path.startswith("joinchat/"):
+            path = "+" + path[len("joinchat/"):]
+    return host + sep + path
+
+
+# Hôtes dont le chemin suffit à identifier le groupe (pseudo ou code d'invitation)
+_GROUP_LINK_HOSTS = ("t.me", "chat.whatsapp.com")
+
+
+def group_key(platform: str, link: str) -> str:
+    """
+    Identité compacte d'un groupe, stockée dans shares.group_key:
+    "telegram:grp", "telegram:+abc" (invitation), "whatsapp:<code d'invitation>"
+    """
+    key = canonical_group_key(link or "")
+    host, _, path = key.partition("/")
+    if host in _GROUP_LINK_HOSTS and path:
+        key = path
+    return f"{platform}:{key}"
+
+
+class GroupMatcher:
+    """
+    Groupes bloqués: clés exactes (ensemble) et motifs compilés en une regex.
+    Motifs: préfixe "t.me/spam*", domaine "spam.com" ou "*.spam.com".
+    """
+
+    def __init__(self, entries: Iterable[str]):
+        self.exact = set()
+        patterns = []
+        for entry in entries:
+            entry = entry.strip().lower()
+            if entry.startswith("*."):
+                patterns.append(self._domain(canonical_group_key(entry[2:])))
+            elif entry.endswith("*"):
+                patterns.append(re.escape(canonical_group_key(entry[:-1])))
+            else:
+                key = canonical_group_key(entry)
+                if "/" not in key and "." in key and " " not in key:
+                    patterns.append(self._domain(key))
+                else:
+                    self.exact.add(key)
+        self.size = len(self.exact) + len(patterns)
+        self.pattern = re.compile("^(?:" + "|".join(patterns) + ")") if patterns else None
+
+    @staticmethod
+    def _domain(domain: str) -> str:
+        # Le domaine et ses sous-domaines
+        return r"(?:[^/]*\.)?" + re.escape(domain) + r"(?:/|$)"
+
+    def __len__(self):
+        return self.size
+
+    def matches(self, key: str) -> bool:
+        """`key` doit être une clé canonique (canonical_group_key)"""
+        return key in self.exact or (self.pattern is not None and self.pattern.match(key) is not None)
+
+
+# Époque pour l'encodage des curseurs (timestamps naïfs, comme en base)
+_CURSOR_EPOCH = datetime(1970, 1, 1)
+
+
+def encode_cursor(row: dict) -> str:
+    """
+    Encode la position (created_at, id) d'une ligne pour un callback_data.
+    Un created_at NULL vaut l'époque (valeur de reprise de la migration 15).
+    """
+    created_at = row['created_at'] or _CURSOR_EPOCH
+    micros = (created_at - _CURSOR_EPOCH) // timedelta(microseconds=1)
+    return f"{micros}_{row['id']}"
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Décode un curseur produit par encode_cursor -> (created_at, id)"""
+    micros, row_id = cursor.split("_")
+    return _CURSOR_EPOCH + timedelta(microseconds=int(micros)), int(row_id)
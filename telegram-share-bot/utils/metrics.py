@@ -0,0 +1,130 @@
+"""
+Métriques en mémoire exposées au format texte Prometheus
+"""
+from typing import Callable, Dict, Iterable, Tuple
+
+# Bornes (en secondes) adaptées aux requêtes Neon: de 5 ms à 10 s
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_key(labels: dict) -> Tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: Tuple, extra: Tuple = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class Counter:
+    """Compteur monotone étiqueté"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        for key, value in self.values.items():
+            yield f"{self.name}{_format_labels(key)} {_format_value(value)}"
+
+
+class Histogram:
+    """Histogramme cumulatif étiqueté (latences)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.values: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        entry = self.values.get(key)
+        if entry is None:
+            # [compteurs par borne..., somme, total]
+            entry = self.values[key] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[i] += 1
+        entry[-2] += value
+        entry[-1] += 1
+
+    def samples(self) -> Iterable[str]:
+        for key, entry in self.values.items():
+            for i, bound in enumerate(self.buckets):
+                labels = _format_labels(key, (("le", _format_value(bound)),))
+                yield f"{self.name}_bucket{labels} {entry[i]}"
+            yield f"{self.name}_bucket{_format_labels(key, (('le', '+Inf'),))} {entry[-1]}"
+            yield f"{self.name}_sum{_format_labels(key)} {_format_value(entry[-2])}"
+            yield f"{self.name}_count{_format_labels(key)} {entry[-1]}"
+
+
+class Gauge:
+    """Jauge calculée à la lecture via une fonction (taille du pool, retard...)"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, collect: Callable[[], Iterable[Tuple[dict, float]]]):
+        self.name = name
+        self.help_text = help_text
+        self.collect = collect
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in self.collect():
+            if value is None:
+                continue
+            yield f"{self.name}{_format_labels(_label_key(labels))} {_format_value(value)}"
+
+
+class Registry:
+    """Ensemble des métriques du processus"""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def _register(self, metric):
+        return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._register(Counter(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, buckets))
+
+    def gauge(self, name: str, help_text: str, collect: Callable) -> Gauge:
+        return self._register(Gauge(name, help_text, collect))
+
+    def render(self) -> str:
+        """Texte au format d'exposition Prometheus 0.0.4"""
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+# Registre global
+registry = Registry()
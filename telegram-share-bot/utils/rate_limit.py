@@ -0,0 +1,128 @@
+"""
+Limites de soumission des preuves, en mémoire, par (utilisateur Telegram, plateforme):
+délai minimal entre partages (fenêtre glissante), plafond journalier
+et seau de jetons contre les rafales d'envois d'images
+"""
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Dict, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# Motifs de refus renvoyés par check()
+DELAY = "delay"
+DAILY = "daily"
+BURST = "burst"
+
+# Nombre de vérifications entre deux purges des seaux inactifs
+_SWEEP_EVERY = 1000
+
+
+def _today_start(now: float, tz: Optional[tzinfo] = None) -> float:
+    return datetime.fromtimestamp(now, tz).replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+
+
+def database_timezone(name: str, utc_offset: int) -> tzinfo:
+    """
+    Fuseau de CURRENT_DATE en base (paramètre TimeZone de la session).
+    Décalage fixe `utc_offset` (secondes) si le nom n'est pas une zone IANA.
+    """
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone(timedelta(seconds=utc_offset))
+
+
+class ShareRateLimiter:
+    """
+    check() ne fait aucune E/S: appelée avant tout téléchargement,
+    une rafale est refusée sans toucher à la base ni à Telegram.
+    Le jour commence à minuit dans `tz`, le fuseau de CURRENT_DATE en base
+    (fixé par load_share_limiter), comme le plafond de user_stats.
+    """
+
+    def __init__(
+        self,
+        min_delay: float,
+        daily_limits: Dict[str, int],
+        burst: int,
+        refill_seconds: float,
+        tz: Optional[tzinfo] = None
+    ):
+        self.min_delay = min_delay  # secondes entre deux partages créés
+        self.daily_limits = daily_limits  # plateforme -> partages par jour
+        self.burst = burst  # envois d'images acceptés d'affilée
+        self.refill_seconds = refill_seconds  # un jeton rendu toutes les N secondes
+        self.tz = tz  # fuseau du jour (None = fuseau du processus)
+        self.rejected = 0
+        self._shares: Dict[Tuple[int, str], deque] = defaultdict(deque)
+        self._buckets: Dict[Tuple[int, str], Tuple[float, float]] = {}  # (jetons, mise à jour)
+        self._checks = 0
+
+    def __len__(self):
+        return sum(len(times) for times in self._shares.values())
+
+    def _prune(self, key, now: float) -> deque:
+        """Oublie les partages qui ne comptent plus (ni aujourd'hui, ni dans le délai)"""
+        times = self._shares.get(key)
+        if times is None:
+            return deque()
+        horizon = min(_today_start(now, self.tz), now - self.min_delay)
+        while times and times[0] < horizon:
+            times.popleft()
+        if not times:
+            del self._shares[key]
+        return times
+
+    def _sweep(self, now: float):
+        """Supprime les seaux pleins (utilisateurs inactifs)"""
+        full = [
+            key for key, (tokens, updated) in self._buckets.items()
+            if tokens + (now - updated) / self.refill_seconds >= self.burst
+        ]
+        for key in full:
+            del self._buckets[key]
+
+    def check(self, user_id: int, platform: str, now: float = None) -> Optional[Tuple[str, float]]:
+        """
+        Consomme un jeton pour un envoi de preuve.
+        Retourne None si autorisé, sinon (motif, secondes à attendre).
+        """
+        now = time.time() if now is None else now
+        key = (user_id, platform)
+
+        self._checks += 1
+        if self._checks % _SWEEP_EVERY == 0:
+            self._sweep(now)
+
+        times = self._prune(key, now)
+        if times and now - times[-1] < self.min_delay:
+            self.rejected += 1
+            return DELAY, self.min_delay - (now - times[-1])
+
+        today = _today_start(now, self.tz)
+        limit = self.daily_limits.get(platform)
+        if limit is not None and sum(1 for t in times if t >= today) >= limit:
+            self.rejected += 1
+            return DAILY, today + 86400 - now
+
+        tokens, updated = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) / self.refill_seconds)
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            self.rejected += 1
+            return BURST, (1 - tokens) * self.refill_seconds
+        self._buckets[key] = (tokens - 1, now)
+        return None
+
+    def record(self, user_id: int, platform: str, timestamp: float = None):
+        """Enregistre un partage créé (horodatages croissants)"""
+        timestamp = time.time() if timestamp is None else timestamp
+        times = self._shares[(user_id, platform)]
+        if times and timestamp < times[-1]:
+            timestamp = times[-1]
+        times.append(timestamp)
+
+    def clear(self):
+        self._shares.clear()
+        self._buckets.clear()